@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the pending-sections index to the Section table.
+
+This script should be run once on databases created before the index was
+added to the model; new databases get it from create_all.
+"""
+import sqlite3
+
+# Path to the SQLite database
+DATABASE_PATH = "app.db"  # Adjust this if your database is in a different location
+
+def run_migration():
+    """Create the partial index on pending sections if it doesn't exist."""
+    try:
+        # Connect to the SQLite database
+        conn = sqlite3.connect(DATABASE_PATH)
+        cursor = conn.cursor()
+        
+        # Check if the index already exists
+        cursor.execute("PRAGMA index_list(section)")
+        index_names = [index[1] for index in cursor.fetchall()]
+        
+        if 'ix_section_pending' not in index_names:
+            print("Adding ix_section_pending index to section table...")
+            cursor.execute(
+                "CREATE INDEX ix_section_pending ON section (session_id, chapter_idx, section_idx) "
+                "WHERE status = 'pending'"
+            )
+            conn.commit()
+            print("✅ Index added successfully!")
+        else:
+            print("✅ ix_section_pending index already exists. No changes needed.")
+        
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"❌ Error adding ix_section_pending index: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    print("Running migration to add pending-sections index to section table...")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed. See error messages above.")
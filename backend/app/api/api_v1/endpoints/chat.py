@@ -1,12 +1,16 @@
 from typing import Dict, Any
 
+import anthropic
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.schemas.session import ChatRequest, ChatResponse
+from app.services.section_service import save_section as save_section_record
 from app.services.session_service import get_session_by_id
-from app.services.orchestrator_service import process_chat_message
+from app.services.llm.utils import json_dumps_compact
+from app.services.orchestrator_service import get_reflection_results, process_chat_message, stream_chat_message
 
 router = APIRouter()
 
@@ -62,6 +66,108 @@ async def chat_with_orchestrator(
         )
 
 
+@router.post("/{session_id}/chat/stream")
+async def stream_chat_with_orchestrator(
+    session_id: str,
+    chat_request: ChatRequest,
+    db: Session = Depends(get_db)
+) -> StreamingResponse:
+    """
+    Process a chat message through the orchestrator as a server-sent event stream.
+    
+    Drafts generated in the execution phase are sent as "delta" events while
+    Claude is writing them; every stream ends with one "response" event with
+    the same fields as the /chat response.
+    
+    Args:
+        session_id: The session ID
+        chat_request: The user's chat message
+        db: Database session
+        
+    Returns:
+        StreamingResponse of text/event-stream events
+        
+    Raises:
+        HTTPException: If the session is not found
+    """
+    # Get session
+    session = get_session_by_id(db=db, session_id=session_id)
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Session with ID {session_id} not found"
+        )
+    
+    async def events():
+        try:
+            async for event in stream_chat_message(
+                db=db,
+                session_id=session_id,
+                message=chat_request.message
+            ):
+                yield f"data: {json_dumps_compact(event)}\n\n"
+        except Exception as e:
+            # Headers are already sent, so report the error in the stream
+            error = {
+                "type": "response",
+                "message": f"Error processing chat message: {str(e)}",
+                "metadata": {"phase": "error", "error": str(e)}
+            }
+            yield f"data: {json_dumps_compact(error)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.get("/{session_id}/reflections/{batch_id}", response_model=ChatResponse)
+async def get_reflections(
+    session_id: str,
+    batch_id: str,
+    db: Session = Depends(get_db)
+) -> ChatResponse:
+    """
+    Get the reflection questions generated for a "reflect-all" request.
+    
+    "reflect-all" submits the questions for every drafted section as one
+    batch and returns its reflection_batch_id; poll this endpoint with that
+    ID until metadata.status is "ended".
+    
+    Args:
+        session_id: The session ID
+        batch_id: The reflection batch ID
+        db: Database session
+        
+    Returns:
+        ChatResponse with the questions per section, or an in-progress notice
+        
+    Raises:
+        HTTPException: If the session or batch is not found or an error occurs
+    """
+    # Get session
+    session = get_session_by_id(db=db, session_id=session_id)
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Session with ID {session_id} not found"
+        )
+    
+    try:
+        return await get_reflection_results(session_id=session_id, batch_id=batch_id)
+    except (ValueError, anthropic.NotFoundError):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Reflection batch {batch_id} not found"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting reflection questions: {str(e)}"
+        )
+
+
 @router.post("/{session_id}/save-section", response_model=Dict[str, bool])
 async def save_section(
     session_id: str,
@@ -86,8 +192,6 @@ async def save_section(
     Raises:
         HTTPException: If the session or section is not found
     """
-    from app.services.section_service import save_section
-    
     # Get session
     session = get_session_by_id(db=db, session_id=session_id)
     if not session:
@@ -98,7 +202,7 @@ async def save_section(
     
     try:
         # Save section
-        success = save_section(
+        success = save_section_record(
             db=db,
             session_id=session_id,
             chapter_idx=chapter_idx,
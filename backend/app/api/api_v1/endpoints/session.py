@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.schemas.session import SessionCreate, SessionState
-from app.services.llm_service import LLMService
+from app.services.llm_service import get_llm_service
 from app.services.llm.guide_parser import parse_guide_to_json
 from app.services.session_service import (
     create_session,
@@ -65,7 +65,7 @@ async def create_new_session(
         try:
             # Initialize LLM service for logging/tracking
             print("🔄 Initializing LLM service with claude-3-5-haiku-20241022...")
-            llm_service = LLMService()
+            llm_service = get_llm_service()
             
             # Send guide text to be parsed by the LLM service
             print("🔄 Sending guide to Claude API for parsing...")
@@ -18,6 +18,11 @@ class Settings(BaseSettings):
     
     # Database settings
     DATABASE_URL: str = "sqlite:///./app.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # seconds before a pooled connection is replaced; -1 disables
+    DB_QUERY_CACHE_SIZE: int = 1200
+    DB_INSERT_PAGE_SIZE: int = 1000  # rows per statement for bulk inserts
     
     # API keys
     ANTHROPIC_API_KEY: str
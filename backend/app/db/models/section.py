@@ -1,5 +1,6 @@
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
@@ -12,6 +13,18 @@ class Section(Base):
     This model represents a section of a report, storing the draft HTML
     content (including inline citations and references) and the section status.
     """
+    # Lookups by (session_id, chapter_idx, section_idx) use the primary key
+    # index. get_next_pending_section only scans pending rows, so those get a
+    # partial index of their own.
+    __table_args__ = (
+        Index(
+            "ix_section_pending",
+            "session_id", "chapter_idx", "section_idx",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
+    
     # Composite primary key: session_id, chapter_idx, section_idx
     session_id = Column(String, ForeignKey("session.session_id", ondelete="CASCADE"), primary_key=True)
     chapter_idx = Column(Integer, primary_key=True)
@@ -24,8 +37,10 @@ class Section(Base):
         nullable=False
     )
     
-    # HTML content with inline citations and references
-    draft_html = Column(Text, nullable=True)
+    # HTML content with inline citations and references. Deferred so that
+    # loading Section rows (status checks, pending lookups) doesn't pull the
+    # draft bodies along; it is loaded on first access or via a column query.
+    draft_html = deferred(Column(Text, nullable=True))
     
     # Timestamp when the section was saved
     saved_at = Column(DateTime, nullable=True)
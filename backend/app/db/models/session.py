@@ -2,10 +2,17 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import Boolean, Column, DateTime, JSON, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
 
+# Binary JSONB on Postgres (stored pre-parsed, so server-side JSON operators
+# don't re-parse the text); plain JSON elsewhere. Either way the value is
+# decoded once when the row is loaded and the attribute holds the dict itself
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Session(Base):
     """
@@ -15,9 +22,11 @@ class Session(Base):
     It stores the parsed guide JSON, intake responses, orchestrator state, and session creation time.
     """
     session_id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    guide_json = Column(JSON, nullable=False)
-    intake_json = Column(JSON, nullable=False, default="{}")
+    guide_json = Column(JSONType, nullable=False)
+    # In-place changes (intake_json[field] = value) are tracked, so fields can
+    # be added without copying and reassigning the whole dict
+    intake_json = Column(MutableDict.as_mutable(JSONType), nullable=False, default=dict)
     intake_done = Column(Boolean, default=False)
-    state_json = Column(JSON, nullable=True, default=None)
+    state_json = Column(JSONType, nullable=True, default=None)
     created_at = Column(DateTime, default=func.now())
     # No expiration to prevent data loss
@@ -1,12 +1,54 @@
+import json
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-# Create SQLAlchemy engine
+# JSON columns (guide, intake fields, orchestrator state) are written on
+# every chat turn; encode and decode them with orjson when it is installed
+try:
+    import orjson
+    
+    def json_serializer(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    
+    json_deserializer = orjson.loads
+except ImportError:
+    json_serializer = json.dumps
+    json_deserializer = json.loads
+
+# Driver-specific engine options. The same few UPDATE shapes (intake fields,
+# state, sections) run on every turn, so on Postgres they are batched
+# (psycopg2) or prepared server-side after a few executions (psycopg 3).
+_driver = make_url(settings.DATABASE_URL).get_driver_name()
+if _driver == "pysqlite":
+    _engine_options = {"connect_args": {"check_same_thread": False}}
+elif _driver == "psycopg2":
+    _engine_options = {"executemany_mode": "values_plus_batch", "executemany_batch_page_size": 500}
+elif _driver == "psycopg":
+    _engine_options = {"connect_args": {"prepare_threshold": 5}}
+else:
+    _engine_options = {}
+
+# Create SQLAlchemy engine. A larger compiled-statement cache keeps the
+# repeated section/state queries from being recompiled, and a LIFO pool
+# hands out the most recently used (warm) connection first. Bulk inserts
+# (e.g. the section rows of a large guide) are sent in pages of
+# DB_INSERT_PAGE_SIZE rows rather than as one huge statement.
 engine = create_engine(
     settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Only needed for SQLite
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    insertmanyvalues_page_size=settings.DB_INSERT_PAGE_SIZE,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_use_lifo=True,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer,
+    **_engine_options
 )
 
 # Create session factory
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,6 +6,8 @@ import logging
 
 from app.core.config import settings
 from app.db.init_db import init_db
+from app.services.memory_service import flush_pending_writes
+from app.services.orchestrator import flush_pending_state_saves
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -18,8 +21,13 @@ async def lifespan(app: FastAPI):
     init_db()
     logger.info("Database initialized successfully!")
     yield
-    # Shutdown code (if needed)
+    # Shutdown code
     logger.info("Shutting down application...")
+    # Finish orchestrator state saves still being written in the background
+    await flush_pending_state_saves()
+    # Send any memory writes still queued by the background writer
+    if not await asyncio.to_thread(flush_pending_writes, 10.0):
+        logger.warning("Timed out flushing pending memory writes")
 
 # Create FastAPI app with lifespan
 app = FastAPI(
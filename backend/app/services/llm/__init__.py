@@ -9,12 +9,13 @@ This package handles all communication with Claude, including:
 The code is organized into smaller modules by responsibility:
 - base.py: Core API functionality (client initialization, API calls)
 - guide_parser.py: Functions for parsing guide text to JSON
+- rate_limiter.py: Client-side request/token rate limiting
 - phases/: Handlers for different phases (intake, planning, execution, reflection)
 - utils.py: Helper functions used across modules
 """
 
 # Re-export main LLMService class and important components
-from app.services.llm.base import LLMService
+from app.services.llm.base import LLMService, get_llm_service
 
 # Export guide parsing functionality
 from app.services.llm.guide_parser import parse_guide_to_json
@@ -24,11 +25,14 @@ from app.services.llm.phases import (
     generate_intake_response,
     generate_planner_response,
     generate_executor_response,
-    generate_reflector_response
+    stream_executor_response,
+    generate_reflector_response,
+    submit_reflector_batch,
+    get_reflector_batch_results
 )
 
 # Export utility functions that might be needed externally
-from app.services.llm.utils import extract_section_details
+from app.services.llm.utils import extract_section_details, SectionDetails
 
 # Version info
 __version__ = "1.0.0"
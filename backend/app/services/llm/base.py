@@ -5,7 +5,10 @@ This module contains the core LLMService class for interacting with the Anthropi
 It handles client initialization, API calls, and basic response generation.
 """
 import os
-from typing import Dict, List, Any, Optional
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Any, Optional, Tuple, Union
 
 # Use this import for environment variables if python-dotenv is installed
 try:
@@ -16,8 +19,30 @@ except ImportError:
     print("Warning: dotenv module not found. Environment variables must be set manually.")
 
 import anthropic
+import httpx
 
-from app.services.memory_service import MemoryService
+from app.services.memory_service import get_memory_service
+from app.services.llm_cache import LLMCache, MemoryBackend, SemanticCache
+from app.services.llm.rate_limiter import RateLimiter, estimate_tokens
+from app.services.llm.utils import json_dumps_pretty
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """
+    Create the async HTTP client for the Anthropic API.
+    
+    Uses HTTP/2 when the h2 package is installed (httpx[http2]), which
+    multiplexes concurrent calls over a few connections; otherwise HTTP/1.1.
+    
+    Returns:
+        httpx AsyncClient with a keep-alive connection pool
+    """
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+    try:
+        return anthropic.DefaultAsyncHttpxClient(http2=True, limits=limits)
+    except ImportError:
+        print("Warning: h2 module not found. Falling back to HTTP/1.1 for the Anthropic API.")
+        return anthropic.DefaultAsyncHttpxClient(limits=limits)
 
 
 class LLMService:
@@ -57,12 +82,40 @@ class LLMService:
         # Store model to use
         self.model = model
         
+        # Route each kind of call to the cheapest model that handles it well:
+        # short intake questions go to Haiku, planning and guide extraction
+        # (long, detail-heavy output) to Sonnet
+        self.models = {
+            "intake": model,
+            "planner": "claude-3-5-sonnet-20241022",
+            "extract": "claude-3-5-sonnet-20241022"
+        }
+        
         # We're NOT initializing the client here - we'll do it lazily on first use
         # This avoids timing issues and makes debugging easier
         self._client = None
+        self._async_client = None
+        
+        # Keep request/token rates under the account limits (override via env)
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=int(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "40")),
+            tokens_per_minute=int(os.getenv("ANTHROPIC_TOKENS_PER_MINUTE", "16000"))
+        )
+        
+        # Exact-match cache for deterministic (low-temperature) calls
+        self._cache = LLMCache(MemoryBackend(), ttl_seconds=86400)
+        
+        # Similarity cache for conversational phases (opt-in via SEMANTIC_CACHE_ENABLED)
+        self.semantic_cache = SemanticCache()
+        
+        # Serialized guide structure per session (the guide never changes within a session)
+        self._guide_serialized_cache: "OrderedDict[str, str]" = OrderedDict()
+        
+        # Rendered prompt parts that stay fixed within a session, see static_prompt
+        self._static_prompt_cache: "OrderedDict[Tuple[Hashable, ...], str]" = OrderedDict()
         
-        # Initialize memory service
-        self.memory_service = MemoryService()
+        # Shared memory service (one mem0 client per process)
+        self.memory_service = get_memory_service()
         
         print(f"✅ LLMService initialized with model: {self.model} (client will be created on first use)")
     
@@ -79,7 +132,6 @@ class LLMService:
         if self._client is None:
             try:
                 print("🔄 Creating Anthropic client...")
-                import anthropic
                 self._client = anthropic.Anthropic(api_key=self.api_key)
                 print("✅ Anthropic client successfully created")
             except Exception as e:
@@ -88,29 +140,205 @@ class LLMService:
                 
         return self._client
     
-    async def _call_anthropic_api(self, prompt, system=None, max_tokens=1000, temperature=0.7):
+    def get_async_client(self):
+        """
+        Get the async Anthropic client, creating it if needed.
+        
+        Calls made through this client are awaited on the event loop instead
+        of blocking it, so concurrent sessions don't serialize on Claude calls.
+        
+        Returns:
+            Initialized AsyncAnthropic client
+            
+        Raises:
+            ValueError: If client creation fails
+        """
+        if self._async_client is None:
+            try:
+                print("🔄 Creating async Anthropic client...")
+                self._async_client = anthropic.AsyncAnthropic(
+                    api_key=self.api_key,
+                    http_client=_create_http_client(),
+                    timeout=httpx.Timeout(300.0, connect=5.0)
+                )
+                print("✅ Async Anthropic client successfully created")
+            except Exception as e:
+                print(f"❌ ERROR creating async Anthropic client: {str(e)}")
+                raise ValueError(f"Failed to create async Anthropic client: {str(e)}") from e
+                
+        return self._async_client
+    
+    def dumps_guide(self, session_id: str, guide_json: Dict[str, Any]) -> str:
         """
-    Unified method to call Anthropic API that handles different model formats.
+        Serialize the guide's chapter structure for prompts, memoized per session.
+        
+        The output is key-sorted so it is byte-identical across calls, which
+        keeps it eligible for Anthropic prompt caching.
+        
+        Args:
+            session_id: The session the guide belongs to
+            guide_json: The guide structure
+            
+        Returns:
+            Indented JSON string of the guide's chapters
+        """
+        serialized = self._guide_serialized_cache.get(session_id)
+        if serialized is None:
+            serialized = json_dumps_pretty(guide_json.get("chapters", []))
+            self._guide_serialized_cache[session_id] = serialized
+            if len(self._guide_serialized_cache) > 256:
+                self._guide_serialized_cache.popitem(last=False)
+        else:
+            self._guide_serialized_cache.move_to_end(session_id)
+        return serialized
     
-    This method dynamically chooses between messages API and completions API
-    based on the model being used.
+    def static_prompt(self, key: Tuple[Hashable, ...], render: Callable[[], str]) -> str:
+        """
+        Get a prompt part that is fixed for the given key, rendering it once.
+        
+        Phases use this for the parts of their prompts built from data that
+        does not change between turns (e.g. the guide for a session), so only
+        the per-turn remainder is formatted on each call. The key must cover
+        everything the rendered text depends on.
+        
+        Args:
+            key: Cache key, typically (phase, session_id, ...)
+            render: Function rendering the text on a cache miss
+            
+        Returns:
+            The rendered text
+        """
+        text = self._static_prompt_cache.get(key)
+        if text is None:
+            text = render()
+            self._static_prompt_cache[key] = text
+            if len(self._static_prompt_cache) > 512:
+                self._static_prompt_cache.popitem(last=False)
+        else:
+            self._static_prompt_cache.move_to_end(key)
+        return text
     
-    Args:
-        prompt: The user prompt (optional if content is provided directly)
-        system: Optional system prompt
-        max_tokens: Maximum tokens to generate
-        temperature: Controls randomness
-        content: Optional direct content to use instead of prompt
+    def _response_cache_key(self, model, prompt, system, max_tokens, temperature) -> Optional[str]:
+        """
+        Compute the response cache key for a call, or None if it is not cacheable.
+        """
+        if not self._cache.is_cacheable(temperature):
+            return None
+        return self._cache.make_key(
+            model=model,
+            prompt=prompt,
+            system=system,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+    
+    async def _call_anthropic_api_stream(self, prompt, system=None, max_tokens=1000, temperature=0.7, model=None) -> AsyncIterator[str]:
+        """
+        Stream a Claude response as text deltas.
         
-    Returns:
-        Generated text content
-    """
-        client = self.get_client()
+        This lets callers start processing (e.g. incrementally parsing JSON)
+        while the rest of a long response is still being generated. The call
+        goes through the async client and the rate limiter like every other
+        Claude call.
+        
+        Args:
+            prompt: The user prompt, as a string or a list of content blocks
+            system: Optional system prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Controls randomness
+            model: Model to use; defaults to self.model
+            
+        Yields:
+            Text deltas in order (a cached response is yielded whole)
+            
+        Raises:
+            anthropic.APIError: If the API call fails
+        """
+        model = model or self.model
+        cache_key = self._response_cache_key(model, prompt, system, max_tokens, temperature)
+        if cache_key is not None:
+            cached = self._cache.get_sync(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        client = self.get_async_client()
+        messages = [{"role": "user", "content": prompt}]
+        estimated_tokens = estimate_tokens(system or "", messages) + max_tokens
+        parts = []
+        async with self.rate_limiter.reserve(estimated_tokens):
+            async with client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system if system is not None else anthropic.NOT_GIVEN,
+                messages=messages
+            ) as stream:
+                async for text in stream.text_stream:
+                    parts.append(text)
+                    yield text
+        
+        if cache_key is not None:
+            self._cache.set_sync(cache_key, "".join(parts))
+    
+    async def _create_message(self, **params):
+        """
+        Send a messages.create call through the rate limiter.
+        
+        If the API still answers 429 (after the SDK's own retries), all callers
+        are held back for the server's retry-after period and the call is
+        retried once.
+        
+        Args:
+            **params: Arguments for client.messages.create
+            
+        Returns:
+            The Anthropic Message
+        """
+        client = self.get_async_client()
+        estimated_tokens = estimate_tokens(params.get("system") or "", params["messages"]) + params["max_tokens"]
+        
+        for attempt in range(2):
+            async with self.rate_limiter.reserve(estimated_tokens):
+                try:
+                    return await client.messages.create(**params)
+                except anthropic.RateLimitError as e:
+                    if attempt:
+                        raise
+                    try:
+                        retry_after = float(e.response.headers.get("retry-after", "5"))
+                    except ValueError:
+                        retry_after = 5.0
+                    print(f"⚠️ Anthropic rate limit hit, pausing calls for {retry_after}s")
+                    self.rate_limiter.penalize(retry_after)
+    
+    async def _call_anthropic_api(self, prompt, system=None, max_tokens=1000, temperature=0.7, model=None):
+        """
+        Send a single-turn prompt to Claude through the Messages API.
+        
+        Args:
+            prompt: The user prompt, as a string or a list of content blocks
+            system: Optional system prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Controls randomness
+            model: Model to use; defaults to self.model
+            
+        Returns:
+            Generated text content
+        """
+        # Serve repeated deterministic calls (e.g. re-parsing the same guide) from cache
+        model = model or self.model
+        cache_key = self._response_cache_key(model, prompt, system, max_tokens, temperature)
+        cacheable = cache_key is not None
+        if cacheable:
+            cached = self._cache.get_sync(cache_key)
+            if cached is not None:
+                return cached
         
         try:
             # Call the Claude API using the messages endpoint (correct for all Claude 3.x models)
-            message = client.messages.create(
-                model=self.model,
+            message = await self._create_message(
+                model=model,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 system=system,
@@ -120,7 +348,10 @@ class LLMService:
             )
             
             # Return the content from the assistant's message
-            return message.content[0].text
+            response_text = message.content[0].text
+            if cacheable:
+                self._cache.set_sync(cache_key, response_text)
+            return response_text
         except Exception as e:
             print(f"❌ ERROR calling Anthropic API: {str(e)}")
             # Return error message that will be shown to the user
@@ -128,29 +359,32 @@ class LLMService:
     
     async def generate_response(
         self,
-        messages: List[Dict[str, str]],
-        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        system_prompt: Union[str, List[Dict[str, Any]]],
         max_tokens: int = 1000,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate a response from Claude based on the provided messages and system prompt.
         
         Args:
-            messages: List of message objects with role and content
-            system_prompt: System prompt to set Claude's role and behavior
+            messages: List of message objects with role and content (a string
+                      or a list of content blocks, e.g. with cache_control)
+            system_prompt: System prompt to set Claude's role and behavior, as a
+                          string or a list of content blocks
             max_tokens: Maximum tokens to generate in the response
             temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            model: Model to use (e.g. one of self.models); defaults to self.model
             
         Returns:
             Claude's response as a dictionary
         """
-        client = self.get_client()
-        
         try:
-            # Create the message using the Anthropic client
-            response = client.messages.create(
-                model=self.model,
+            # Create the message using the async Anthropic client so the event
+            # loop can serve other requests while waiting on Claude
+            response = await self._create_message(
+                model=model or self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 system=system_prompt,
@@ -175,3 +409,70 @@ class LLMService:
                     "error": str(e)
                 }
             }
+
+    
+    async def stream_response(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: Union[str, List[Dict[str, Any]]],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        batch_interval: float = 0.002
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from Claude as text chunks.
+        
+        Deltas that arrive within batch_interval seconds of the last yielded
+        chunk are joined, so a fast stream is not forwarded token by token.
+        
+        Args:
+            messages: List of message objects with role and content
+            system_prompt: System prompt, as a string or a list of content blocks
+            max_tokens: Maximum tokens to generate in the response
+            temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
+            model: Model to use (e.g. one of self.models); defaults to self.model
+            batch_interval: Seconds over which deltas are joined into one chunk
+            
+        Yields:
+            Text chunks in order
+            
+        Raises:
+            anthropic.APIError: If the API call fails
+        """
+        client = self.get_async_client()
+        estimated_tokens = estimate_tokens(system_prompt, messages) + max_tokens
+        
+        async with self.rate_limiter.reserve(estimated_tokens):
+            async with client.messages.stream(
+                model=model or self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system_prompt,
+                messages=messages
+            ) as stream:
+                pending = []
+                last_yield = time.monotonic()
+                async for text in stream.text_stream:
+                    pending.append(text)
+                    now = time.monotonic()
+                    if now - last_yield >= batch_interval:
+                        yield "".join(pending)
+                        pending.clear()
+                        last_yield = now
+                if pending:
+                    yield "".join(pending)
+
+
+@lru_cache(maxsize=1)
+def get_llm_service() -> LLMService:
+    """
+    Get the shared LLM service, creating it on first use.
+    
+    Sharing one instance keeps its clients, rate limiter and response caches
+    alive across requests instead of rebuilding them for every message.
+    
+    Returns:
+        The process-wide LLMService instance
+    """
+    return LLMService()
@@ -7,14 +7,94 @@ It implements robust parsing with improved error handling and recovery mechanism
 Recent enhancements:
 1. Updated model from claude-3-haiku-20240307 to claude-3-5-haiku-20241022
 2. Improved prompts for both completeness and detailed requirements
-3. Robust JSON sanitization and fallback mechanisms
+3. Robust JSON sanitization, with single-pass recovery of truncated output
 4. Better error handling and recovery
+5. Long guides are split by chapter and the chunks extracted concurrently
+6. Parsed guides are cached on disk by model and guide text
 """
+import asyncio
 import json
+import os
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+# Incremental parsing recovers every chapter completed before a cut-off
+# response; without ijson the text is parsed once it is complete, and
+# truncated output is recovered by _repair_json instead
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 from app.services.llm.base import LLMService
+from app.services.llm_cache import FileBackend, LLMCache
+
+# Guides longer than this are extracted chunk by chunk, since a single call
+# would run into the 8000-token output limit and truncate the JSON
+_CHUNK_THRESHOLD_CHARS = 24000
+# Target size of each chunk; consecutive pieces are merged up to this size
+_CHUNK_TARGET_CHARS = 16000
+# Chapter-like headings the guide text is split on
+_CHAPTER_SPLIT_PATTERN = re.compile(r'(?m)^(?=(?:Chapter|Part|Unit)\s|\d+\.\s+[A-Z])')
+# Attempts per chunk of a long guide before the whole parse is given up
+_CHUNK_ATTEMPTS = 2
+
+# Pattern used to pull JSON out of a markdown code block in the response
+_CODE_BLOCK_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+
+# Raw control characters that are invalid inside JSON strings, and their escapes
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+# Parsed guides persisted on disk, keyed by model and guide text, so the same
+# guide is not re-extracted after a restart or re-upload
+_guide_cache = FileBackend(
+    os.getenv("GUIDE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "llm_service", "guides"))
+)
+_GUIDE_CACHE_ENABLED = os.getenv("LLM_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+_GUIDE_CACHE_TTL = int(os.getenv("GUIDE_CACHE_TTL_SECONDS", str(30 * 86400)))
+
+# System prompt that emphasizes completeness and detailed extraction
+_GUIDE_SYSTEM_PROMPT = """
+        You are a specialized extraction system that converts thesis/report guide text into structured JSON.
+        Follow these rules exactly:
+        1. Output ONLY valid JSON - no other text before or after
+        2. Follow the exact schema provided
+        3. Include EVERY SINGLE section and subsection from the text - do NOT skip any
+        4. Include COMPLETE and DETAILED requirements for each section
+        5. Do not add any additional fields not in the schema
+        6. Escape any special characters in text fields
+        
+        Your TWO primary objectives with EQUAL importance:
+        - COMPLETENESS: Include ALL chapters and sections from the guide
+        - DETAIL: Capture the FULL requirements for each section
+        
+        Convert this thesis/report guide into structured JSON following this schema:
+        
+        {{
+          "title": "GUIDE_TITLE",
+          "chapters": [
+            {{
+              "title": "CHAPTER_TITLE",
+              "sections": [
+                {{
+                  "title": "SECTION_TITLE",
+                  "requirements": "FULL_SECTION_REQUIREMENTS",
+                  "id": "CHAPTER_NUMBER.SECTION_NUMBER"
+                }}
+              ]
+            }}
+          ]
+        }}
+        
+        Follow the schema exactly and make sure all information is properly nested.
+        Guidelines:
+        1. DO NOT SKIP ANY CONTENT - include ALL sections and their COMPLETE requirements
+        2. Keep section numbers (like "1.1", "3.3.2") in the titles
+        3. If the document uses different terminology (like "Parts" or "Units"), map them to "chapters" and "sections" in the output
+        4. Preserve ALL requirement details including bullet points, numbered lists, and specific instructions
+        5. If there are multiple sections with the same title but different chapter contexts, include them all
+        
+        """
 
 
 async def parse_guide_to_json(llm_service: LLMService, guide_text: str) -> Dict[str, Any]:
@@ -22,8 +102,9 @@ async def parse_guide_to_json(llm_service: LLMService, guide_text: str) -> Dict[
     Convert report guide text to structured JSON using the LLM.
     
     This function sends the guide text to Claude and asks it to extract
-    the structure into a JSON format. It includes fallback mechanisms if
-    the initial attempt fails.
+    the structure into a JSON format. Long guides are split into chapter
+    chunks that are extracted separately and merged. It includes fallback
+    mechanisms if the initial attempt fails.
     
     Args:
         llm_service: Initialized LLM service instance
@@ -34,12 +115,28 @@ async def parse_guide_to_json(llm_service: LLMService, guide_text: str) -> Dict[
     """
     print(f"Parsing guide text ({len(guide_text)} characters)...")
     
+    # Return a previously parsed copy of the same guide if we have one
+    cache_key = LLMCache.make_key(model=llm_service.models["extract"], guide_text=guide_text)
+    if _GUIDE_CACHE_ENABLED:
+        cached_guide = await asyncio.to_thread(_guide_cache.get, cache_key)
+        if cached_guide is not None:
+            print("✅ Loaded parsed guide from cache")
+            return cached_guide
+    
     try:
-        # First attempt: Try to extract the entire guide in one call
-        guide_json = await _extract_full_guide(llm_service, guide_text)
+        if len(guide_text) > _CHUNK_THRESHOLD_CHARS:
+            # Long guide: extract chapter chunks separately and merge them
+            guide_json, complete = await _extract_full_guide_async(llm_service, guide_text)
+        else:
+            # Try to extract the entire guide in one call
+            guide_json, complete = await _extract_full_guide(llm_service, guide_text)
         
         if guide_json:
             print("✅ Successfully parsed guide to JSON")
+            # Only cache a guide that was extracted in full; one recovered
+            # from truncated output is returned but extracted again next time
+            if _GUIDE_CACHE_ENABLED and complete:
+                await asyncio.to_thread(_guide_cache.set, cache_key, guide_json, _GUIDE_CACHE_TTL)
             return guide_json
         else:
             print("⚠️ Failed to extract guide JSON, using fallback")
@@ -83,204 +180,478 @@ async def parse_guide_to_json(llm_service: LLMService, guide_text: str) -> Dict[
         }
 
 
-async def _extract_full_guide(llm_service: LLMService, guide_text: str) -> Dict[str, Any]:
+def _build_user_prompt(guide_text: str, part: Optional[str] = None) -> str:
     """
-    Attempt to extract the entire guide in one call.
-    
-    This function uses a carefully crafted prompt to extract the guide
-    structure while preserving ALL content from the original guide text.
+    Build the extraction prompt for a guide, or for one part of a long guide.
     
     Args:
-        llm_service: Initialized LLM service
-        guide_text: The raw guide text
+        guide_text: The raw guide text (or one chunk of it)
+        part: Optional position of the chunk in the guide, e.g. "part 2 of 5"
         
     Returns:
-        Parsed guide as dictionary or None if parsing failed
+        The user prompt
     """
-    # Create a system prompt that emphasizes completeness and detailed extraction
-    system_prompt = """
-        You are a specialized extraction system that converts thesis/report guide text into structured JSON.
-        Follow these rules exactly:
-        1. Output ONLY valid JSON - no other text before or after
-        2. Follow the exact schema provided
-        3. Include EVERY SINGLE section and subsection from the text - do NOT skip any
-        4. Include COMPLETE and DETAILED requirements for each section
-        5. Do not add any additional fields not in the schema
-        6. Escape any special characters in text fields
-        
-        Your TWO primary objectives with EQUAL importance:
-        - COMPLETENESS: Include ALL chapters and sections from the guide
-        - DETAIL: Capture the FULL requirements for each section
-        
-        Convert this thesis/report guide into structured JSON following this schema:
+    if part is None:
+        return f"""Extract ALL chapters and sections from this thesis/report guide using the specified schema. Process the ENTIRE document:
+
+{guide_text}
+
+Ensure you extract EVERY chapter and section, not just the first few. Double-check that nothing is missing."""
+    
+    return f"""This is {part} of a longer thesis/report guide. Extract ALL chapters and sections in this part using the specified schema. Process the ENTIRE part:
+
+{guide_text}
+
+Ensure you extract EVERY chapter and section in this part. Double-check that nothing is missing."""
+
+
+def _parse_guide_response(response: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parse Claude's extraction response into a guide dictionary.
+    
+    Args:
+        response: The raw response text
         
-        {{
-          "title": "GUIDE_TITLE",
-          "chapters": [
-            {{
-              "title": "CHAPTER_TITLE",
-              "sections": [
-                {{
-                  "title": "SECTION_TITLE",
-                  "requirements": "FULL_SECTION_REQUIREMENTS",
-                  "id": "CHAPTER_NUMBER.SECTION_NUMBER"
-                }}
-              ]
-            }}
-          ]
-        }}
+    Returns:
+        Tuple of the parsed guide and whether it is complete (False if it was
+        recovered from truncated output)
         
-        Follow the schema exactly and make sure all information is properly nested.
-        Guidelines:
-        1. DO NOT SKIP ANY CONTENT - include ALL sections and their COMPLETE requirements
-        2. Keep section numbers (like "1.1", "3.3.2") in the titles
-        3. If the document uses different terminology (like "Parts" or "Units"), map them to "chapters" and "sections" in the output
-        4. Preserve ALL requirement details including bullet points, numbered lists, and specific instructions
-        5. If there are multiple sections with the same title but different chapter contexts, include them all
+    Raises:
+        json.JSONDecodeError: If the response cannot be parsed even after cleaning
+    """
+    # First, try to extract JSON if it's wrapped in other text
+    json_match = _CODE_BLOCK_RE.search(response)
+    if json_match:
+        json_text = json_match.group(1)
+        print("Found JSON in code block")
+    else:
+        # If not in code block, use the whole response
+        json_text = response
         
-        """
-    
-  
-    # Create user prompt with the guide text to satisfy Anthropic API requirements
-    user_prompt = f"""Extract ALL chapters and sections from this thesis/report guide using the specified schema. Process the ENTIRE document:
+    # Clean and parse the JSON
+    return _sanitize_json(json_text)
 
-{guide_text}
 
-Ensure you extract EVERY chapter and section, not just the first few. Double-check that nothing is missing."""
+async def _extract_full_guide(llm_service: LLMService, guide_text: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Attempt to extract the entire guide in one call.
     
-    # Call the LLM API with increased token limit to ensure completeness
-    response = await llm_service._call_anthropic_api(
-        prompt=user_prompt,
-        system=system_prompt,
-        max_tokens=8000,  # Significantly increased to ensure complete extraction of large documents
-        temperature=0.2   # Low temperature for more deterministic output
-    )
+    This function uses a carefully crafted prompt to extract the guide
+    structure while preserving ALL content from the original guide text.
+    
+    Args:
+        llm_service: Initialized LLM service
+        guide_text: The raw guide text
+        
+    Returns:
+        Tuple of the parsed guide (None if parsing failed) and whether it is
+        complete
+    """
+    try:
+        # Stream the response and parse it as it arrives
+        response, guide_json, complete = await _stream_and_parse(llm_service, _build_user_prompt(guide_text))
+    except Exception as e:
+        print(f"❌ ERROR calling Anthropic API: {str(e)}")
+        return None, False
     
     # Debug
     print(f"LLM response length: {len(response)}")
     print(f"Response preview: {response[:200]}...")
     
+    if guide_json is not None:
+        return guide_json, complete
+    
     try:
-        # Try to parse the response as JSON
-        # First, try to extract JSON if it's wrapped in other text
-        json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-        if json_match:
-            json_text = json_match.group(1)
-            print("Found JSON in code block")
-        else:
-            # If not in code block, use the whole response
-            json_text = response
-            
-        # Clean and parse the JSON
-        return _sanitize_json(json_text)
+        # The streamed JSON needed repairs, so parse the full response instead
+        # (recovering partial output if truncated)
+        return _parse_guide_response(response)
     except Exception as e:
         print(f"Error extracting guide JSON: {str(e)}")
-        # Try fallback to partial extraction
-        return _extract_partial_json(response)
+        return None, False
 
 
-def _sanitize_json(text: str) -> Dict[str, Any]:
+async def _stream_and_parse(llm_service: LLMService, prompt: str) -> Tuple[str, Optional[Dict[str, Any]], bool]:
     """
-    Attempt to fix common JSON errors in LLM outputs.
+    Stream a guide extraction response, parsing the JSON as it arrives.
     
-    This function handles various issues like trailing commas, unquoted keys,
-    and other common formatting problems in JSON generated by language models.
+    Deltas are pushed into an incremental parser, so by the time the last
+    token is received the guide is already built. A response cut off at the
+    token limit still yields every chapter completed before the cut.
     
     Args:
-        text: The potentially malformed JSON text
+        llm_service: Initialized LLM service
+        prompt: The extraction prompt
         
     Returns:
-        Cleaned and parsed JSON as dictionary
+        Tuple of the full response text, the parsed guide (None if the
+        streamed JSON was malformed and needs the repair path) and whether
+        the guide is complete rather than cut off
     """
-    # Initial clean-up
-    text = text.strip()
+    parser = _IncrementalJSONParser()
+    parts: List[str] = []
     
-    # Remove any leading/trailing markdown or text before/after JSON
-    # First, try to find the first { and last }
-    start_idx = text.find('{')
-    end_idx = text.rfind('}')
+    async for text in llm_service._call_anthropic_api_stream(
+        prompt=prompt,
+        system=_GUIDE_SYSTEM_PROMPT,
+        max_tokens=8000,  # Significantly increased to ensure complete extraction of large documents
+        temperature=0.2,  # Low temperature for more deterministic output
+        model=llm_service.models["extract"]
+    ):
+        parts.append(text)
+        parser.feed(text)
+    parser.finish()
+    
+    response = "".join(parts)
+    if parser.syntax_error:
+        return response, None, False
+    return response, parser.value, parser.complete
+
+
+def _split_guide_text(guide_text: str) -> List[str]:
+    """
+    Split guide text into chunks at chapter-like headings.
     
-    if start_idx >= 0 and end_idx >= 0:
-        text = text[start_idx:end_idx+1]
+    Consecutive pieces are merged until a chunk reaches _CHUNK_TARGET_CHARS,
+    so numbered lists that happen to match the heading pattern do not produce
+    a flood of tiny requests.
     
-    # Common JSON errors and fixes
-    try:
-        # First attempt: Try parsing as-is
-        return json.loads(text)
-    except json.JSONDecodeError:
-        # Fix common issues
-        
-        # 1. Remove trailing commas before closing brackets
-        text = re.sub(r',\s*}', '}', text)
-        text = re.sub(r',\s*]', ']', text)
+    Args:
+        guide_text: The raw guide text
         
-        # 2. Add quotes around unquoted keys
-        text = re.sub(r'([{,])\s*([a-zA-Z0-9_]+)\s*:', r'\1"\2":', text)
+    Returns:
+        List of text chunks in document order
+    """
+    chunks: List[str] = []
+    current = ""
+    for piece in _CHAPTER_SPLIT_PATTERN.split(guide_text):
+        if current and len(current) + len(piece) > _CHUNK_TARGET_CHARS:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _merge_guide_chunks(
+    results: List[Tuple[Optional[Dict[str, Any]], bool]]
+) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Merge guides extracted from consecutive chunks into a single guide.
+    
+    A chapter cut in two by a chunk boundary is extracted twice under the same
+    title; such adjacent chapters are joined back together.
+    
+    Args:
+        results: Parsed guide per chunk (None for failed chunks) and whether
+                 it is complete, in document order
         
-        # 3. Replace single quotes with double quotes
-        text = re.sub(r"'(.*?)'", r'"\1"', text)
+    Returns:
+        Tuple of the merged guide and whether every chunk is complete. The
+        guide is None if any chunk failed, since merging the rest would
+        silently drop that chunk's chapters
+    """
+    failed = [i + 1 for i, (result, _) in enumerate(results) if not result]
+    if failed:
+        print(f"❌ Guide chunks {failed} of {len(results)} could not be extracted")
+        return None, False
+    
+    guides = [result for result, _ in results]
+    merged = {key: value for key, value in guides[0].items() if key != "chapters"}
+    chapters: List[Dict[str, Any]] = []
+    for result in guides:
+        for chapter in result.get("chapters", []):
+            if chapters and chapters[-1].get("title") == chapter.get("title"):
+                chapters[-1].setdefault("sections", []).extend(chapter.get("sections", []))
+            else:
+                chapters.append(chapter)
+    merged["chapters"] = chapters
+    return merged, all(complete for _, complete in results)
+
+
+async def _extract_chunk(llm_service: LLMService, chunk: str, part: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Extract one chunk of a long guide, retrying once if it fails.
+    
+    Args:
+        llm_service: Initialized LLM service
+        chunk: The chunk text
+        part: Position of the chunk in the guide, e.g. "part 2 of 5"
         
-        # Try again with cleaned text
+    Returns:
+        Tuple of the parsed chunk (None if parsing failed) and whether it is
+        complete
+    """
+    for attempt in range(_CHUNK_ATTEMPTS):
+        # API failures come back as an error message, which fails to parse;
+        # errors are never cached, so the retry makes a fresh call
+        response = await llm_service._call_anthropic_api(
+            prompt=_build_user_prompt(chunk, part),
+            system=_GUIDE_SYSTEM_PROMPT,
+            max_tokens=8000,
+            temperature=0.2,
+            model=llm_service.models["extract"]
+        )
         try:
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse JSON after cleaning: {str(e)}")
-            # If we still can't parse, try partial extraction
-            raise
+            return _parse_guide_response(response)
+        except Exception as e:
+            print(f"Error extracting guide JSON for {part} (attempt {attempt + 1}): {str(e)}")
+    return None, False
+
+
+async def _extract_full_guide_async(llm_service: LLMService, guide_text: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Extract a long guide by sending its chapter chunks concurrently.
+    
+    Args:
+        llm_service: Initialized LLM service
+        guide_text: The raw guide text
+        
+    Returns:
+        Tuple of the merged guide (None if any chunk could not be parsed) and
+        whether every chunk is complete
+    """
+    chunks = _split_guide_text(guide_text)
+    if len(chunks) <= 1:
+        return await _extract_full_guide(llm_service, guide_text)
+    
+    print(f"Extracting guide in {len(chunks)} chunks...")
+    results = await asyncio.gather(*[
+        _extract_chunk(llm_service, chunk, f"part {i + 1} of {len(chunks)}")
+        for i, chunk in enumerate(chunks)
+    ])
+    return _merge_guide_chunks(results)
+
+
+def _sanitize_json(text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Attempt to fix common JSON errors in LLM outputs.
+    
+    The text is parsed in a single incremental pass, which succeeds on
+    well-formed JSON and also recovers everything completed before the end of
+    a truncated response. Only if that pass hits malformed JSON are common
+    formatting problems (trailing commas, unquoted keys, single quotes)
+    repaired and the text parsed once more.
+    
+    Args:
+        text: The potentially malformed JSON text
+        
+    Returns:
+        Tuple of the parsed JSON as dictionary and whether the object was
+        complete (False if it was recovered from truncated text)
+        
+    Raises:
+        json.JSONDecodeError: If no JSON object could be recovered
+    """
+    parser = _IncrementalJSONParser()
+    parser.feed(text)
+    parser.finish()
+    if not parser.syntax_error and parser.value is not None:
+        return parser.value, parser.complete
+    
+    # Repair the malformed JSON in one scan and recover whatever is
+    # complete before any remaining error
+    text, truncated = _repair_json(text)
+    parser = _IncrementalJSONParser()
+    parser.feed(text)
+    parser.finish()
+    if parser.value is None:
+        print("Failed to parse JSON after cleaning")
+        raise json.JSONDecodeError("No JSON object could be recovered", text, 0)
+    return parser.value, parser.complete and not truncated
 
 
-def _extract_partial_json(text: str) -> Dict[str, Any]:
+def _repair_json(text: str) -> Tuple[str, bool]:
     """
-    Attempt to extract partial JSON structure from malformed LLM output.
-    Uses regex to extract key elements even when JSON parsing fails.
+    Fix common LLM JSON errors in a single string-aware, stack-based scan.
+    
+    Outside of strings this removes trailing commas before a closing bracket
+    and quotes bare object keys; single-quoted strings become double-quoted
+    and raw newlines/tabs inside strings are escaped. Open strings and
+    containers left by a truncated response are closed at the end, in
+    reverse order of opening. Text before the first { and after the
+    top-level object is dropped.
     
     Args:
-        text: The malformed JSON text to extract from
+        text: The malformed JSON text
         
     Returns:
-        A basic JSON structure with whatever could be extracted
+        Tuple of the repaired JSON text and whether it had to be closed
+        because the input was truncated
+    """
+    out: List[str] = []
+    closers: List[str] = []  # stack of closing brackets for open containers
+    prev = ""  # last significant (non-whitespace) character emitted
+    i = max(text.find('{'), 0)
+    n = len(text)
+    
+    while i < n:
+        ch = text[i]
+        
+        if ch == '"' or ch == "'":
+            # Copy the string up to its closing quote (or the end of a
+            # truncated response), always emitting it double-quoted
+            j = i + 1
+            chunk: List[str] = []
+            while j < n and text[j] != ch:
+                c = text[j]
+                if c == '\\' and j + 1 < n:
+                    if ch == "'" and text[j + 1] == "'":
+                        chunk.append("'")
+                    else:
+                        chunk.append(text[j:j + 2])
+                    j += 2
+                    continue
+                if c == '"':
+                    chunk.append('\\"')
+                else:
+                    chunk.append(_STRING_ESCAPES.get(c, c))
+                j += 1
+            out.append('"' + "".join(chunk) + '"')
+            prev = '"'
+            i = j + 1
+            continue
+        
+        if ch in '{[':
+            closers.append('}' if ch == '{' else ']')
+            out.append(ch)
+        elif ch in '}]':
+            _drop_trailing_comma(out)
+            if closers:
+                closers.pop()
+            out.append(ch)
+            if not closers:
+                # The top-level object is complete; ignore any trailing text
+                return "".join(out), False
+        elif ch.isalnum() or ch in '_-':
+            # Bare word: a number or literal, or an unquoted key if a colon follows
+            j = i + 1
+            while j < n and (text[j].isalnum() or text[j] in '_-.+'):
+                j += 1
+            word = text[i:j]
+            k = j
+            while k < n and text[k].isspace():
+                k += 1
+            if prev in '{,' and k < n and text[k] == ':':
+                word = f'"{word}"'
+            out.append(word)
+            prev = word[-1]
+            i = j
+            continue
+        else:
+            out.append(ch)
+        
+        if not ch.isspace():
+            prev = ch
+        i += 1
+    
+    # Truncated response: close the open containers in reverse order
+    _drop_trailing_comma(out)
+    out.extend(reversed(closers))
+    return "".join(out), True
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    """Remove a comma (and the whitespace after it) at the end of out."""
+    k = len(out)
+    while k and out[k - 1].isspace():
+        k -= 1
+    if k and out[k - 1] == ',':
+        del out[k - 1:]
+
+
+class _IncrementalJSONParser:
+    """
+    Push parser that builds a JSON object from text fed in pieces.
+    
+    Text before the first { (e.g. a code fence) is skipped, and parsing stops
+    once the top-level object is closed, so trailing text is ignored. When the
+    input ends early or turns out to be malformed, value still holds the
+    objects and arrays built up to that point.
+    
+    Without ijson the text is buffered and parsed in finish; input that ends
+    early is then reported as a syntax error, with no partial value.
     """
-    # Initialize basic structure
-    guide = {
-        "title": "Extracted Guide",
-        "description": "Partially extracted from guide text",
-        "chapters": []
-    }
-    
-    # Try to extract title
-    title_match = re.search(r'"title"\s*:\s*"([^"]+)"', text)
-    if title_match:
-        guide["title"] = title_match.group(1)
-    
-    # Try to extract description
-    desc_match = re.search(r'"description"\s*:\s*"([^"]+)"', text)
-    if desc_match:
-        guide["description"] = desc_match.group(1)
-    
-    # Try to extract chapters
-    chapter_matches = re.finditer(r'"title"\s*:\s*"(Chapter [^"]+)"', text)
-    for i, match in enumerate(chapter_matches):
-        chapter_title = match.group(1)
-        guide["chapters"].append({
-            "title": chapter_title,
-            "description": f"Chapter {i+1}",
-            "sections": [{
-                "title": f"Section {i+1}.1",
-                "description": "Automatically generated section",
-                "requirements": ["Requirement extracted from guide"]
-            }]
-        })
-    
-    # If no chapters found, add a placeholder
-    if not guide["chapters"]:
-        guide["chapters"] = [{
-            "title": "Chapter 1",
-            "description": "Automatically generated chapter",
-            "sections": [{
-                "title": "Section 1.1",
-                "description": "Automatically generated section",
-                "requirements": ["Requirement should be added manually"]
-            }]
-        }]
-    
-    return guide
+    
+    def __init__(self):
+        if ijson is not None:
+            self._events = ijson.sendable_list()
+            self._parser = ijson.basic_parse_coro(self._events, use_float=True)
+            self._builder = ijson.ObjectBuilder()
+        else:
+            self._pieces: List[str] = []
+            self._value: Optional[Dict[str, Any]] = None
+        self._started = False
+        self._done = False
+        # True when parsing stopped on malformed JSON rather than end of input
+        self.syntax_error = False
+    
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level object has been closed."""
+        if ijson is None:
+            return self._value is not None
+        return self._started and self._builder.value is not None and not self._builder.containers
+    
+    @property
+    def value(self) -> Optional[Dict[str, Any]]:
+        """The top-level object built so far, or None if no object was started."""
+        value = self._builder.value if ijson is not None else self._value
+        return value if isinstance(value, dict) else None
+    
+    def feed(self, text: str) -> None:
+        """
+        Parse the next piece of text.
+        
+        Args:
+            text: The next piece of the JSON text
+        """
+        if self._done:
+            return
+        if not self._started:
+            start_idx = text.find('{')
+            if start_idx < 0:
+                return
+            text = text[start_idx:]
+            self._started = True
+        
+        if ijson is None:
+            self._pieces.append(text)
+            return
+        
+        try:
+            self._parser.send(text.encode("utf-8"))
+            error = False
+        except ijson.JSONError:
+            error = True
+        self._drain()
+        
+        # An error after the object closed is just trailing text
+        if self.complete:
+            self._done = True
+        elif error:
+            self._done = True
+            self.syntax_error = True
+    
+    def finish(self) -> None:
+        """Signal the end of input, keeping partial values if it was truncated."""
+        if ijson is None:
+            if self._started and not self._done:
+                try:
+                    # raw_decode stops at the end of the object, ignoring trailing text
+                    self._value, _ = json.JSONDecoder().raw_decode("".join(self._pieces))
+                except json.JSONDecodeError:
+                    self.syntax_error = True
+        elif self._started and not self._done:
+            try:
+                self._parser.close()
+            except ijson.JSONError:
+                # Truncated input: keep the structure built so far
+                pass
+            self._drain()
+        self._done = True
+    
+    def _drain(self) -> None:
+        for event, value in self._events:
+            self._builder.event(event, value)
+        del self._events[:]
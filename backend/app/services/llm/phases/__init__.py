@@ -16,5 +16,5 @@ the responses from Claude accordingly.
 # Export phase-specific handler functions
 from app.services.llm.phases.intake import generate_intake_response
 from app.services.llm.phases.planning import generate_planner_response
-from app.services.llm.phases.execution import generate_executor_response
-from app.services.llm.phases.reflection import generate_reflector_response
+from app.services.llm.phases.execution import generate_executor_response, stream_executor_response
+from app.services.llm.phases.reflection import generate_reflector_response, submit_reflector_batch, get_reflector_batch_results
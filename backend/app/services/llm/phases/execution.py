@@ -4,10 +4,58 @@ Execution phase handler for the LLM Service.
 This module handles response generation for the execution phase,
 where Claude generates draft content based on bullet points and search results.
 """
-import json
-from typing import Dict, Any, List
+import copy
+from typing import AsyncIterator, Dict, Any, List
 
 from app.services.llm.base import LLMService
+from app.services.llm.utils import cached_text_block, format_for_prompt
+
+
+# System prompt for the Executor role
+_SYSTEM_PROMPT = """
+    You are an expert content creator who specializes in writing high-quality report sections.
+    Your job is to generate well-structured, informative content based on the user's requirements.
+    
+    When search results are provided:
+    1. Incorporate relevant information from the search results
+    2. Provide proper citations using [Source X] format
+    3. Ensure factual accuracy and avoid hallucinations
+    
+    Write in a clear, professional tone and organize the content logically.
+    Include a brief introduction, well-developed body paragraphs, and a conclusion.
+    Make sure to cover ALL the bullet points provided by the user.
+    """
+
+# User message templates; only the placeholders change between calls
+_SEARCH_RESULTS_TEMPLATE = """
+        Use the following search results as references:
+        {search_results}
+        
+        When using information from these sources, provide proper citations.
+        """
+
+# The section comes first and ends the prompt-cached prefix (system prompt
+# plus section), which is the same on every draft of the section; the memory
+# context, bullets and search results change per call and follow it
+_SECTION_TEMPLATE = """
+            I need you to write content for the following section:
+            {section_info}
+            """
+
+_USER_MESSAGE_TEMPLATE = """
+            Previous conversation context:
+            {context}
+            
+            Here are my key points for this section:
+            {bullets}
+            
+            {search_results}
+            
+            Please generate well-structured content for this section. 
+            The content should follow an academic style appropriate for a formal report, 
+            covering all the bullet points I've provided. 
+            Include proper citations if using information from the search results.
+            """
 
 
 async def generate_executor_response(
@@ -15,7 +63,8 @@ async def generate_executor_response(
     session_id: str,
     section_info: Dict[str, Any],
     bullets: List[str],
-    search_results: List[Dict[str, Any]] = None
+    search_results: List[Dict[str, Any]] = None,
+    message: str = ""
 ) -> Dict[str, Any]:
     """
     Generate content for a section based on bullets and search results.
@@ -29,79 +78,182 @@ async def generate_executor_response(
         section_info: Information about the current section
         bullets: List of bullet points provided by the user
         search_results: Optional list of search results to incorporate
+        message: User message that asked for the draft
         
     Returns:
         Claude's response as a dictionary
     """
-    # Get relevant context from memory
-    context = llm_service.memory_service.get_execution_context(session_id, section_info.get("section_id", ""))
+    # Reuse the draft for the same request with near-identical bullets in
+    # this session, if the semantic cache is enabled
+    cache_scope = _cache_scope(llm_service, session_id, section_info, search_results, message)
+    cache_text = f"{section_info.get('section_title', '')}\n" + "\n".join(sorted(bullets))
+    cached_response = llm_service.semantic_cache.lookup(cache_scope, cache_text)
+    if cached_response is not None:
+        return copy.deepcopy(cached_response)
     
-    # Format context as a string
-    context_str = json.dumps(context, indent=2) if context else "No previous context available."
+    messages = await _build_messages(llm_service, session_id, section_info, bullets, search_results)
     
-    # Format search results if provided
-    search_results_str = ""
-    if search_results:
-        search_results_str = f"""
-        Use the following search results as references:
-        {json.dumps(search_results, indent=2)}
+    # Generate response
+    response = await llm_service.generate_response(
+        messages=messages,
+        system_prompt=_SYSTEM_PROMPT,
+        max_tokens=2000,
+        temperature=0.7
+    )
+    
+    if "error" in response["metadata"]:
+        return response
+    
+    # Add metadata to response
+    response["metadata"] = _response_metadata(section_info)
+    
+    llm_service.semantic_cache.store(cache_scope, cache_text, copy.deepcopy(response))
+    
+    return response
+
+
+async def stream_executor_response(
+    llm_service: LLMService,
+    session_id: str,
+    section_info: Dict[str, Any],
+    bullets: List[str],
+    search_results: List[Dict[str, Any]] = None,
+    message: str = ""
+) -> AsyncIterator[str]:
+    """
+    Stream content for a section as it is generated.
+    
+    Same prompt as generate_executor_response, but the draft is yielded in
+    chunks so it can be shown while Claude is still writing it. The complete
+    draft is added to the semantic cache once the stream has finished.
+    
+    Args:
+        llm_service: Initialized LLM service
+        session_id: The session identifier
+        section_info: Information about the current section
+        bullets: List of bullet points provided by the user
+        search_results: Optional list of search results to incorporate
+        message: User message that asked for the draft
         
-        When using information from these sources, provide proper citations.
-        """
+    Yields:
+        Chunks of the draft text in order
+        
+    Raises:
+        anthropic.APIError: If the API call fails
+    """
+    cache_scope = _cache_scope(llm_service, session_id, section_info, search_results, message)
+    cache_text = f"{section_info.get('section_title', '')}\n" + "\n".join(sorted(bullets))
+    cached_response = llm_service.semantic_cache.lookup(cache_scope, cache_text)
+    if cached_response is not None:
+        yield cached_response["message"]
+        return
     
-    # Create system prompt for the Executor role
-    system_prompt = """
-    You are an expert content creator who specializes in writing high-quality report sections.
-    Your job is to generate well-structured, informative content based on the user's requirements.
+    messages = await _build_messages(llm_service, session_id, section_info, bullets, search_results)
     
-    When search results are provided:
-    1. Incorporate relevant information from the search results
-    2. Provide proper citations using [Source X] format
-    3. Ensure factual accuracy and avoid hallucinations
+    parts = []
+    async for chunk in llm_service.stream_response(
+        messages=messages,
+        system_prompt=_SYSTEM_PROMPT,
+        max_tokens=2000,
+        temperature=0.7
+    ):
+        parts.append(chunk)
+        yield chunk
     
-    Write in a clear, professional tone and organize the content logically.
-    Include a brief introduction, well-developed body paragraphs, and a conclusion.
-    Make sure to cover ALL the bullet points provided by the user.
+    llm_service.semantic_cache.store(cache_scope, cache_text, {
+        "message": "".join(parts),
+        "metadata": _response_metadata(section_info)
+    })
+
+
+async def _build_messages(
+    llm_service: LLMService,
+    session_id: str,
+    section_info: Dict[str, Any],
+    bullets: List[str],
+    search_results: List[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Build the executor request messages for a section.
+    
+    Args:
+        llm_service: Initialized LLM service
+        session_id: The session identifier
+        section_info: Information about the current section
+        bullets: List of bullet points provided by the user
+        search_results: Optional list of search results to incorporate
+        
+    Returns:
+        Messages for the Messages API
     """
+    # Get relevant context from memory
+    context = await llm_service.memory_service.get_executor_context(session_id, section_info, bullets)
+    
+    # Format context as a string
+    context_str = format_for_prompt(context) if context else "No previous context available."
+    
+    # Format search results if provided
+    search_results_str = ""
+    if search_results:
+        search_results_str = _SEARCH_RESULTS_TEMPLATE.format(search_results=format_for_prompt(search_results))
     
     # Create messages for the conversation
-    messages = [
+    return [
         {
             "role": "user",
-            "content": f"""
-            I need you to write content for the following section:
-            {json.dumps(section_info, indent=2)}
-            
-            Here are my key points for this section:
-            {json.dumps(bullets, indent=2)}
-            
-            {search_results_str}
-            
-            Previous conversation context:
-            {context_str}
-            
-            Please generate well-structured content for this section. 
-            The content should follow an academic style appropriate for a formal report, 
-            covering all the bullet points I've provided. 
-            Include proper citations if using information from the search results.
-            """
+            "content": [
+                cached_text_block(_SECTION_TEMPLATE.format(section_info=format_for_prompt(section_info))),
+                {
+                    "type": "text",
+                    "text": _USER_MESSAGE_TEMPLATE.format(
+                        context=context_str,
+                        bullets=format_for_prompt(bullets),
+                        search_results=search_results_str
+                    )
+                }
+            ]
         }
     ]
+
+
+def _cache_scope(
+    llm_service: LLMService,
+    session_id: str,
+    section_info: Dict[str, Any],
+    search_results: List[Dict[str, Any]] = None,
+    message: str = ""
+) -> str:
+    """
+    Semantic cache scope for an executor request.
     
-    # Generate response
-    response = await llm_service.generate_response(
-        messages=messages,
-        system_prompt=system_prompt,
-        max_tokens=2000,
-        temperature=0.7
-    )
+    The user message and search results are matched exactly, so a revision
+    or regenerate request, or new sources, never reuse an earlier draft;
+    only the section and bullets are matched by similarity.
     
-    # Add metadata to response
-    response["metadata"] = {
+    Args:
+        llm_service: Initialized LLM service
+        session_id: The session identifier
+        section_info: Information about the current section
+        search_results: Optional list of search results to incorporate
+        message: User message that asked for the draft
+        
+    Returns:
+        The cache scope key
+    """
+    return llm_service.semantic_cache.scope(
+        _SYSTEM_PROMPT,
+        session_id,
+        section_info.get("section_id", ""),
+        message,
+        search_results or []
+    )
+
+
+def _response_metadata(section_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata attached to a generated draft."""
+    return {
         "phase": "execution",
         "section_id": section_info.get("section_id", ""),
         "section_title": section_info.get("section_title", ""),
         "content_generated": True
     }
-    
-    return response
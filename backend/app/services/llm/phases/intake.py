@@ -4,10 +4,34 @@ Intake phase handler for the LLM Service.
 This module handles response generation for the intake phase,
 where we gather basic requirements for the report before starting content creation.
 """
+import copy
 import json
+import logging
+import re
 from typing import Dict, Any
 
 from app.services.llm.base import LLMService
+from app.services.llm.utils import cached_text_block, json_dumps_pretty, json_loads
+
+logger = logging.getLogger(__name__)
+
+# Field tags Claude attaches to each intake question, e.g. "[TITLE]"
+_FIELD_TAG_RE = re.compile(
+    r'\[(?:TITLE|DEPARTMENT|ACADEMIC_LEVEL|TARGET_AUDIENCE|LENGTH|DEADLINE|FORMAT|CITATIONS|ADDITIONAL_REQUIREMENTS)\]'
+)
+# JSON completion flag Claude includes once the intake is done
+_COMPLETE_INTAKE_RE = re.compile(r'["\']complete_intake["\']\s*:\s*true', re.IGNORECASE)
+
+# Guide part of the intake prompt, rendered once per session
+_GUIDE_TEMPLATE = """Guide information:
+
+        Report Guide:
+        Title: {title}
+        Description: {description}
+        
+        Structure:
+        {structure}
+        """
 
 
 async def generate_intake_response(
@@ -36,27 +60,27 @@ async def generate_intake_response(
         Claude's response as a dictionary
     """
     # Get context from memory
-    context = llm_service.memory_service.get_intake_context(session_id)
+    context = await llm_service.memory_service.get_intake_context(session_id)
     
     # Format context as a string for Claude
-    context_str = json.dumps(context, indent=2) if context else "No previous context available."
+    context_str = json_dumps_pretty(context) if context else "No previous context available."
     
-    # Format guide as a string
+    # Format guide as a string; it is the same on every turn of the session
     guide_str = ""
     if guide_json:
-        guide_str = f"""
-        Report Guide:
-        Title: {guide_json.get('title', 'Report Guide')}
-        Description: {guide_json.get('description', 'No description available')}
-        
-        Structure:
-        {json.dumps(guide_json.get('chapters', []), indent=2)}
-        """
+        guide_str = llm_service.static_prompt(
+            ("intake_guide", session_id),
+            lambda: _GUIDE_TEMPLATE.format(
+                title=guide_json.get('title', 'Report Guide'),
+                description=guide_json.get('description', 'No description available'),
+                structure=llm_service.dumps_guide(session_id, guide_json)
+            )
+        )
     
     # Format intake JSON as a string
     intake_str = ""
     if intake_json:
-        intake_str = f"Current intake information:\n{json.dumps(intake_json, indent=2)}"
+        intake_str = f"Current intake information:\n{json_dumps_pretty(intake_json)}"
     
     # Get the current intake data to pass to Claude
     current_intake_data = get_current_intake_data(intake_json)
@@ -109,9 +133,6 @@ async def generate_intake_response(
     Previous conversation context:
     {context_str}
     
-    Guide information:
-    {guide_str}
-    
     {intake_str}
     
     User message: {message}
@@ -120,24 +141,54 @@ async def generate_intake_response(
     If you have enough information, indicate that by adding "complete_intake": true in your response metadata.
     """
     
-    # Create messages for Claude
+    # Reuse the response to a paraphrase of this message given the same
+    # session and intake state, if the semantic cache is enabled
+    cache_scope = llm_service.semantic_cache.scope(system_prompt, session_id, intake_json)
+    cached_response = llm_service.semantic_cache.lookup(cache_scope, message)
+    if cached_response is not None:
+        return copy.deepcopy(cached_response)
+    
+    # Create messages for Claude. The guide is identical on every intake turn,
+    # so it leads the message and is marked for prompt caching; the per-turn
+    # text follows it.
+    content = []
+    if guide_str:
+        content.append(cached_text_block(guide_str))
+    content.append({"type": "text", "text": user_prompt})
+    
     messages = [
         {
             "role": "user",
-            "content": user_prompt
+            "content": content
         }
     ]
     
-    # Generate response from Claude
+    # Generate response from Claude, using the small intake model first
     response = await llm_service.generate_response(
         messages=messages,
-        system_prompt=system_prompt,
+        system_prompt=[cached_text_block(system_prompt)],
         max_tokens=1000,
-        temperature=0.7
+        temperature=0.7,
+        model=llm_service.models["intake"]
     )
     
+    # A well-formed intake turn asks exactly one tagged question (or wraps up
+    # the intake); otherwise retry once with the larger planner model
+    if _needs_larger_model(response):
+        logger.debug("Intake response not well-formed, retrying with larger model")
+        response = await llm_service.generate_response(
+            messages=messages,
+            system_prompt=[cached_text_block(system_prompt)],
+            max_tokens=1000,
+            temperature=0.7,
+            model=llm_service.models["planner"]
+        )
+    
+    # API failures are reported in the metadata, which is replaced below; an
+    # error reply must not be stored in the semantic cache
+    api_error = "error" in response.get("metadata", {})
+    
     # Extract structured JSON from Claude's response
-    import re
     message_content = response.get("message", "")
     
     # Function to extract requirements JSON from Claude's response
@@ -149,8 +200,8 @@ async def generate_intake_response(
         if json_match:
             try:
                 json_str = json_match.group(1).strip()
-                requirements_data = json.loads(json_str)
-                print(f"DEBUG LLM: Successfully extracted requirements JSON: {json.dumps(requirements_data, indent=2)}")
+                requirements_data = json_loads(json_str)
+                print(f"DEBUG LLM: Successfully extracted requirements JSON: {json_dumps_pretty(requirements_data)}")
                 return requirements_data
             except json.JSONDecodeError as e:
                 print(f"ERROR: Could not parse requirements JSON: {e}")
@@ -205,7 +256,7 @@ async def generate_intake_response(
             "complete_intake": claude_indicates_completion,
             "requirements_json": requirements_json  # Include the structured data Claude provided
         }
-        print(f"DEBUG LLM: Including requirements JSON in metadata: {json.dumps(requirements_json, indent=2)}")
+        print(f"DEBUG LLM: Including requirements JSON in metadata: {json_dumps_pretty(requirements_json)}")
     else:
         # Fall back to our existing approach if no structured JSON was found
         response["metadata"] = {
@@ -216,10 +267,31 @@ async def generate_intake_response(
     
     print(f"DEBUG LLM: Completion indicated: {claude_indicates_completion}")
     
+    if not api_error:
+        llm_service.semantic_cache.store(cache_scope, message, copy.deepcopy(response))
     
     return response
 
 
+def _needs_larger_model(response: Dict[str, Any]) -> bool:
+    """
+    Check whether an intake response should be regenerated with a larger model.
+    
+    Args:
+        response: Response dictionary from generate_response
+        
+    Returns:
+        True if the response neither asks exactly one tagged question nor
+        completes the intake (API errors are not retried)
+    """
+    if "error" in response.get("metadata", {}):
+        return False
+    message_text = response.get("message", "")
+    if _COMPLETE_INTAKE_RE.search(message_text):
+        return False
+    return len(_FIELD_TAG_RE.findall(message_text)) != 1
+
+
 def get_current_intake_data(intake_json: Dict[str, Any]) -> Dict[str, Any]:
     """
     Simply return the current intake data with no field validation.
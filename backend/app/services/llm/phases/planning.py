@@ -4,13 +4,36 @@ Planning phase handler for the LLM Service.
 This module handles response generation for the planning phase,
 where we help the user plan specific sections of the report by asking for bullet points.
 """
-import json
+import copy
 from typing import Dict, Any, Optional
 
 from sqlalchemy.orm import Session
 
 from app.services.llm.base import LLMService
-from app.services.llm.utils import extract_section_details, get_completed_sections
+from app.services.llm.utils import (
+    cached_text_block,
+    extract_section_details,
+    get_completed_sections,
+    json_dumps_pretty,
+    truncate_to_budget
+)
+
+# Per-turn prompt budget: input tokens are billed and add latency on every turn
+_CONTEXT_LIMIT = 20  # memory entries
+_CONTEXT_MAX_CHARS = 8000  # ~2000 tokens
+_COMPLETED_SECTIONS_MAX_CHARS = 12000
+
+# Start of the planner prompt, fixed for a session and section
+_SECTION_HEADER_TEMPLATE = """
+    I'm helping you plan the section: "{section_title}" in chapter "{chapter_title}"
+    
+    Report title: {report_title}
+    Report topic: {report_topic}
+    
+    Section requirements:
+    {requirements}
+    Section description: {description}
+    """
 
 
 async def generate_planner_response(
@@ -41,19 +64,25 @@ async def generate_planner_response(
     Returns:
         Claude's response as a dictionary
     """
-    # Get context from memory
-    context = llm_service.memory_service.get_planning_context(session_id, current_section_id)
-    
-    # Extract section details from guide
-    section_info = extract_section_details(guide_json, current_section_id)
+    # Extract section details from guide (as a dict, since it is also
+    # returned in the response metadata)
+    section_details = extract_section_details(guide_json, current_section_id)
+    section_info = section_details._asdict() if section_details else {}
+    
+    # Get the most relevant context from memory, capped at retrieval time
+    context = await llm_service.memory_service.get_planner_context(
+        session_id,
+        {"title": section_info.get("section_title", f"section {current_section_id}")},
+        limit=_CONTEXT_LIMIT
+    )
     
-    # Format context as a string
-    context_str = json.dumps(context, indent=2) if context else "No previous context available."
+    # Format context as a string, keeping it within the prompt budget
+    context_str = truncate_to_budget(json_dumps_pretty(context), _CONTEXT_MAX_CHARS) if context else "No previous context available."
     
-    # Get completed sections if db is provided
+    # Get completed sections if db is provided (most recent ones if over budget)
     completed_sections = ""
     if db:
-        completed_sections = get_completed_sections(db, session_id)
+        completed_sections = truncate_to_budget(get_completed_sections(db, session_id), _COMPLETED_SECTIONS_MAX_CHARS)
     
     # Format intake information
     report_title = intake_json.get("title", "")
@@ -81,17 +110,22 @@ async def generate_planner_response(
     Make it clear you're asking for bullet points SPECIFICALLY for the current section.
     """
     
-    # Create messages for the conversation
-    content = f"""
-    I'm helping you plan the section: "{section_info.get('section_title')}" in chapter "{section_info.get('chapter_title')}"
-    
-    Report title: {report_title}
-    Report topic: {report_topic}
-    
-    Section requirements:
-    {json.dumps(section_info.get('requirements', []), indent=2)}
-    Section description: {section_info.get('description', 'No description provided')}
+    # The section header only depends on the guide and the report title and
+    # topic, so it is rendered once per section
+    section_header = llm_service.static_prompt(
+        ("planning_section", session_id, current_section_id, report_title, report_topic),
+        lambda: _SECTION_HEADER_TEMPLATE.format(
+            section_title=section_info.get('section_title'),
+            chapter_title=section_info.get('chapter_title'),
+            report_title=report_title,
+            report_topic=report_topic,
+            requirements=json_dumps_pretty(section_info.get('requirements', [])),
+            description=section_info.get('description', 'No description provided')
+        )
+    )
     
+    # Create messages for the conversation
+    content = f"""{section_header}
     Previous sections:
     {completed_sections}
     
@@ -101,6 +135,13 @@ async def generate_planner_response(
     User message: {message}
     """
     
+    # Reuse the response to a paraphrase of this message for the same
+    # session and section, if the semantic cache is enabled
+    cache_scope = llm_service.semantic_cache.scope(system_prompt, session_id, current_section_id)
+    cached_response = llm_service.semantic_cache.lookup(cache_scope, message)
+    if cached_response is not None:
+        return copy.deepcopy(cached_response)
+    
     messages = [
         {
             "role": "user",
@@ -111,11 +152,15 @@ async def generate_planner_response(
     # Generate response
     response = await llm_service.generate_response(
         messages=messages,
-        system_prompt=system_prompt,
+        system_prompt=[cached_text_block(system_prompt)],
         max_tokens=1000,
-        temperature=0.7
+        temperature=0.7,
+        model=llm_service.models["planner"]
     )
     
+    if "error" in response["metadata"]:
+        return response
+    
     # Add metadata to response
     response["metadata"] = {
         "phase": "planning",
@@ -124,4 +169,6 @@ async def generate_planner_response(
         "section_info": section_info
     }
     
+    llm_service.semantic_cache.store(cache_scope, message, copy.deepcopy(response))
+    
     return response
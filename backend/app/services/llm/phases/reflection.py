@@ -4,39 +4,15 @@ Reflection phase handler for the LLM Service.
 This module handles response generation for the reflection phase,
 where Claude asks Socratic questions to help the user deepen their understanding.
 """
-import json
-from typing import Dict, Any
+import asyncio
+import copy
+from typing import Dict, Any, List, Optional, Tuple
 
 from app.services.llm.base import LLMService
+from app.services.llm.utils import format_for_prompt
 
-
-async def generate_reflector_response(
-    llm_service: LLMService,
-    session_id: str,
-    draft_content: str
-) -> Dict[str, Any]:
-    """
-    Generate Socratic questions to help the user reflect on the draft content.
-    
-    During this phase, Claude asks thought-provoking questions to help the user
-    deepen their understanding and improve the content.
-    
-    Args:
-        llm_service: Initialized LLM service
-        session_id: The session identifier
-        draft_content: The generated draft content
-        
-    Returns:
-        Claude's response as a dictionary
-    """
-    # Get relevant context from memory
-    context = llm_service.memory_service.get_reflector_context(session_id, draft_content)
-    
-    # Format context as a string
-    context_str = json.dumps(context, indent=2) if context else "No previous context available."
-    
-    # Create system prompt for the Reflector role
-    system_prompt = """
+# System prompt for the Reflector role
+_SYSTEM_PROMPT = """
     You are a Socratic educator who helps users deepen their understanding through reflection.
     Your job is to ask thought-provoking questions about the content to help the user:
     1. Identify gaps or inconsistencies in the content
@@ -52,38 +28,195 @@ async def generate_reflector_response(
     - "How does this connect to concepts we covered in earlier sections?"
     - "What implications might follow from your conclusion?"
     """
-    
-    # Create messages for the conversation
-    messages = [
-        {
-            "role": "user",
-            "content": f"""
+
+# User message template; only the placeholders change between calls. Nothing
+# is marked for prompt caching: the memory context and draft differ on every
+# call, and the system prompt alone is below the minimum cacheable length
+_USER_MESSAGE_TEMPLATE = """
+            Previous conversation context:
+            {context}
+            
             I've created the following draft content:
             
             {draft_content}
             
-            Previous conversation context:
-            {context_str}
-            
             Please ask me Socratic questions to help me reflect on and improve this content.
             Focus on questions that will deepen my understanding, identify areas for improvement,
             and encourage critical thinking about the material.
             """
-        }
-    ]
+
+
+async def generate_reflector_response(
+    llm_service: LLMService,
+    session_id: str,
+    draft_content: str,
+    section_id: str = ""
+) -> Dict[str, Any]:
+    """
+    Generate Socratic questions to help the user reflect on the draft content.
+    
+    During this phase, Claude asks thought-provoking questions to help the user
+    deepen their understanding and improve the content.
+    
+    Args:
+        llm_service: Initialized LLM service
+        session_id: The session identifier
+        draft_content: The generated draft content
+        section_id: ID of the section the draft is for (format: "chapter.section")
+        
+    Returns:
+        Claude's response as a dictionary
+    """
+    # Reuse the questions asked for the same draft of this section, if the
+    # semantic cache is enabled. The whole draft is part of the scope, so a
+    # redraft or another section's draft never gets these questions back
+    cache_scope = llm_service.semantic_cache.scope(_SYSTEM_PROMPT, session_id, section_id, draft_content)
+    cached_response = llm_service.semantic_cache.lookup(cache_scope, draft_content)
+    if cached_response is not None:
+        return copy.deepcopy(cached_response)
+    
+    messages = await _build_messages(llm_service, session_id, draft_content)
     
     # Generate response
     response = await llm_service.generate_response(
         messages=messages,
-        system_prompt=system_prompt,
+        system_prompt=_SYSTEM_PROMPT,
         max_tokens=1000,
         temperature=0.7
     )
     
+    if "error" in response["metadata"]:
+        return response
+    
     # Add metadata to response
     response["metadata"] = {
         "phase": "reflection",
         "reflection_questions": True
     }
     
+    llm_service.semantic_cache.store(cache_scope, draft_content, copy.deepcopy(response))
+    
     return response
+
+
+async def submit_reflector_batch(
+    llm_service: LLMService,
+    session_id: str,
+    drafts: List[Tuple[int, int, str]]
+) -> str:
+    """
+    Submit a message batch asking Socratic questions for several drafts.
+    
+    Used when questions are wanted for many sections at once (e.g. all
+    completed sections). Batches cost half as much as regular calls but are
+    processed asynchronously, which can take minutes or longer, so this only
+    submits the batch; get_reflector_batch_results fetches the questions.
+    
+    Args:
+        llm_service: Initialized LLM service
+        session_id: The session identifier
+        drafts: (chapter_idx, section_idx, draft content) per section
+        
+    Returns:
+        The batch ID
+    """
+    all_messages = await asyncio.gather(
+        *(_build_messages(llm_service, session_id, draft) for _, _, draft in drafts)
+    )
+    
+    client = llm_service.get_async_client()
+    batch = await client.messages.batches.create(requests=[
+        {
+            # The session and section travel with each request, so the results
+            # can be matched up without storing anything
+            "custom_id": f"{session_id}_{chapter_idx}_{section_idx}",
+            "params": {
+                "model": llm_service.model,
+                "max_tokens": 1000,
+                "temperature": 0.7,
+                "system": _SYSTEM_PROMPT,
+                "messages": messages
+            }
+        }
+        for (chapter_idx, section_idx, _), messages in zip(drafts, all_messages)
+    ])
+    print(f"Submitted reflection batch {batch.id} with {len(drafts)} drafts")
+    return batch.id
+
+
+async def get_reflector_batch_results(
+    llm_service: LLMService,
+    session_id: str,
+    batch_id: str
+) -> Optional[List[Tuple[int, int, Dict[str, Any]]]]:
+    """
+    Fetch the questions from a reflection batch, if it has finished.
+    
+    Args:
+        llm_service: Initialized LLM service
+        session_id: The session identifier
+        batch_id: ID returned by submit_reflector_batch
+        
+    Returns:
+        (chapter_idx, section_idx, response dictionary) per section in
+        document order, or None while the batch is still being processed
+        
+    Raises:
+        ValueError: If the batch was not submitted for this session
+    """
+    client = llm_service.get_async_client()
+    batch = await client.messages.batches.retrieve(batch_id)
+    if batch.processing_status != "ended":
+        return None
+    
+    prefix = f"{session_id}_"
+    results: List[Tuple[int, int, Dict[str, Any]]] = []
+    async for entry in await client.messages.batches.results(batch_id):
+        if not entry.custom_id.startswith(prefix):
+            raise ValueError(f"Batch {batch_id} does not belong to session {session_id}")
+        chapter_idx, section_idx = (int(idx) for idx in entry.custom_id[len(prefix):].split("_"))
+        if entry.result.type != "succeeded":
+            response = {
+                "message": f"Error generating response: batch request {entry.result.type}",
+                "metadata": {"error": entry.result.type}
+            }
+        else:
+            response = {
+                "message": entry.result.message.content[0].text,
+                "metadata": {
+                    "phase": "reflection",
+                    "reflection_questions": True
+                }
+            }
+        results.append((chapter_idx, section_idx, response))
+    
+    # Results are not returned in request order
+    results.sort(key=lambda result: result[:2])
+    return results
+
+
+async def _build_messages(llm_service: LLMService, session_id: str, draft_content: str) -> List[Dict[str, Any]]:
+    """
+    Build the reflection request messages for a draft.
+    
+    Args:
+        llm_service: Initialized LLM service
+        session_id: The session identifier
+        draft_content: The generated draft content
+        
+    Returns:
+        Messages for the Messages API
+    """
+    # Get relevant context from memory
+    context = await llm_service.memory_service.get_reflector_context(session_id, draft_content)
+    
+    # Format context as a string
+    context_str = format_for_prompt(context) if context else "No previous context available."
+    
+    # Create messages for the conversation
+    return [
+        {
+            "role": "user",
+            "content": _USER_MESSAGE_TEMPLATE.format(context=context_str, draft_content=draft_content)
+        }
+    ]
@@ -0,0 +1,135 @@
+"""
+Client-side rate limiting for the LLM Service.
+
+This module keeps our own request and token rate under the Anthropic limits,
+so concurrent calls (chunked guide parsing, many sessions) queue briefly
+instead of bursting into 429 responses and the SDK's backoff retries.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Optional, Tuple
+
+
+def _content_chars(content: Any) -> int:
+    """Count the characters of a string, content block list or message list."""
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(
+            _content_chars(item.get("text", item.get("content", ""))) if isinstance(item, dict) else len(str(item))
+            for item in content
+        )
+    return 0
+
+
+def estimate_tokens(*contents: Any) -> int:
+    """
+    Roughly estimate the token count of prompt contents (~4 characters per token).
+
+    Args:
+        *contents: Strings, lists of content blocks or lists of messages
+
+    Returns:
+        Estimated number of tokens
+    """
+    return sum(_content_chars(content) for content in contents) // 4
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter on requests per minute and tokens per minute.
+
+    Each call reserves its estimated tokens (prompt + max_tokens) before it is
+    sent; reservations older than the window no longer count. A 429 response
+    can additionally block all callers for the server's retry-after period.
+
+    Args:
+        requests_per_minute: Maximum requests started per window
+        tokens_per_minute: Maximum estimated tokens reserved per window
+        max_concurrency: Maximum number of calls in flight at once
+        window_seconds: Length of the sliding window
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 40,
+        tokens_per_minute: int = 16000,
+        max_concurrency: int = 8,
+        window_seconds: float = 60.0
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.window_seconds = window_seconds
+        self._requests: Deque[float] = deque()
+        self._tokens: Deque[Tuple[float, int]] = deque()
+        self._token_total = 0
+        self._blocked_until = 0.0
+        # Created on first use so they bind to the running event loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _prune(self, now: float) -> None:
+        """Drop reservations that have left the window."""
+        cutoff = now - self.window_seconds
+        while self._requests and self._requests[0] <= cutoff:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= cutoff:
+            self._token_total -= self._tokens.popleft()[1]
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """
+        Wait until a call with the given token estimate fits in the window.
+
+        Args:
+            estimated_tokens: Estimated tokens for the call
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # A single call larger than the budget would otherwise wait forever
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+
+        # Waiters queue on the lock, so reservations are granted in order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+
+                if self._blocked_until > now:
+                    wait = self._blocked_until - now
+                elif len(self._requests) >= self.requests_per_minute:
+                    wait = self._requests[0] + self.window_seconds - now
+                elif self._tokens and self._token_total + estimated_tokens > self.tokens_per_minute:
+                    wait = self._tokens[0][0] + self.window_seconds - now
+                else:
+                    self._requests.append(now)
+                    self._tokens.append((now, estimated_tokens))
+                    self._token_total += estimated_tokens
+                    return
+
+                await asyncio.sleep(max(wait, 0.01))
+
+    @asynccontextmanager
+    async def reserve(self, estimated_tokens: int) -> AsyncIterator[None]:
+        """
+        Reserve capacity for one call and hold a concurrency slot while it runs.
+
+        Args:
+            estimated_tokens: Estimated tokens for the call
+        """
+        await self.acquire(estimated_tokens)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            yield
+
+    def penalize(self, retry_after: float) -> None:
+        """
+        Block all callers after the server reported a rate limit.
+
+        Args:
+            retry_after: Seconds the server asked us to wait
+        """
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
@@ -8,12 +8,90 @@ LLM service, such as:
 3. Other common operations
 """
 import json
-from typing import Dict, Any, List, Optional
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
 
+from app.db.models.section import Section as SectionModel
 
-def extract_section_details(guide_json: Dict[str, Any], section_id: str) -> Dict[str, Any]:
+# Prefer orjson's native parser for JSON produced by the LLM (guide payloads
+# are typically tens of KB); fall back to the standard library if unavailable.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib exception.
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps_pretty(obj: Any) -> str:
+        """Serialize obj as indented JSON with sorted keys (byte-stable output)."""
+        return orjson.dumps(
+            obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+
+    def json_dumps_compact(obj: Any) -> str:
+        """Serialize obj as compact JSON (non-JSON values are converted with str)."""
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps_pretty(obj: Any) -> str:
+        """Serialize obj as indented JSON with sorted keys (byte-stable output)."""
+        return json.dumps(obj, indent=2, sort_keys=True)
+
+    def json_dumps_compact(obj: Any) -> str:
+        """Serialize obj as compact JSON (non-JSON values are converted with str)."""
+        return json.dumps(obj, default=str, separators=(",", ":"))
+
+# Completed-sections HTML only changes when a section row changes, so it is
+# cached per session and invalidated from the Section mapper events below
+_COMPLETED_SECTIONS_TTL = 3600  # seconds
+_COMPLETED_SECTIONS_MAX = 1024  # sessions kept in the cache
+_completed_sections_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+# Section lookup index per guide object, see _get_section_index
+_SECTION_INDEX_MAX = 64  # guides kept in the cache
+_section_index_cache: "OrderedDict[int, Tuple[Dict[str, Any], Dict[Tuple[int, int], Any]]]" = OrderedDict()
+
+# Template for one section of the completed-sections HTML, bound once
+_FMT_SECTION = "<h2>Section {}.{}</h2>\n{}\n\n".format
+
+# Single pattern for extract_bullet_points, scanned over the whole text:
+# a dash/bullet/asterisk item, a numbered item, or any other line with more
+# than 10 characters of text. Whitespace around the text is absorbed by the
+# pattern ([^\S\n] is whitespace other than a newline).
+_BULLET_LINE_PATTERN = re.compile(
+    r'^[^\S\n]*(?:'
+    r'[-•*][^\S\n]+(?P<bullet>.*\S)'      # Matches: - bullet, • bullet, * bullet
+    r'|\d+[.)][^\S\n]+(?P<numbered>.*\S)'  # Matches: 1. bullet, 1) bullet
+    r'|(?P<line>\S.{9,}\S)'                # Matches: substantive non-bullet text
+    r')[^\S\n]*$',
+    re.MULTILINE
+)
+
+
+class SectionDetails(NamedTuple):
+    """
+    Details of a single guide section.
+    
+    A NamedTuple keeps these small, immutable records compact; use _asdict()
+    where a JSON-serializable dict is needed (e.g. response metadata).
+    """
+    section_id: str
+    chapter_title: str
+    section_title: str
+    chapter_idx: int
+    section_idx: int
+    requirements: Any
+    description: str
+
+
+def extract_section_details(guide_json: Dict[str, Any], section_id: str) -> Optional[SectionDetails]:
     """
     Extract details for a specific section from the guide JSON.
     
@@ -22,37 +100,153 @@ def extract_section_details(guide_json: Dict[str, Any], section_id: str) -> Dict
         section_id: ID of the section to extract (format: "chapter.section")
         
     Returns:
-        Dictionary with section details or empty dict if not found
+        SectionDetails for the section or None if not found
     """
     try:
         # Parse section ID in format "chapter.section"
         chapter_idx, section_idx = map(int, section_id.split('.'))
+    except (ValueError, AttributeError):
+        return None
+    
+    # Return None if section not found
+    return _get_section_index(guide_json).get((chapter_idx, section_idx))
+
+
+def _get_section_index(guide_json: Dict[str, Any]) -> Dict[Tuple[int, int], SectionDetails]:
+    """
+    Get the (chapter_idx, section_idx) -> SectionDetails index for a guide.
+    
+    The index is built once per guide object and reused for later lookups on
+    the same object; entries hold a reference to the guide so an id() can't
+    be reused by a different dict while it is cached.
+    
+    Args:
+        guide_json: The complete guide structure
         
-        # Get chapter
-        chapter = guide_json.get("chapters", [])[chapter_idx]
+    Returns:
+        Index of all sections in the guide
+    """
+    key = id(guide_json)
+    entry = _section_index_cache.get(key)
+    if entry is not None and entry[0] is guide_json:
+        _section_index_cache.move_to_end(key)
+        return entry[1]
+    
+    index: Dict[Tuple[int, int], SectionDetails] = {}
+    try:
+        for chapter_idx, chapter in enumerate(guide_json.get("chapters", [])):
+            for section_idx, section in enumerate(chapter.get("sections", [])):
+                index[(chapter_idx, section_idx)] = SectionDetails(
+                    section_id=f"{chapter_idx}.{section_idx}",
+                    chapter_title=chapter.get("title", f"Chapter {chapter_idx + 1}"),
+                    section_title=section.get("title", f"Section {section_idx + 1}"),
+                    chapter_idx=chapter_idx,
+                    section_idx=section_idx,
+                    requirements=section.get("requirements", []),
+                    description=section.get("description", "")
+                )
+    except (TypeError, AttributeError):
+        # Malformed guide: keep the sections indexed so far
+        pass
+    
+    _section_index_cache[key] = (guide_json, index)
+    if len(_section_index_cache) > _SECTION_INDEX_MAX:
+        _section_index_cache.popitem(last=False)
+    return index
+
+
+def truncate_to_budget(text: str, max_chars: int) -> str:
+    """
+    Keep only the end of text if it is longer than max_chars.
+    
+    Used to cap growing prompt sections (conversation context, earlier
+    sections) so per-turn input tokens stay bounded; the most recent
+    content is at the end, so that is what is kept.
+    
+    Args:
+        text: The text to truncate
+        max_chars: Maximum number of characters to keep
         
-        # Get section
-        section = chapter.get("sections", [])[section_idx]
+    Returns:
+        The text, or its last max_chars characters
+    """
+    if len(text) <= max_chars:
+        return text
+    return "...\n" + text[-max_chars:]
+
+
+def format_for_prompt(obj: Any) -> str:
+    """
+    Render a value as compact plain text for splicing into a prompt.
+    
+    Dicts become "key: value" lines and lists become "- item" bullets, with
+    nesting shown by a two-space indent. This walks the structure once and
+    avoids the quoting and padding of pretty-printed JSON, which the model
+    does not need and which costs input tokens.
+    
+    Args:
+        obj: The value to render (context, section info, bullets, ...)
         
-        # Extract details
-        return {
-            "section_id": section_id,
-            "chapter_title": chapter.get("title", f"Chapter {chapter_idx + 1}"),
-            "section_title": section.get("title", f"Section {section_idx + 1}"),
-            "chapter_idx": chapter_idx,
-            "section_idx": section_idx,
-            "requirements": section.get("requirements", []),
-            "description": section.get("description", "")
-        }
-    except (IndexError, ValueError, KeyError, TypeError):
-        # Return empty dict if section not found
-        return {}
+    Returns:
+        The rendered text
+    """
+    buf: List[str] = []
+    _format_for_prompt(obj, buf)
+    return "\n".join(buf)
+
+
+def _format_for_prompt(obj: Any, buf: List[str], indent: str = "") -> None:
+    """Append the lines rendering obj to buf (see format_for_prompt)."""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if isinstance(value, (dict, list, tuple)) and value:
+                buf.append(f"{indent}{key}:")
+                _format_for_prompt(value, buf, indent + "  ")
+            else:
+                buf.append(f"{indent}{key}: {_format_scalar(value)}")
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            if isinstance(item, (dict, list, tuple)) and item:
+                buf.append(f"{indent}-")
+                _format_for_prompt(item, buf, indent + "  ")
+            else:
+                buf.append(f"{indent}- {_format_scalar(item)}")
+    else:
+        buf.append(f"{indent}{_format_scalar(obj)}")
+
+
+def _format_scalar(value: Any) -> str:
+    """Render a leaf value; unknown types fall back to compact JSON."""
+    if isinstance(value, str):
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return str(value)
+    return json_dumps_compact(value)
+
+
+def cached_text_block(text: str) -> Dict[str, Any]:
+    """
+    Build a text content block marked for Anthropic prompt caching.
+    
+    Content up to and including this block is cached server-side, so it should
+    only wrap text that is byte-for-byte identical across calls (e.g. the guide).
+    
+    Args:
+        text: The invariant prompt text
+        
+    Returns:
+        Content block usable in a message's content list or as a system block
+    """
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
 
 
 def get_completed_sections(db: Session, session_id: str) -> str:
     """
     Retrieve HTML content of previously completed sections from the database.
     
+    The assembled HTML is cached per session and reused until a section of
+    that session changes (see invalidate_completed_sections).
+    
     Args:
         db: Database session
         session_id: The session identifier
@@ -60,33 +254,116 @@ def get_completed_sections(db: Session, session_id: str) -> str:
     Returns:
         String with HTML content of completed sections or message if none found
     """
+    cached = _completed_sections_cache.get(session_id)
+    if cached and time.monotonic() - cached[0] < _COMPLETED_SECTIONS_TTL:
+        _completed_sections_cache.move_to_end(session_id)
+        return cached[1]
+    
     try:
-        # Import here to avoid circular imports
-        from app.db.models.section import Section as SectionModel
-        
-        # Query completed sections
-        completed_sections = db.query(SectionModel).filter(
-            SectionModel.session_id == session_id,
-            SectionModel.status == "complete"
-        ).order_by(
-            SectionModel.chapter_idx, 
-            SectionModel.section_idx
-        ).all()
-        
-        if not completed_sections:
-            return "No completed sections yet."
-        
-        # Build HTML content
-        html_content = ""
-        
-        for section in completed_sections:
-            html_content += f"<h2>Section {section.chapter_idx + 1}.{section.section_idx + 1}</h2>\n"
-            html_content += f"{section.content}\n\n"
-        
-        return html_content
+        html_content = _build_completed_sections(db, session_id)
     except Exception as e:
         print(f"Error retrieving completed sections: {str(e)}")
         return "Error retrieving completed sections."
+    
+    _completed_sections_cache[session_id] = (time.monotonic(), html_content)
+    _completed_sections_cache.move_to_end(session_id)
+    if len(_completed_sections_cache) > _COMPLETED_SECTIONS_MAX:
+        _completed_sections_cache.popitem(last=False)
+    
+    return html_content
+
+
+def invalidate_completed_sections(session_id: str) -> None:
+    """
+    Drop the cached completed-sections HTML for a session.
+    
+    Args:
+        session_id: The session identifier
+    """
+    _completed_sections_cache.pop(session_id, None)
+
+
+def _build_completed_sections(db: Session, session_id: str) -> str:
+    """
+    Query completed sections and assemble their HTML content.
+    
+    Args:
+        db: Database session
+        session_id: The session identifier
+        
+    Returns:
+        String with HTML content of completed sections or message if none found
+    """
+    # Query only the rendered columns as plain rows, skipping ORM entity
+    # hydration and identity-map bookkeeping for what is read-only data
+    rows = db.query(
+        SectionModel.chapter_idx,
+        SectionModel.section_idx,
+        SectionModel.draft_html
+    ).filter(
+        SectionModel.session_id == session_id,
+        SectionModel.status == "complete"
+    ).order_by(
+        SectionModel.chapter_idx, 
+        SectionModel.section_idx
+    ).all()
+    
+    if not rows:
+        return "No completed sections yet."
+    
+    # Build HTML content in a single join over the rows
+    return "".join([
+        _FMT_SECTION(chapter_idx + 1, section_idx + 1, draft_html or "")
+        for chapter_idx, section_idx, draft_html in rows
+    ])
+
+
+@event.listens_for(SectionModel, "after_insert")
+@event.listens_for(SectionModel, "after_update")
+@event.listens_for(SectionModel, "after_delete")
+def _invalidate_on_section_change(mapper, connection, target) -> None:
+    """Invalidate the cached HTML whenever a section row of the session changes"""
+    invalidate_completed_sections(target.session_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_section_statement(orm_execute_state: ORMExecuteState) -> None:
+    """
+    Invalidate the cached HTML for UPDATE/DELETE statements on sections.
+    
+    Statement-level writes (update(SectionModel)...) bypass the mapper events
+    above. The affected sessions are read from the statement's parameters or
+    its session_id comparison; if they can't be determined, the whole cache
+    is dropped.
+    """
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not SectionModel:
+        return
+    
+    session_ids = set()
+    params = orm_execute_state.parameters
+    for row in params if isinstance(params, list) else [params]:
+        if isinstance(row, dict) and "session_id" in row:
+            session_ids.add(row["session_id"])
+    
+    whereclause = orm_execute_state.statement.whereclause
+    if whereclause is not None:
+        session_id_column = SectionModel.__table__.c.session_id
+        for element in visitors.iterate(whereclause):
+            if (
+                isinstance(element, BinaryExpression)
+                and isinstance(element.right, BindParameter)
+                and element.left.shares_lineage(session_id_column)
+            ):
+                session_ids.add(element.right.effective_value)
+    
+    if not session_ids:
+        _completed_sections_cache.clear()
+        return
+    for session_id in session_ids:
+        invalidate_completed_sections(session_id)
 
 
 def extract_bullet_points(text: str) -> List[str]:
@@ -108,35 +385,7 @@ def extract_bullet_points(text: str) -> List[str]:
     if not text:
         return []
         
-    # Split text into lines
-    lines = text.strip().split('\n')
-    bullets = []
-    
-    # Regular expressions for different bullet formats
-    bullet_patterns = [
-        r'^\s*[-•*]\s+(.+)$',  # Matches: - bullet, • bullet, * bullet
-        r'^\s*(\d+[.)])\s+(.+)$',  # Matches: 1. bullet, 1) bullet
+    return [
+        match.group("bullet") or match.group("numbered") or match.group("line")
+        for match in _BULLET_LINE_PATTERN.finditer(text)
     ]
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        is_bullet = False
-        for pattern in bullet_patterns:
-            match = re.match(pattern, line)
-            if match:
-                is_bullet = True
-                # If it's a numbered bullet, get the second group
-                if len(match.groups()) > 1:
-                    bullets.append(match.group(2))
-                else:
-                    bullets.append(match.group(1))
-                break
-                
-        # If not a bullet but contains substantive text, add it anyway
-        if not is_bullet and len(line) > 10:
-            bullets.append(line)
-    
-    return bullets
@@ -0,0 +1,436 @@
+"""
+Response caching for LLM calls.
+
+This module provides a small exact-match cache used by LLMService to avoid
+repeating identical, deterministic Claude calls (e.g. re-parsing the same guide),
+and an opt-in semantic cache for paraphrased conversational turns.
+The storage is pluggable through the CacheBackend protocol: MemoryBackend for
+in-process caching and FileBackend for results that should survive restarts.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, List, Optional, Protocol, Tuple
+
+# Optional sentence embedding model; falls back to hashed n-gram features
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Optional vectorized similarity search; falls back to a Python loop
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CacheBackend(Protocol):
+    """
+    Minimal key/value interface required by LLMCache.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class MemoryBackend:
+    """
+    In-process cache backend with per-entry expiry and LRU eviction.
+
+    Args:
+        max_entries: Maximum number of entries kept before the least recently
+                     used entry is evicted
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class FileBackend:
+    """
+    Persistent cache backend storing one JSON file per key.
+
+    Entries survive server restarts, which suits expensive results that are
+    requested again across runs (e.g. parsed guides). Writes go to a temporary
+    file that is atomically moved into place, so readers never see a partial file.
+
+    Args:
+        directory: Directory holding the cache files (created on first write)
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        expires_at = entry.get("expires_at")
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        entry = {"expires_at": time.time() + ttl_seconds if ttl_seconds else None, "value": value}
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: could not write cache file {path}: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class LLMCache:
+    """
+    Exact-match cache for LLM responses.
+
+    Keys are SHA-256 digests of the request parameters, so only byte-identical
+    requests hit the cache. Only low-temperature calls should be cached, since
+    high-temperature calls are expected to vary between runs.
+
+    Args:
+        backend: Storage backend implementing CacheBackend
+        ttl_seconds: Lifetime of cached entries
+        max_temperature: Highest temperature that is still considered deterministic
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = 86400, max_temperature: float = 0.2):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        # Allow disabling the cache entirely (e.g. when debugging prompts)
+        self.enabled = os.getenv("LLM_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """
+        Build a cache key from request parameters.
+
+        Args:
+            **params: Request parameters (model, prompt, system, ...)
+
+        Returns:
+            Hex SHA-256 digest of the canonical JSON encoding of the parameters
+        """
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """
+        Check whether a call with the given temperature may be served from cache.
+        """
+        return self.enabled and temperature <= self.max_temperature
+
+    def get_sync(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached response or None on a miss
+        """
+        if not self.enabled:
+            return None
+        return self.backend.get(key)
+
+    def set_sync(self, key: str, value: Any) -> None:
+        """
+        Store a response in the cache.
+
+        Args:
+            key: Cache key from make_key
+            value: Response to cache
+        """
+        if self.enabled:
+            self.backend.set(key, value, self.ttl_seconds)
+
+
+class _ScopeEntries:
+    """
+    Fixed-capacity embedding store for one SemanticCache scope.
+
+    With numpy, vectors are rows of a preallocated float32 matrix so a lookup
+    is a single matrix-vector product; expired or unused rows are masked out
+    and reused by later inserts. Without numpy, entries are kept in a list.
+
+    Args:
+        capacity: Maximum number of entries; the oldest is replaced when full
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values: List[Any] = [None] * capacity
+        if np is not None:
+            self.matrix = None  # allocated once the embedding size is known
+            self.expiries = np.zeros(capacity)  # 0 marks an unused row
+        else:
+            self.entries: List[Tuple[float, List[float], Any]] = []
+
+    def add(self, expires_at: float, vector: List[float], value: Any) -> None:
+        if np is None:
+            self.entries.append((expires_at, vector, value))
+            del self.entries[:-self.capacity]
+            return
+
+        if self.matrix is None:
+            self.matrix = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+        # Unused rows sort first, then the one expiring soonest (the oldest)
+        row = int(np.argmin(self.expiries))
+        self.matrix[row] = vector
+        self.expiries[row] = expires_at
+        self.values[row] = value
+
+    def best(self, query: List[float], now: float) -> Tuple[float, Optional[Any]]:
+        """Return the best cosine similarity to query and its value."""
+        if np is None:
+            self.entries[:] = [entry for entry in self.entries if entry[0] > now]
+            best_score, best_value = 0.0, None
+            for _, vector, value in self.entries:
+                score = sum(a * b for a, b in zip(vector, query))
+                if score > best_score:
+                    best_score, best_value = score, value
+            return best_score, best_value
+
+        live = self.expiries > now
+        if self.matrix is None or not live.any():
+            return 0.0, None
+        scores = self.matrix @ np.asarray(query, dtype=np.float32)
+        scores[~live] = -np.inf
+        row = int(np.argmax(scores))
+        return float(scores[row]), self.values[row]
+
+
+class SemanticCache:
+    """
+    Similarity-based cache for conversational LLM responses.
+
+    Entries are grouped into scopes (e.g. system prompt + session + section) so
+    that a hit can only be served within the exact context it was generated in.
+    Inside a scope, the user message is embedded and compared against earlier
+    messages by cosine similarity; paraphrased messages above the threshold
+    reuse the earlier response.
+
+    The cache is opt-in through the SEMANTIC_CACHE_ENABLED environment variable
+    because reusing responses in a multi-turn conversation is not always safe.
+
+    Args:
+        threshold: Minimum cosine similarity for a hit
+        dim: Embedding dimension used by the hashed fallback embedder
+        max_scopes: Maximum number of scopes kept (LRU)
+        max_entries_per_scope: Maximum number of entries kept per scope
+        ttl_seconds: Lifetime of cached entries
+        enabled: Force the cache on or off; by default SEMANTIC_CACHE_ENABLED decides
+        max_embeddings: Number of recent text embeddings kept for reuse
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        dim: int = 384,
+        max_scopes: int = 256,
+        max_entries_per_scope: int = 64,
+        ttl_seconds: int = 3600,
+        enabled: Optional[bool] = None,
+        max_embeddings: int = 256
+    ):
+        self.threshold = threshold
+        self.dim = dim
+        self.max_scopes = max_scopes
+        self.max_entries_per_scope = max_entries_per_scope
+        self.ttl_seconds = ttl_seconds
+        if enabled is None:
+            enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self.max_embeddings = max_embeddings
+        self._model = None
+        # Recent embeddings keyed by text digest; a miss embeds the text for
+        # lookup and again for store, and follow-up turns repeat the same text
+        self._embeddings: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._scopes: "OrderedDict[str, _ScopeEntries]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope(*parts: Any) -> str:
+        """
+        Build a scope key from the context a response depends on.
+
+        Args:
+            *parts: Context values (system prompt, session id, section id, ...)
+
+        Returns:
+            Hex SHA-256 digest identifying the scope
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Embed text as an L2-normalized vector.
+
+        Uses sentence-transformers when it is installed; otherwise falls back to
+        feature-hashed word unigrams and bigrams, which is enough to catch
+        reworded or re-punctuated repeats of the same message.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Normalized embedding vector
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        with self._lock:
+            vector = self._embeddings.get(digest)
+            if vector is not None:
+                self._embeddings.move_to_end(digest)
+                return vector
+
+        if SentenceTransformer is not None:
+            if self._model is None:
+                self._model = SentenceTransformer("all-MiniLM-L6-v2")
+            vector = [float(x) for x in self._model.encode(text, normalize_embeddings=True)]
+        else:
+            vector = [0.0] * self.dim
+            words = re.findall(r"\w+", text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                vector[zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+            norm = math.sqrt(sum(x * x for x in vector))
+            if norm:
+                vector = [x / norm for x in vector]
+
+        with self._lock:
+            self._embeddings[digest] = vector
+            while len(self._embeddings) > self.max_embeddings:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def lookup(self, scope: str, text: str) -> Optional[Any]:
+        """
+        Find a cached response for a message similar to text within scope.
+
+        Args:
+            scope: Scope key from scope()
+            text: The user message
+
+        Returns:
+            The cached response or None on a miss
+        """
+        if not self.enabled or not text.strip():
+            return None
+
+        query = self.embed(text)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if not entries:
+                return None
+            self._scopes.move_to_end(scope)
+            best_score, best_value = entries.best(query, now)
+
+        return best_value if best_score >= self.threshold else None
+
+    def store(self, scope: str, text: str, value: Any) -> None:
+        """
+        Cache a response for a message within scope.
+
+        Args:
+            scope: Scope key from scope()
+            text: The user message
+            value: Response to cache
+        """
+        if not self.enabled or not text.strip():
+            return
+
+        vector = self.embed(text)
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is None:
+                entries = self._scopes[scope] = _ScopeEntries(self.max_entries_per_scope)
+            self._scopes.move_to_end(scope)
+            entries.add(time.monotonic() + self.ttl_seconds, vector, value)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+
+    def invalidate(self, scope: str) -> None:
+        """
+        Drop all entries of a scope (e.g. after the underlying data changed).
+
+        Args:
+            scope: Scope key from scope()
+        """
+        with self._lock:
+            self._scopes.pop(scope, None)
@@ -15,7 +15,7 @@ Note: This file is now a lightweight wrapper around the modular implementation i
 the 'llm' package. See app/services/llm/ for the actual implementation.
 """
 # Re-export the LLMService class as the main entry point
-from app.services.llm import LLMService
+from app.services.llm import LLMService, get_llm_service
 
 # Re-export guide parsing functionality
 from app.services.llm.guide_parser import parse_guide_to_json
@@ -25,11 +25,14 @@ from app.services.llm import (
     generate_intake_response,
     generate_planner_response,
     generate_executor_response,
-    generate_reflector_response
+    stream_executor_response,
+    generate_reflector_response,
+    submit_reflector_batch,
+    get_reflector_batch_results
 )
 
 # Re-export utility functions that might be needed externally
-from app.services.llm import extract_section_details
+from app.services.llm import extract_section_details, SectionDetails
 
 # Module metadata
 __version__ = "1.0.0"
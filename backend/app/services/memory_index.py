@@ -0,0 +1,175 @@
+"""
+Local vector index mirroring the messages written to mem0.
+
+Searching mem0 is a remote round-trip on every context lookup. When enabled
+(MEMORY_LOCAL_INDEX_ENABLED), MemoryService also writes each stored message
+and its embedding to a SQLite sidecar file and answers searches for sessions
+present there locally, falling back to mem0 for sessions it has not seen.
+
+The sqlite-vec extension is used for the nearest-neighbour query when it is
+installed; otherwise the session's vectors are compared by brute force, which
+is fine for the few hundred messages a session holds.
+"""
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+# Optional SQLite vector search extension
+try:
+    import sqlite_vec
+except ImportError:
+    sqlite_vec = None
+
+# Optional vectorized brute-force search; falls back to a Python loop
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class LocalMemoryIndex:
+    """
+    SQLite-backed nearest-neighbour index of session messages.
+
+    Args:
+        path: Path of the SQLite database file
+        embed: Function returning an L2-normalized embedding for a text
+        dim: Dimension of the embeddings
+    """
+
+    def __init__(self, path: str, embed: Callable[[str], List[float]], dim: int = 384):
+        self.path = path
+        self.embed = embed
+        self.dim = dim
+        # Written from the memory writer thread, read from request threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.use_vec = self._load_vec_extension()
+        self._create_tables()
+
+    def _load_vec_extension(self) -> bool:
+        """Load sqlite-vec into the connection if it is available."""
+        if sqlite_vec is None:
+            return False
+        try:
+            self._conn.enable_load_extension(True)
+            sqlite_vec.load(self._conn)
+            self._conn.enable_load_extension(False)
+            return True
+        except (AttributeError, sqlite3.Error) as e:
+            print(f"Warning: sqlite-vec unavailable, using brute-force search: {str(e)}")
+            return False
+
+    def _create_tables(self) -> None:
+        with self._lock, self._conn:
+            if self.use_vec:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS vec_chunks USING vec0("
+                    "session_id TEXT PARTITION KEY, "
+                    f"embedding FLOAT[{self.dim}] distance_metric=cosine, "
+                    "+role TEXT, +content TEXT)"
+                )
+            else:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS chunks ("
+                    "session_id TEXT NOT NULL, role TEXT, content TEXT, embedding BLOB NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_session_id ON chunks (session_id)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS indexed_sessions (session_id TEXT PRIMARY KEY)")
+
+    def add(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """
+        Index messages that were written to mem0.
+
+        Args:
+            session_id: The session identifier
+            messages: Message dicts with role and content
+        """
+        rows = [
+            (session_id, message.get("role"), message.get("content", ""),
+             array("f", self.embed(message.get("content", ""))).tobytes())
+            for message in messages
+        ]
+        with self._lock, self._conn:
+            if self.use_vec:
+                self._conn.executemany(
+                    "INSERT INTO vec_chunks (session_id, role, content, embedding) VALUES (?, ?, ?, ?)", rows
+                )
+            else:
+                self._conn.executemany(
+                    "INSERT INTO chunks (session_id, role, content, embedding) VALUES (?, ?, ?, ?)", rows
+                )
+            self._conn.execute("INSERT OR IGNORE INTO indexed_sessions (session_id) VALUES (?)", (session_id,))
+
+    def search(self, session_id: str, query: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the messages of a session most similar to query.
+
+        Args:
+            session_id: The session identifier
+            query: The search query
+            limit: Maximum number of results
+
+        Returns:
+            Results shaped like mem0 search results ("memory", "role", "score"),
+            or None if the session has not been indexed
+        """
+        query_vector = array("f", self.embed(query))
+        with self._lock:
+            if self._conn.execute(
+                "SELECT 1 FROM indexed_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone() is None:
+                return None
+
+            if self.use_vec:
+                rows = self._conn.execute(
+                    "SELECT role, content, distance FROM vec_chunks "
+                    "WHERE embedding MATCH ? AND k = ? AND session_id = ? ORDER BY distance",
+                    (query_vector.tobytes(), limit, session_id)
+                ).fetchall()
+                return [{"memory": content, "role": role, "score": 1.0 - distance} for role, content, distance in rows]
+
+            rows = self._conn.execute(
+                "SELECT role, content, embedding FROM chunks WHERE session_id = ?", (session_id,)
+            ).fetchall()
+
+        if not rows:
+            return []
+
+        if np is not None:
+            # One matrix-vector product over all of the session's vectors
+            matrix = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+            scores = matrix @ np.frombuffer(query_vector.tobytes(), dtype=np.float32)
+            top = np.argsort(-scores)[:limit]
+            return [{"memory": rows[i][1], "role": rows[i][0], "score": float(scores[i])} for i in top]
+
+        scored = []
+        for role, content, blob in rows:
+            vector = array("f")
+            vector.frombytes(blob)
+            scored.append((sum(a * b for a, b in zip(vector, query_vector)), role, content))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [{"memory": content, "role": role, "score": score} for score, role, content in scored[:limit]]
+
+
+def create_local_index(embed: Callable[[str], List[float]], dim: int = 384) -> Optional[LocalMemoryIndex]:
+    """
+    Create the local index if MEMORY_LOCAL_INDEX_ENABLED is set.
+
+    Args:
+        embed: Function returning an L2-normalized embedding for a text
+        dim: Dimension of the embeddings
+
+    Returns:
+        The index, or None if it is disabled or cannot be opened
+    """
+    if os.getenv("MEMORY_LOCAL_INDEX_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+    path = os.getenv("MEMORY_LOCAL_INDEX_PATH", "mem_cache.db")
+    try:
+        return LocalMemoryIndex(path, embed, dim)
+    except sqlite3.Error as e:
+        print(f"Warning: could not open local memory index {path}: {str(e)}")
+        return None
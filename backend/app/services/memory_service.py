@@ -1,13 +1,209 @@
+import asyncio
+import hashlib
+import json
 import os
-from typing import Dict, List, Any, Optional
+import queue
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Hashable, Iterator, List, Any, Optional, Tuple
+
 from dotenv import load_dotenv
 
+# Faster JSON for memory payloads; orjson.JSONDecodeError subclasses the
+# stdlib json.JSONDecodeError, so callers keep catching the stdlib exception
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Import the actual mem0 client
 from mem0 import MemoryClient
 
+from app.services.llm_cache import SemanticCache
+from app.services.memory_index import create_local_index
+
+
+class _WriteBehindQueue:
+    """
+    Background writer that coalesces mem0 add calls off the request path.
+    
+    Messages are queued and a daemon thread sends them in batches: it waits up
+    to debounce_seconds (or until max_batch messages are queued) and merges
+    consecutive messages for the same session and metadata into a single
+    client.add call, so a chat turn costs one mem0 round-trip instead of one
+    per message. Writes are not visible to searches until they are flushed.
+    
+    Args:
+        max_batch: Number of queued messages that triggers an immediate send
+        debounce_seconds: How long to wait for more messages before sending
+    """
+    
+    def __init__(self, max_batch: int = 8, debounce_seconds: float = 0.05):
+        self.max_batch = max_batch
+        self.debounce_seconds = debounce_seconds
+        self._queue: "queue.Queue[Tuple[Any, str, List[Dict[str, str]], Optional[Dict[str, Any]]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def put(self, client: Any, session_id: str, messages: List[Dict[str, str]], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Queue messages to be added to mem0 in one request.
+        
+        Args:
+            client: The mem0 client to write with
+            session_id: The session identifier (mem0 user_id)
+            messages: The message dicts with role and content
+            metadata: Optional metadata for the messages
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="mem0-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put((client, session_id, messages, metadata))
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued message has been sent.
+        
+        Args:
+            timeout: Optional maximum number of seconds to wait
+            
+        Returns:
+            True if the queue was drained, False if the timeout expired
+        """
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.debounce_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                self._send(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    @staticmethod
+    def _send(batch: List[Tuple[Any, str, List[Dict[str, str]], Optional[Dict[str, Any]]]]) -> None:
+        # Merge runs of consecutive messages with the same target so the
+        # original message order is preserved within each session
+        groups: List[Tuple[Any, str, Optional[Dict[str, Any]], List[Dict[str, str]]]] = []
+        for client, session_id, messages, metadata in batch:
+            if groups and groups[-1][0] is client and groups[-1][1] == session_id and groups[-1][2] == metadata:
+                groups[-1][3].extend(messages)
+            else:
+                groups.append((client, session_id, metadata, list(messages)))
+        
+        for client, session_id, metadata, messages in groups:
+            add_params = {
+                "messages": messages,
+                "user_id": session_id
+            }
+            if metadata:
+                add_params["metadata"] = metadata
+            try:
+                client.add(**add_params)
+            except Exception as e:
+                print(f"Error adding message to memory: {str(e)}")
+                # Continue execution even if memory storage fails
+            else:
+                if _local_index is not None:
+                    try:
+                        _local_index.add(session_id, messages)
+                    except Exception as e:
+                        print(f"Error indexing message locally: {str(e)}")
+            # Searches made while the write was queued may have cached stale results
+            _invalidate_session_caches(session_id)
+
+
+# One writer for the whole process, shared by any MemoryService instance
+_write_queue = _WriteBehindQueue()
+
+# Search results per session, reused for similar queries until the session's
+# memory changes. The phase query templates repeat across turns, so most
+# context lookups are served without a mem0 round-trip.
+_search_cache = SemanticCache(threshold=0.9, max_entries_per_scope=32, ttl_seconds=300, enabled=True)
+
+# Optional local vector index of written messages (MEMORY_LOCAL_INDEX_ENABLED),
+# which answers searches without calling mem0
+_local_index = create_local_index(_search_cache.embed, _search_cache.dim)
+
+
+# Recent intake history per session (session_id -> (expiry, messages)),
+# also dropped whenever the session's memory changes
+_INTAKE_CONTEXT_LIMIT = 20
+_INTAKE_CACHE_TTL = 300  # seconds
+_INTAKE_CACHE_MAX = 256  # sessions kept in the cache
+_intake_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+_intake_cache_lock = threading.Lock()
+
+# Last assistant message per session, recorded as messages are added so the
+# intake phase does not have to scan the history for it
+_LAST_ASSISTANT_MAX = 1024  # sessions kept
+_last_assistant_messages: "OrderedDict[str, str]" = OrderedDict()
+
+# Bullet points per (session_id, section_id), so the execution phase reads
+# them with a key lookup instead of a mem0 search
+_BULLETS_MAX = 4096  # sections kept
+_bullets: "OrderedDict[Tuple[str, str], List[str]]" = OrderedDict()
+_BULLETS_SEARCH_LIMIT = 10  # messages searched for a section's bullets
+
+
+def _invalidate_session_caches(session_id: str) -> None:
+    _search_cache.invalidate(SemanticCache.scope(session_id))
+    with _intake_cache_lock:
+        _intake_cache.pop(session_id, None)
+
+
+# Memory id of the first stored copy of each guide, keyed by content hash
+_guide_memory_ids: Dict[str, str] = {}
+
+
+def _first_memory_id(result: Any) -> Optional[str]:
+    """Get the id of the first memory in a mem0 add response, if any."""
+    items = result.get("results", []) if isinstance(result, dict) else result
+    if isinstance(items, list):
+        for item in items:
+            if isinstance(item, dict) and item.get("id"):
+                return str(item["id"])
+    return None
+
+
+def flush_pending_writes(timeout: Optional[float] = None) -> bool:
+    """
+    Wait until all queued memory writes have been sent (e.g. on shutdown).
+    
+    Args:
+        timeout: Optional maximum number of seconds to wait
+        
+    Returns:
+        True if all messages were written, False if the timeout expired
+    """
+    return _write_queue.flush(timeout)
+
 
 class MemoryService:
     """
@@ -54,48 +250,108 @@ class MemoryService:
             session_id: The unique session identifier
             guide_json: The parsed guide structure
         """
+        # A guide already stored for an earlier session is referenced by its
+        # memory id instead of being sent (and embedded) again
+        if orjson is not None:
+            guide_bytes = orjson.dumps(guide_json, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        else:
+            guide_bytes = json.dumps(guide_json, sort_keys=True, default=str).encode("utf-8")
+        guide_hash = hashlib.sha256(guide_bytes).hexdigest()
+        guide_memory_id = _guide_memory_ids.get(guide_hash)
+        
         # Create initial system message explaining the guide structure
+        if guide_memory_id:
+            content = f"This is a new report generation session. The guide structure is stored as guide_ref:{guide_memory_id}"
+        else:
+            content = f"This is a new report generation session. The guide structure is: {guide_json}"
         system_message = {
             "role": "system",
-            "content": f"This is a new report generation session. The guide structure is: {guide_json}"
+            "content": content
         }
         
         # Add to mem0 with the session_id as the user_id
         # According to the mem0 guide, we should use the messages parameter
-        self.client.add(messages=[system_message], user_id=session_id)
+        result = self.client.add(messages=[system_message], user_id=session_id)
+        _invalidate_session_caches(session_id)
+        
+        if not guide_memory_id:
+            memory_id = _first_memory_id(result)
+            if memory_id:
+                _guide_memory_ids[guide_hash] = memory_id
     
     def add_message(self, session_id: str, role: str, content: str, categories=None) -> None:
         """
         Add a message to memory.
         
-        This stores a conversation message in mem0 with the appropriate metadata.
+        This queues a conversation message for mem0 with the appropriate metadata;
+        it is sent in the background (see flush()).
         
         Args:
             session_id: The session identifier
             role: The role of the message sender (user or assistant)
             content: The message content
-            categories: Optional list of categories to tag this message with
+            categories: Optional sequence of categories to tag this message with
+        """
+        self.add_messages(session_id, [{"role": role, "content": content, "categories": categories}])
+    
+    def add_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """
+        Add the messages of a turn to memory in one go.
+        
+        Phase handlers collect a turn's messages and add them together at the
+        end of the turn. Consecutive messages with the same categories are sent
+        to mem0 as a single add call; mem0 applies metadata per call, so a
+        change of categories starts a new request.
+        
+        Args:
+            session_id: The session identifier
+            messages: Message dicts with role, content and optional categories
         """
         # According to the mem0 guide, we should structure our data differently
-        # We'll use a message object with role and content
-        message = {"role": role, "content": content}
+        # We'll use message objects with role and content, grouped by metadata
+        groups: List[Tuple[Optional[Dict[str, Any]], List[Dict[str, str]]]] = []
+        last_assistant = None
+        for message in messages:
+            categories = message.get("categories")
+            metadata = {"categories": categories} if categories else None
+            entry = {"role": message["role"], "content": message["content"]}
+            if groups and groups[-1][0] == metadata:
+                groups[-1][1].append(entry)
+            else:
+                groups.append((metadata, [entry]))
+            if message["role"] == "assistant":
+                last_assistant = message["content"]
         
-        # Create add parameters
-        add_params = {
-            "messages": [message],
-            "user_id": session_id
-        }
+        if not groups:
+            return
         
-        # Add metadata if categories are provided
-        if categories:
-            add_params["metadata"] = {"categories": categories}
+        # Queue for mem0; failures are logged by the writer and do not
+        # interrupt the conversation
+        _invalidate_session_caches(session_id)
+        for metadata, group in groups:
+            _write_queue.put(self.client, session_id, group, metadata)
         
-        # Add to mem0
-        try:
-            self.client.add(**add_params)
-        except Exception as e:
-            print(f"Error adding message to memory: {str(e)}")
-            # Continue execution even if memory storage fails
+        if last_assistant is not None:
+            with _intake_cache_lock:
+                _last_assistant_messages[session_id] = last_assistant
+                _last_assistant_messages.move_to_end(session_id)
+                while len(_last_assistant_messages) > _LAST_ASSISTANT_MAX:
+                    _last_assistant_messages.popitem(last=False)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued messages have been written to mem0.
+        
+        Call this at the end of a turn or on shutdown when later reads must
+        see the messages added so far.
+        
+        Args:
+            timeout: Optional maximum number of seconds to wait
+            
+        Returns:
+            True if all messages were written, False if the timeout expired
+        """
+        return flush_pending_writes(timeout)
         
     def add_user_message(self, session_id: str, content: str) -> None:
         """
@@ -117,21 +373,43 @@ class MemoryService:
         """
         self.add_message(session_id, "assistant", content)
     
-    def get_conversation_history(self, session_id: str, query: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def get_conversation_history(
+        self,
+        session_id: str,
+        query: Optional[str] = None,
+        limit: Optional[int] = None,
+        cache_key: Hashable = None
+    ) -> List[Dict[str, Any]]:
         """
         Get conversation history for a session.
         
         This retrieves all conversation messages for the given session.
         If a query is provided, it will perform a semantic search to find
-        relevant messages.
+        relevant messages. The blocking mem0 calls run in a worker thread so
+        they do not stall the event loop.
         
         Args:
             session_id: The session identifier
             query: Optional query for semantic search
+            limit: Optional maximum number of messages to return (the most
+                   relevant for a search, the first page otherwise)
+            cache_key: For queries built from a template, the values filled
+                       into it; cached results are then only reused for a query
+                       with the same values, not for one that merely reads alike
             
         Returns:
             List of conversation messages
         """
+        return await asyncio.to_thread(self._get_conversation_history, session_id, query, limit, cache_key)
+    
+    def _get_conversation_history(
+        self,
+        session_id: str,
+        query: Optional[str] = None,
+        limit: Optional[int] = None,
+        cache_key: Hashable = None
+    ) -> List[Dict[str, Any]]:
+        """Blocking implementation of get_conversation_history."""
         # The mem0 API expects filters in a specific format
         filters = {
             "user_id": session_id
@@ -139,16 +417,93 @@ class MemoryService:
         
         if query:
             # Semantic search for relevant context
-            return self.client.search(query, version="v2", filters=filters)
+            return self._cached_search(session_id, query, filters, limit, cache_key)
         else:
-            # Get all conversation history
-            return self.client.get_all(version="v2", filters=filters, page=1, page_size=100)
+            # Get the conversation history, reading no further than needed
+            limit = limit or 100
+            return list(islice(self.iter_conversation_history(session_id, page_size=limit), limit))
     
-    def get_intake_context(self, session_id: str) -> List[Dict[str, Any]]:
+    def iter_conversation_history(self, session_id: str, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all memories of a session, page by page.
+        
+        Pages are fetched through mem0's public get_all as they are needed,
+        so callers that stop early fetch no further pages.
+        
+        Args:
+            session_id: The session identifier
+            page_size: Number of memories requested per page
+            
+        Yields:
+            Memory dicts as returned by mem0
+        """
+        filters = {
+            "user_id": session_id
+        }
+        page = 1
+        while True:
+            response = self.client.get_all(version="v2", filters=filters, page=page, page_size=page_size)
+            items = response.get("results", []) if isinstance(response, dict) else response
+            yield from items
+            if len(items) < page_size:
+                return
+            page += 1
+    
+    def _cached_search(
+        self,
+        session_id: str,
+        query: str,
+        filters: Dict[str, Any],
+        limit: Optional[int] = None,
+        cache_key: Hashable = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a memory search, reusing results of a similar earlier query.
+        
+        Searches go to the local index when it is enabled and knows the
+        session, and to mem0 otherwise.
+        
+        Args:
+            session_id: The session identifier
+            query: The search query
+            filters: mem0 search filters
+            limit: Optional maximum number of results
+            cache_key: Template values the query was built from, if any
+            
+        Returns:
+            The search results
+        """
+        scope = SemanticCache.scope(session_id)
+        cached = _search_cache.lookup(scope, query)
+        # Results fetched with a different limit are not interchangeable, and
+        # templated queries for another section can embed as near-duplicates
+        # (e.g. "Data Collection" vs "Data Analysis"), so their values must match
+        if cached is not None and cached[0] == limit and cached[1] == cache_key:
+            return cached[2]
+        
+        results = None
+        if _local_index is not None:
+            try:
+                results = _local_index.search(session_id, query, limit or 10)
+            except Exception as e:
+                print(f"Error searching local memory index: {str(e)}")
+        
+        # Fall back to mem0 for sessions the local index has not seen
+        if results is None:
+            if limit:
+                results = self.client.search(query, version="v2", filters=filters, top_k=limit)
+            else:
+                results = self.client.search(query, version="v2", filters=filters)
+        _search_cache.store(scope, query, (limit, cache_key, results))
+        return results
+    
+    async def get_intake_context(self, session_id: str) -> List[Dict[str, Any]]:
         """
         Get context for the Intake phase.
         
-        This retrieves messages categorized as intake-related for the given session.
+        This retrieves the most recent messages for the given session; intake
+        only needs the last few turns, so a single short page is fetched and
+        reused until the session's memory changes.
         
         Args:
             session_id: The session identifier
@@ -156,6 +511,10 @@ class MemoryService:
         Returns:
             List of intake-related messages
         """
+        return await asyncio.to_thread(self._get_intake_context, session_id)
+    
+    def _get_intake_context(self, session_id: str) -> List[Dict[str, Any]]:
+        """Blocking implementation of get_intake_context."""
         # For now, just get all messages for this session
         # We'll implement more sophisticated filtering once we understand
         # how categories are stored in mem0
@@ -165,14 +524,128 @@ class MemoryService:
             "user_id": session_id
         }
         
-        # Get all conversation history for this session
+        with _intake_cache_lock:
+            entry = _intake_cache.get(session_id)
+            if entry is not None and entry[0] > time.monotonic():
+                _intake_cache.move_to_end(session_id)
+                return entry[1]
+        
+        # Get the recent conversation history for this session
         try:
-            return self.client.get_all(version="v2", filters=filters, page=1, page_size=100)
+            messages = self.client.get_all(version="v2", filters=filters, page=1, page_size=_INTAKE_CONTEXT_LIMIT)
         except Exception as e:
             print(f"Error getting intake context: {str(e)}")
             return []
+        
+        with _intake_cache_lock:
+            _intake_cache[session_id] = (time.monotonic() + _INTAKE_CACHE_TTL, messages)
+            _intake_cache.move_to_end(session_id)
+            while len(_intake_cache) > _INTAKE_CACHE_MAX:
+                _intake_cache.popitem(last=False)
+        return messages
     
-    def get_planner_context(self, session_id: str, current_section: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    async def get_last_assistant_message(self, session_id: str) -> Optional[str]:
+        """
+        Get the most recent assistant message of a session.
+        
+        Messages added through this process are looked up directly; only
+        sessions not seen since startup fall back to the intake history.
+        
+        Args:
+            session_id: The session identifier
+            
+        Returns:
+            The message content, or None if there is none
+        """
+        with _intake_cache_lock:
+            content = _last_assistant_messages.get(session_id)
+        if content is not None:
+            return content
+        
+        messages = await self.get_intake_context(session_id)
+        if isinstance(messages, dict):
+            messages = messages.get("results", [])
+        if isinstance(messages, list):
+            for msg in reversed(messages):
+                if isinstance(msg, dict) and msg.get("role") == "assistant":
+                    return msg.get("content", "")
+        return None
+    
+    def put_bullets(self, session_id: str, section_id: str, bullets: List[str]) -> None:
+        """
+        Record the bullet points of a section for keyed lookup.
+        
+        The planning phase also writes the bullets to mem0 as a message; that
+        copy is what get_bullets falls back to after a restart.
+        
+        Args:
+            session_id: The session identifier
+            section_id: The section ID (format: "chapter.section")
+            bullets: The bullet points
+        """
+        with _intake_cache_lock:
+            _bullets[(session_id, section_id)] = list(bullets)
+            _bullets.move_to_end((session_id, section_id))
+            while len(_bullets) > _BULLETS_MAX:
+                _bullets.popitem(last=False)
+    
+    async def get_bullets(self, session_id: str, section_id: str) -> Optional[List[str]]:
+        """
+        Get the bullet points recorded for a section.
+        
+        Bullets recorded by this process are a dictionary lookup; otherwise
+        the most recent bullet_points message for the section is searched in
+        mem0.
+        
+        Args:
+            session_id: The session identifier
+            section_id: The section ID (format: "chapter.section")
+            
+        Returns:
+            The bullet points, or None if none were found
+        """
+        with _intake_cache_lock:
+            bullets = _bullets.get((session_id, section_id))
+        if bullets is not None:
+            return list(bullets)
+        
+        # Search the session's messages for the section's bullet_points
+        # message. Local index results carry no metadata, so the section is
+        # matched on the section_id stored in the message itself
+        results = await asyncio.to_thread(
+            self._cached_search,
+            session_id,
+            f"Bullet points for section {section_id}",
+            {"user_id": session_id},
+            _BULLETS_SEARCH_LIMIT,
+            ("bullets", section_id)
+        )
+        
+        if isinstance(results, dict):
+            results = results.get("results", [])
+        if not results or not isinstance(results, list):
+            return None
+        
+        # Process results to extract bullet points
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            text = result.get("content", result.get("memory"))
+            try:
+                # Parse the content as JSON
+                content = orjson.loads(text) if orjson is not None else json.loads(text)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if (
+                isinstance(content, dict)
+                and content.get("section_id") == section_id
+                and isinstance(content.get("bullet_points"), list)
+            ):
+                self.put_bullets(session_id, section_id, content["bullet_points"])
+                return content["bullet_points"]
+        return None
+    
+    async def get_planner_context(self, session_id: str, current_section: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get context for the Planner phase.
         
@@ -184,14 +657,16 @@ class MemoryService:
         Args:
             session_id: The session identifier
             current_section: Optional current section information
+            limit: Optional maximum number of context entries to return
             
         Returns:
             Relevant context for the Planner
         """
-        query = f"What information do I need to ask about {current_section['title'] if current_section else 'the report'}?"
-        return self.get_conversation_history(session_id, query)
+        title = current_section['title'] if current_section else 'the report'
+        query = f"What information do I need to ask about {title}?"
+        return await self.get_conversation_history(session_id, query, limit=limit, cache_key=("planner", title))
     
-    def get_executor_context(self, session_id: str, section_info: Dict[str, Any], bullets: List[str]) -> List[Dict[str, Any]]:
+    async def get_executor_context(self, session_id: str, section_info: Dict[str, Any], bullets: List[str]) -> List[Dict[str, Any]]:
         """
         Get context for the Executor phase.
         
@@ -210,10 +685,11 @@ class MemoryService:
             Relevant context for content generation
         """
         # Create a query that captures the essence of this section
-        query = f"Information relevant to writing {section_info['title']} with these key points: {bullets}"
-        return self.get_conversation_history(session_id, query)
+        title = section_info.get("section_title") or section_info.get("title", "this section")
+        query = f"Information relevant to writing {title} with these key points: {bullets}"
+        return await self.get_conversation_history(session_id, query, cache_key=("executor", title, tuple(bullets)))
     
-    def get_reflector_context(self, session_id: str, draft_content: str) -> List[Dict[str, Any]]:
+    async def get_reflector_context(self, session_id: str, draft_content: str) -> List[Dict[str, Any]]:
         """
         Get context for the Reflector phase.
         
@@ -229,7 +705,28 @@ class MemoryService:
         Returns:
             Relevant context for generating reflection questions
         """
-        query = f"What would be good reflection questions about: {draft_content[:200]}..."
-        return self.get_conversation_history(session_id, query)
+        excerpt = draft_content[:200]
+        query = f"What would be good reflection questions about: {excerpt}..."
+        return await self.get_conversation_history(session_id, query, cache_key=("reflector", excerpt))
+    
     
+
+
+# Process-wide service, so the mem0 client and its HTTP connections are reused
+_INSTANCE: Optional[MemoryService] = None
+_INSTANCE_LOCK = threading.Lock()
+
+
+def get_memory_service() -> MemoryService:
+    """
+    Get the shared memory service, creating it on first use.
     
+    Returns:
+        The process-wide MemoryService instance
+    """
+    global _INSTANCE
+    if _INSTANCE is None:
+        with _INSTANCE_LOCK:
+            if _INSTANCE is None:
+                _INSTANCE = MemoryService()
+    return _INSTANCE
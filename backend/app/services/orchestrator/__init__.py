@@ -8,17 +8,25 @@ and maintainable with clear separation of concerns.
 Main components:
 - models.py: Contains data models (Phase enum, OrchestratorState)
 - core.py: Contains the main process_chat_message function and utilities
-- state_manager.py: Functions for persisting state to mem0
+- state_manager.py: State stores and functions for persisting state
 - phases/: Subpackage containing handlers for each phase
 """
 
 # Re-export main functions and classes for simplified imports
 from app.services.orchestrator.models import Phase, OrchestratorState
-from app.services.orchestrator.core import process_chat_message
-from app.services.orchestrator.utils import extract_section_from_guide
+from app.services.orchestrator.core import process_chat_message, stream_chat_message, get_reflection_results
+from app.services.orchestrator.utils import extract_section_from_guide, build_section_index, get_section_index, parse_section_id
 
 # Export state management functions
-from app.services.orchestrator.state_manager import save_orchestrator_state, load_orchestrator_state
+from app.services.orchestrator.state_manager import (
+    StateStore,
+    DBStateStore,
+    BackgroundStateStore,
+    save_orchestrator_state,
+    load_orchestrator_state,
+    invalidate_cached_state,
+    flush_pending_state_saves
+)
 
 # Version info
 __version__ = "1.0.0"
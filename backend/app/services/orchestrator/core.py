@@ -4,28 +4,70 @@ Core functionality for the Orchestrator service.
 This module contains the main entry point (process_chat_message) for handling user messages
 and utility functions used across different phases of the Planner → Executor → Reflector workflow.
 """
+import asyncio
 import json
-from typing import Dict, Any, Tuple, Optional
+import logging
+import os
+from typing import AsyncIterator, Dict, Any, Tuple, Optional
 
 from sqlalchemy.orm import Session
 
 from app.db.models.session import Session as SessionModel
+from app.db.models.section import Section as SectionModel
+from app.services.llm_service import get_llm_service, get_reflector_batch_results, submit_reflector_batch
 from app.services.session_service import get_session_by_id, store_intake_field
 from app.services.orchestrator.models import Phase, OrchestratorState
-from app.services.state_db import save_state_to_db, load_state_from_db
+from app.services.orchestrator.state_manager import BackgroundStateStore, StateStore
 from app.services.orchestrator.utils import extract_section_from_guide, determine_intake_field
 
 # Import phase handlers - will be moved to separate modules
 from app.services.orchestrator.phases.intake import handle_intake_phase
 from app.services.orchestrator.phases.planning import handle_planning_phase
-from app.services.orchestrator.phases.execution import handle_execution_phase
+from app.services.orchestrator.phases.execution import handle_execution_phase, stream_execution_phase
 from app.services.orchestrator.phases.reflection import handle_reflection_phase
 
+logger = logging.getLogger(__name__)
+
+# Handler for each phase of the workflow
+_PHASE_HANDLERS = {
+    Phase.INTAKE: handle_intake_phase,
+    Phase.PLANNING: handle_planning_phase,
+    Phase.EXECUTION: handle_execution_phase,
+    Phase.REFLECTION: handle_reflection_phase,
+}
+
+# Maximum number of messages being worked on by phase handlers at once;
+# further messages wait for a slot rather than adding load on Claude, mem0
+# and the database all at the same time
+_MAX_INFLIGHT = int(os.getenv("ORCHESTRATOR_MAX_INFLIGHT", "32"))
+_inflight: Optional[asyncio.Semaphore] = None
+_inflight_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _inflight_slots() -> asyncio.Semaphore:
+    """
+    Get the semaphore limiting in-flight messages for the running loop.
+    
+    It is created on first use rather than at import time: before Python
+    3.10 a semaphore is bound to the loop current when it was created, so one
+    made at import would fail under the server's (or a test's) own loop.
+    """
+    global _inflight, _inflight_loop
+    loop = asyncio.get_running_loop()
+    if _inflight is None or _inflight_loop is not loop:
+        _inflight = asyncio.Semaphore(_MAX_INFLIGHT)
+        _inflight_loop = loop
+    return _inflight
+
+# Messages handled by process_chat_message itself rather than a phase handler
+_SPECIAL_COMMANDS = {"force-complete-intake", "reflect-all"}
+
 
 async def process_chat_message(
     db: Session,
     session_id: str,
     message: str,
+    store: Optional[StateStore] = None,
 ) -> Dict[str, Any]:
     """
     Process a chat message from the user and generate a response.
@@ -44,10 +86,15 @@ async def process_chat_message(
         db: Database session
         session_id: Session ID
         message: User message
+        store: Optional state store (defaults to the session row, written
+            in the background)
         
     Returns:
         Dict containing the AI response and updated state
     """
+    if store is None:
+        store = BackgroundStateStore(db)
+    
     # Get session
     session = get_session_by_id(db, session_id)
     if not session:
@@ -63,10 +110,10 @@ async def process_chat_message(
     # Special command handling
     if message.strip().lower() == "force-complete-intake":
         # Special command for testing to force completion of the intake phase
-        state_dict = load_state_from_db(db, session_id)
-        state = OrchestratorState.from_dict(state_dict) if state_dict else OrchestratorState(session_id)
+        state = store.load(session_id) or OrchestratorState(session_id)
         state.phase = Phase.PLANNING
-        save_state_to_db(db, session_id, state.to_dict())
+        store.save(state)
+        await store.flush(session_id)
         return {
             "message": "Intake phase forced to complete. Transitioning to planning phase.",
             "metadata": {
@@ -75,31 +122,26 @@ async def process_chat_message(
             }
         }
         
-    # Load state from database or create new state
-    state_dict = load_state_from_db(db, session_id)
-    
-    # Create state object from dictionary or create new state if not found
-    if state_dict:
-        state = OrchestratorState.from_dict(state_dict)
-    else:
-        # Create new state in intake phase
-        state = OrchestratorState(session_id)
+    if message.strip().lower() == "reflect-all":
+        # Reflection questions for every drafted section, submitted as one
+        # batch; the questions are fetched later with get_reflection_results
+        return await _reflect_on_all_sections(db, session_id)
+        
+    # Load state from the store, or create a new state in intake phase
+    state = store.load(session_id) or OrchestratorState(session_id)
+    phase = state.phase
         
-    # Print debug info about the current state
-    print(f"Current state: phase={state.phase}, section={state.current_section_id}")
+    # Debug info about the current state
+    logger.debug("Current state: phase=%s, section=%s", state.phase, state.current_section_id)
     
     # Process message based on current phase
     response = None
     updated_state = None
     
-    if state.phase == Phase.INTAKE:
-        response, updated_state = await handle_intake_phase(db, session, state, message)
-    elif state.phase == Phase.PLANNING:
-        response, updated_state = await handle_planning_phase(db, session, state, message)
-    elif state.phase == Phase.EXECUTION:
-        response, updated_state = await handle_execution_phase(db, session, state, message)
-    elif state.phase == Phase.REFLECTION:
-        response, updated_state = await handle_reflection_phase(db, session, state, message)
+    handler = _PHASE_HANDLERS.get(state.phase)
+    if handler is not None:
+        async with _inflight_slots():
+            response, updated_state = await handler(db, session, state, message)
     else:
         # Unknown phase - return error
         response = {
@@ -113,13 +155,149 @@ async def process_chat_message(
         
     # Make sure we have a valid state to save
     if updated_state:
-        # Save updated state to database
-        save_state_to_db(db, session_id, updated_state.to_dict())
+        # Save updated state. Within a phase the write finishes in the
+        # background while the response goes out; a phase change is waited
+        # for so that it is in the database before the client moves on
+        store.save(updated_state)
+        if updated_state.phase != phase:
+            await store.flush(session_id)
         
     return response
 
 
+async def stream_chat_message(
+    db: Session,
+    session_id: str,
+    message: str,
+    store: Optional[StateStore] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process a chat message, streaming the response where the phase allows it.
+    
+    In the execution phase the draft is yielded as it is generated, so the
+    client can show it before generation has finished. Every other phase and
+    command is answered in one piece by process_chat_message.
+    
+    Args:
+        db: Database session
+        session_id: Session ID
+        message: User message
+        store: Optional state store (defaults to the session row, written
+            in the background)
+        
+    Yields:
+        Zero or more {"type": "delta", "text": ...} events, followed by one
+        {"type": "response", ...} event matching the ChatResponse schema
+    """
+    if store is None:
+        store = BackgroundStateStore(db)
+    
+    session = get_session_by_id(db, session_id)
+    state = store.load(session_id) if session else None
+    
+    if state is None or state.phase != Phase.EXECUTION or message.strip().lower() in _SPECIAL_COMMANDS:
+        response = await process_chat_message(db, session_id, message, store)
+        yield {"type": "response", **response}
+        return
+    
+    phase = state.phase
+    async with _inflight_slots():
+        async for event in stream_execution_phase(db, session, state, message):
+            yield event
+    
+    store.save(state)
+    if state.phase != phase:
+        await store.flush(session_id)
+
+
 # extract_section_from_guide function moved to utils.py
 
 
 # determine_intake_field function moved to utils.py
+
+
+async def _reflect_on_all_sections(db: Session, session_id: str) -> Dict[str, Any]:
+    """
+    Submit a batch generating reflection questions for all drafted sections.
+    
+    The drafts are sent as a single message batch, which is cheaper than one
+    reflection call per section. A batch can take minutes or longer, so the
+    response only carries the batch ID; the questions are fetched with
+    get_reflection_results. The phase and current section are unchanged.
+    
+    Args:
+        db: Database session
+        session_id: Session ID
+        
+    Returns:
+        Dict matching the ChatResponse schema, with the batch ID in the metadata
+    """
+    sections = (
+        db.query(SectionModel.chapter_idx, SectionModel.section_idx, SectionModel.draft_html)
+        .filter(SectionModel.session_id == session_id, SectionModel.draft_html.isnot(None))
+        .order_by(SectionModel.chapter_idx, SectionModel.section_idx)
+        .all()
+    )
+    if not sections:
+        return {
+            "message": "There are no drafted sections to reflect on yet.",
+            "metadata": {
+                "phase": "reflection",
+                "reflection_questions": False
+            }
+        }
+    
+    batch_id = await submit_reflector_batch(get_llm_service(), session_id, [tuple(row) for row in sections])
+    
+    return {
+        "message": f"Reflection questions for {len(sections)} drafted sections are being generated. Check back shortly to see them.",
+        "metadata": {
+            "phase": "reflection",
+            "reflection_questions": False,
+            "reflection_batch_id": batch_id,
+            "section_ids": [f"{chapter_idx}.{section_idx}" for chapter_idx, section_idx, _ in sections]
+        }
+    }
+
+
+async def get_reflection_results(session_id: str, batch_id: str) -> Dict[str, Any]:
+    """
+    Get the reflection questions from a batch submitted by "reflect-all".
+    
+    Args:
+        session_id: Session ID
+        batch_id: The reflection_batch_id from the "reflect-all" response
+        
+    Returns:
+        Dict matching the ChatResponse schema; metadata["status"] is
+        "in_progress" until the batch has ended
+        
+    Raises:
+        ValueError: If the batch was not submitted for this session
+    """
+    results = await get_reflector_batch_results(get_llm_service(), session_id, batch_id)
+    if results is None:
+        return {
+            "message": "Reflection questions are still being generated.",
+            "metadata": {
+                "phase": "reflection",
+                "reflection_questions": False,
+                "reflection_batch_id": batch_id,
+                "status": "in_progress"
+            }
+        }
+    
+    parts = [
+        f"Section {chapter_idx}.{section_idx}:\n{response['message']}"
+        for chapter_idx, section_idx, response in results
+    ]
+    return {
+        "message": "\n\n".join(parts),
+        "metadata": {
+            "phase": "reflection",
+            "reflection_questions": True,
+            "reflection_batch_id": batch_id,
+            "status": "ended",
+            "section_ids": [f"{chapter_idx}.{section_idx}" for chapter_idx, section_idx, _ in results]
+        }
+    }
@@ -6,10 +6,12 @@ This module contains the data models used by the orchestrator service:
 - OrchestratorState: Tracks state across requests in the Planner → Executor → Reflector flow
 """
 import json
+import sys
 from enum import Enum
 from typing import Dict, Optional, Any
 
-from app.services.memory_service import MemoryService
+from app.services.memory_service import get_memory_service
+from app.services.orchestrator.utils import extract_section_from_guide, get_section_index, parse_section_id
 
 
 class Phase(str, Enum):
@@ -40,7 +42,10 @@ class OrchestratorState:
         session_id (str): Unique identifier for the session
         phase (Phase): Current phase of the workflow
         current_section_id (Optional[str]): Current section being worked on (format: "chapter.section")
+        current_chapter_idx (Optional[int]): Chapter index of the current section, None if unset or malformed
+        current_section_idx (Optional[int]): Section index of the current section, None if unset or malformed
         memory_service (MemoryService): Service for storing/retrieving memory
+        section_index (Optional[Dict]): Section details by section ID, built from the guide on first use
     """
     def __init__(
         self,
@@ -56,11 +61,63 @@ class OrchestratorState:
             phase: Current phase of the workflow (default: intake)
             current_section_id: Current section ID (format: "chapter.section")
         """
-        self.session_id = session_id
+        # Interned: the IDs are used as cache keys and memory categories on
+        # every turn, and a state object is rebuilt for each message
+        self.session_id = sys.intern(session_id)
         self.phase = phase
-        self.current_section_id = current_section_id
-        # Initialize memory service for this session
-        self.memory_service = MemoryService()
+        self.set_current_section(current_section_id)
+        # Shared memory service (one mem0 client per process)
+        self.memory_service = get_memory_service()
+        # Built lazily by get_section_info; rebuilt if a different guide is passed
+        self.section_index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._section_index_guide: Optional[Dict[str, Any]] = None
+    
+    @property
+    def current_section_id(self) -> Optional[str]:
+        """Current section ID (format: "chapter.section"); see set_current_section."""
+        return self._current_section_id
+    
+    @current_section_id.setter
+    def current_section_id(self, section_id: Optional[str]) -> None:
+        self.set_current_section(section_id)
+    
+    def set_current_section(self, section_id: Optional[str]) -> None:
+        """
+        Set the current section and parse its indices once.
+        
+        Code that needs the chapter and section numbers reads
+        current_chapter_idx / current_section_idx instead of re-parsing the ID.
+        
+        Args:
+            section_id: Section ID (format: "chapter.section"), or None to clear it
+        """
+        self._current_section_id = sys.intern(section_id) if section_id else section_id
+        indices = parse_section_id(section_id)
+        self.current_chapter_idx, self.current_section_idx = indices if indices is not None else (None, None)
+    
+    def get_section_info(self, guide_json: Dict[str, Any], section_id: str) -> Dict[str, Any]:
+        """
+        Get the details of a section of the guide.
+        
+        The guide is indexed once per session (see get_section_index) and
+        later lookups are dictionary hits.
+        
+        Args:
+            guide_json: The complete guide structure
+            section_id: ID of the section (format: "chapter.section")
+            
+        Returns:
+            Dictionary with section details or default if not found
+        """
+        if self.section_index is None or self._section_index_guide is not guide_json:
+            self.section_index = get_section_index(self.session_id, guide_json)
+            self._section_index_guide = guide_json
+        
+        section_info = self.section_index.get(section_id)
+        if section_info is None:
+            # Unknown section: reports the error and returns the default details
+            return extract_section_from_guide(guide_json, section_id)
+        return section_info
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -71,7 +128,8 @@ class OrchestratorState:
         """
         return {
             "session_id": self.session_id,
-            "phase": self.phase,
+            # Store the plain string so the state is JSON-serializable as-is
+            "phase": self.phase.value if isinstance(self.phase, Phase) else self.phase,
             "current_section_id": self.current_section_id,
         }
     
@@ -86,8 +144,15 @@ class OrchestratorState:
         Returns:
             Initialized OrchestratorState instance
         """
+        phase = data["phase"]
+        try:
+            phase = Phase(phase)
+        except ValueError:
+            # Left as stored; process_chat_message reports unknown phases
+            pass
+        
         return cls(
             session_id=data["session_id"],
-            phase=data["phase"],
+            phase=phase,
             current_section_id=data["current_section_id"],
         )
@@ -4,17 +4,19 @@ Execution phase handler for the Orchestrator service.
 This module handles the execution phase of the Planner → Executor → Reflector workflow
 where we generate draft content based on bullet points and web search results.
 """
-import json
-from typing import Dict, List, Tuple, Any, Optional
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Tuple, Any, Optional
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.db.models.session import Session as SessionModel
 from app.db.models.section import Section as SectionModel
-from app.services.memory_service import MemoryService
-from app.services.llm_service import LLMService
+from app.services.llm_service import generate_executor_response, get_llm_service, stream_executor_response
 from app.services.orchestrator.models import Phase, OrchestratorState
-from app.services.orchestrator.utils import extract_section_from_guide
+
+logger = logging.getLogger(__name__)
 
 # This will be imported once implemented
 # from app.services.search_service import perform_web_search
@@ -45,59 +47,148 @@ async def handle_execution_phase(
     Returns:
         Tuple of (response, updated state)
     """
-    print(f"Handling message in EXECUTION phase: {message[:50]}...")
+    logger.debug("Handling message in EXECUTION phase: %s...", message[:50])
     
     # Initialize services
-    llm_service = LLMService()
-    
-    # Initialize memory service if needed
-    if not hasattr(state, 'memory_service'):
-        state.memory_service = MemoryService()
-    
-    # Store user message in memory
-    state.memory_service.add_message(
-        session_id=state.session_id, 
-        role="user", 
-        content=message,
-        categories=["execution", state.current_section_id]
-    )
-    
-    # Get section details from guide
-    section_info = extract_section_from_guide(session.guide_json, state.current_section_id)
+    llm_service = get_llm_service()
     
-    # Retrieve bullet points from memory
-    bullets = get_bullet_points_from_memory(state)
-    
-    # Perform web search based on section requirements and bullet points
-    search_results = await perform_search(state.current_section_id, section_info, bullets)
+    section_info, bullets, search_results = await _prepare_draft(session, state)
     
     # Generate draft content
-    draft_response = await llm_service.generate_executor_response(
+    draft_response = await generate_executor_response(
+        llm_service=llm_service,
         session_id=state.session_id,
         section_info=section_info,
         bullets=bullets,
-        search_results=search_results
+        search_results=search_results,
+        message=message
     )
     
     # Get the draft content
     draft_content = draft_response.get("message", "")
     
-    # Store draft in memory
-    state.memory_service.add_message(
-        session_id=state.session_id,
-        role="assistant",
-        content=draft_content,
-        categories=["execution", state.current_section_id, "draft"]
+    return await _finish_draft(db, state, message, draft_content), state
+
+
+async def stream_execution_phase(
+    db: Session,
+    session: SessionModel,
+    state: OrchestratorState,
+    message: str,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Handle a message during the execution phase, streaming the draft.
+    
+    Same steps as handle_execution_phase, but the draft is yielded as it is
+    generated. The draft is saved and the state moves to reflection only
+    once the whole draft has been received; if generation fails, the state
+    stays in execution so the user can retry.
+    
+    Args:
+        db: Database session
+        session: Session model instance
+        state: Current orchestrator state (updated in place)
+        message: User message
+        
+    Yields:
+        {"type": "delta", "text": ...} events for each chunk of the draft, then
+        one {"type": "response", "message": ..., "metadata": ...} event
+    """
+    logger.debug("Streaming message in EXECUTION phase: %s...", message[:50])
+    
+    # Initialize services
+    llm_service = get_llm_service()
+    
+    section_info, bullets, search_results = await _prepare_draft(session, state)
+    
+    parts = []
+    try:
+        async for chunk in stream_executor_response(
+            llm_service=llm_service,
+            session_id=state.session_id,
+            section_info=section_info,
+            bullets=bullets,
+            search_results=search_results,
+            message=message
+        ):
+            parts.append(chunk)
+            yield {"type": "delta", "text": chunk}
+    except Exception as e:
+        logger.error("Error streaming draft: %s", e)
+        yield {
+            "type": "response",
+            "message": f"Error generating response: {str(e)}",
+            "metadata": {
+                "phase": "execution",
+                "section_id": state.current_section_id,
+                "error": str(e)
+            }
+        }
+        return
+    
+    response = await _finish_draft(db, state, message, "".join(parts))
+    yield {"type": "response", **response}
+
+
+async def _prepare_draft(
+    session: SessionModel,
+    state: OrchestratorState
+) -> Tuple[Dict[str, Any], List[str], List[Dict[str, Any]]]:
+    """
+    Gather what the executor needs to draft the current section.
+    
+    Args:
+        session: Session model instance
+        state: Current orchestrator state
+        
+    Returns:
+        Tuple of (section info, bullet points, search results)
+    """
+    # Get section details from guide
+    section_info = state.get_section_info(session.guide_json, state.current_section_id)
+    
+    # Retrieve bullet points from memory and search the web for the section's
+    # requirements at the same time; neither depends on the other
+    bullets, search_results = await asyncio.gather(
+        get_bullet_points_from_memory(state),
+        perform_search(state.current_section_id, section_info)
     )
+    return section_info, bullets, search_results
+
+
+async def _finish_draft(db: Session, state: OrchestratorState, message: str, draft_content: str) -> Dict[str, Any]:
+    """
+    Store a generated draft and move the state on to reflection.
     
-    # Store draft in database
-    save_draft_to_database(db, state.session_id, state.current_section_id, draft_content)
+    Args:
+        db: Database session
+        state: Current orchestrator state (updated in place)
+        message: User message
+        draft_content: The generated draft
+        
+    Returns:
+        The response for the client
+    """
+    # Store the user message and the draft in memory
+    state.memory_service.add_messages(state.session_id, [
+        {"role": "user", "content": message, "categories": ("execution", state.current_section_id)},
+        {"role": "assistant", "content": draft_content, "categories": ("execution", state.current_section_id, "draft")}
+    ])
+    
+    # Store draft in database, off the event loop thread
+    if state.current_chapter_idx is None:
+        logger.warning("Not saving draft for malformed section ID %r", state.current_section_id)
+    else:
+        await asyncio.to_thread(
+            save_draft_to_database,
+            db, state.session_id, state.current_chapter_idx, state.current_section_idx, draft_content
+        )
     
     # Transition to reflection phase
     state.phase = Phase.REFLECTION
     
     # Format response
-    response = {
+    return {
         "message": draft_content,
         "metadata": {
             "phase": "reflection",
@@ -105,11 +196,9 @@ async def handle_execution_phase(
             "generated_content": True
         }
     }
-    
-    return response, state
 
 
-def get_bullet_points_from_memory(state: OrchestratorState) -> List[str]:
+async def get_bullet_points_from_memory(state: OrchestratorState) -> List[str]:
     """
     Retrieve bullet points for the current section from memory.
     
@@ -123,90 +212,73 @@ def get_bullet_points_from_memory(state: OrchestratorState) -> List[str]:
     bullet_points = []
     
     try:
-        # Get messages with bullet_points category and current section ID
-        results = state.memory_service.client.search(
-            user_id=state.session_id,
-            categories=["bullet_points", state.current_section_id],
-            limit=1  # We only need the most recent set of bullet points
-        )
-        
-        # Process results to extract bullet points
-        if results and isinstance(results, list) and len(results) > 0:
-            for result in results:
-                if isinstance(result, dict) and "content" in result:
-                    try:
-                        # Parse the content as JSON
-                        content = json.loads(result.get("content", "{}"))
-                        if "bullet_points" in content:
-                            bullet_points = content["bullet_points"]
-                            break
-                    except json.JSONDecodeError:
-                        continue
+        bullet_points = await state.memory_service.get_bullets(state.session_id, state.current_section_id) or []
     except Exception as e:
-        print(f"Error retrieving bullet points: {e}")
+        logger.error("Error retrieving bullet points: %s", e)
     
     # If we still don't have bullet points, create some default ones
     if not bullet_points:
-        print("No bullet points found, using defaults")
+        logger.info("No bullet points found, using defaults")
         bullet_points = ["Introduction to the topic", "Main arguments", "Supporting evidence", "Conclusion"]
     
     return bullet_points
 
 
-async def perform_search(section_id: str, section_info: Dict[str, Any], bullets: List[str]) -> List[Dict[str, Any]]:
+async def perform_search(section_id: str, section_info: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Perform web search based on section requirements and bullet points.
+    Perform web search based on the section's title and requirements.
     
+    The search does not wait for the user's bullet points, so it can run
+    while they are retrieved from memory.
     This is a placeholder until we implement the actual search service.
     
     Args:
         section_id: ID of the section
         section_info: Section details
-        bullets: List of bullet points
         
     Returns:
         List of search results
     """
     # Placeholder until we implement the search service
-    print("Performing web search (placeholder)")
+    logger.debug("Performing web search (placeholder)")
     
     # In a real implementation, we would call the search service:
     # from app.services.search_service import perform_web_search
-    # return await perform_web_search(section_info, bullets)
+    # return await perform_web_search(section_info)
     
     # For now, return empty results
     return []
 
 
-def save_draft_to_database(db: Session, session_id: str, section_id: str, content: str) -> None:
+def save_draft_to_database(db: Session, session_id: str, chapter_idx: int, section_idx: int, content: str) -> None:
     """
     Save generated draft content to the database.
     
     Args:
         db: Database session
         session_id: Session ID
-        section_id: Section ID (format: "chapter.section")
+        chapter_idx: Chapter index
+        section_idx: Section index
         content: Generated content
     """
     try:
-        # Parse section ID
-        chapter_idx, section_idx = map(int, section_id.split('.'))
-        
-        # Find section in database
-        section = db.query(SectionModel).filter(
-            SectionModel.session_id == session_id,
-            SectionModel.chapter_idx == chapter_idx,
-            SectionModel.section_idx == section_idx
-        ).first()
+        # Update content and status in one statement, looked up by primary key
+        result = db.execute(
+            update(SectionModel)
+            .where(
+                SectionModel.session_id == session_id,
+                SectionModel.chapter_idx == chapter_idx,
+                SectionModel.section_idx == section_idx
+            )
+            .values(draft_html=content, status="draft")
+        )
+        db.commit()
         
-        if section:
-            # Update content and status
-            section.content = content
-            section.status = "draft"
-            db.commit()
-            print(f"Draft saved for section {section_id}")
+        if result.rowcount:
+            logger.info("Draft saved for section %d.%d", chapter_idx, section_idx)
         else:
-            print(f"Section {section_id} not found in database")
+            logger.warning("Section %d.%d not found in database", chapter_idx, section_idx)
     except Exception as e:
-        print(f"Error saving draft: {e}")
+        logger.error("Error saving draft: %s", e)
         db.rollback()
+
@@ -4,16 +4,46 @@ Intake phase handler for the Orchestrator service.
 This module handles the initial phase of the Planner → Executor → Reflector workflow
 where we gather basic requirements for the report from the user.
 """
+import asyncio
 import json
+import logging
+import re
 from typing import Dict, Tuple, Any
 
 from sqlalchemy.orm import Session
 
 from app.db.models.session import Session as SessionModel
-from app.services.session_service import store_intake_field
-from app.services.memory_service import MemoryService
-from app.services.llm_service import LLMService
+from app.services.session_service import store_intake_fields
+from app.services.llm_service import get_llm_service, generate_intake_response
 from app.services.orchestrator.models import Phase, OrchestratorState
+from app.services.orchestrator.utils import determine_intake_field
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["handle_intake_phase"]
+
+# Signals in Claude's reply that the intake is complete
+_COMPLETION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'"complete_intake"\s*:\s*true',   # Standard JSON format
+        r"'complete_intake'\s*:\s*true",   # Single quotes
+        r"we have.*information",            # Natural language indicators
+        r"ready to.*proceed",
+        r"ready to.*start",
+        r"start.*planning",
+        r"move to.*next phase"
+    )
+]
+
+# The LLM is primarily responsible for determining when intake is complete;
+# having these fields filled in is the fallback check
+_REQUIRED_FIELDS = frozenset({"title"})  # Title is absolutely required
+
+
+def _intake_ready(intake_json: Dict[str, Any]) -> bool:
+    """Check whether every required intake field has a non-empty value."""
+    return _REQUIRED_FIELDS.issubset(field for field, value in intake_json.items() if value)
 
 
 async def handle_intake_phase(
@@ -39,11 +69,7 @@ async def handle_intake_phase(
     Returns:
         Tuple of (response, updated state)
     """
-    print(f"Handling message in INTAKE phase: {message[:50]}...")
-    
-    # Initialize memory service if needed
-    if not hasattr(state, 'memory_service'):
-        state.memory_service = MemoryService()
+    logger.debug("Handling message in INTAKE phase: %s...", message[:50])
     
     # Get existing intake JSON or initialize empty dict
     intake_json = session.intake_json or {}
@@ -51,58 +77,29 @@ async def handle_intake_phase(
     # Get guide JSON
     guide_json = session.guide_json
     
-    # Initialize LLM service and import the generate_intake_response function
-    llm_service = LLMService()
-    from app.services.llm import generate_intake_response
+    # Initialize LLM service
+    llm_service = get_llm_service()
     
-    # Get previous messages to determine which field to update
+    # Get the last question asked to determine which field to update
     try:
-        previous_messages = state.memory_service.get_intake_context(state.session_id)
-        previous_question = ""
-        
-        # Add type checking and error handling
-        if previous_messages and isinstance(previous_messages, list) and len(previous_messages) > 0:
-            # Get the last message from the assistant
-            for msg in reversed(previous_messages):
-                # Make sure msg is a dictionary and has the expected attributes
-                if isinstance(msg, dict) and "role" in msg and msg["role"] == "assistant":
-                    previous_question = msg.get("content", "")
-                    break
+        previous_question = await state.memory_service.get_last_assistant_message(state.session_id) or ""
     except Exception as e:
-        print(f"Error processing previous messages: {str(e)}")
+        logger.error("Error processing previous messages: %s", e)
         previous_question = ""  # Fail gracefully
     
     # Determine which field to update based on the last question
     field_to_update = None
     try:
-        from app.services.orchestrator.utils import determine_intake_field
         field_to_update = determine_intake_field(previous_question)
     except Exception as e:
-        print(f"Error determining field to update: {str(e)}")
+        logger.error("Error determining field to update: %s", e)
     
-    # Add this field to intake JSON collection
+    # Add this field to intake JSON collection; fields are stored in the
+    # database together once the response has been processed
+    pending_fields = {}
     if field_to_update:
         intake_json[field_to_update] = message
-        
-        # Store in database
-        try:
-            store_intake_field(db, session, field_to_update, message)
-        except Exception as e:
-            print(f"Error storing intake field: {str(e)}")
-            # Continue execution even if storage fails
-    
-    # The LLM is primarily responsible for determining when intake is complete
-    # We'll rely on Claude's determination, but do a basic check as a fallback
-    required_fields = ["title", "department", "academic_level", "target_audience"]
-    has_minimum_fields = "title" in intake_json  # Title is absolutely required
-    
-    # Store user message in memory
-    state.memory_service.add_message(
-        session_id=state.session_id, 
-        role="user", 
-        content=message,
-        categories=["intake"]
-    )
+        pending_fields[field_to_update] = message
     
     # Generate response from LLM
     try:
@@ -115,23 +112,21 @@ async def handle_intake_phase(
             message=message
         )
     except Exception as e:
-        print(f"Error generating LLM response: {str(e)}")
+        logger.error("Error generating LLM response: %s", e)
         # Provide a fallback response in case of LLM failure
         response = {
             "message": "I'm sorry, I'm having trouble processing your request. Could you please try again?",
             "metadata": {"phase": "intake"}
         }
     
-    # Store assistant message in memory
+    # Store the user and assistant messages in memory
     try:
-        state.memory_service.add_message(
-            session_id=state.session_id, 
-            role="assistant", 
-            content=response.get("message", ""),
-            categories=["intake"]
-        )
+        state.memory_service.add_messages(state.session_id, [
+            {"role": "user", "content": message, "categories": ("intake",)},
+            {"role": "assistant", "content": response.get("message", ""), "categories": ("intake",)}
+        ])
     except Exception as e:
-        print(f"Error storing assistant message: {str(e)}")
+        logger.error("Error storing assistant message: %s", e)
         # Continue execution even if memory storage fails
     
     # Check if the LLM indicated we should transition to planning
@@ -139,69 +134,46 @@ async def handle_intake_phase(
         transition_to_planning = False
         metadata = response.get("metadata", {})
         
-        print(f"DEBUG INTAKE: Processing metadata for phase transition: {metadata}")
+        logger.debug("Processing metadata for phase transition: %s", metadata)
         
         # Get requirements JSON if provided by Claude
         requirements_json = metadata.get("requirements_json", {})
         
         # If Claude provided structured requirements JSON, update multiple fields at once
         if requirements_json:
-            print(f"DEBUG INTAKE: Received structured requirements JSON from Claude: {json.dumps(requirements_json, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received structured requirements JSON from Claude: %s", json.dumps(requirements_json, indent=2))
             
             # Update all fields in the requirements JSON
-            for field, value in requirements_json.items():
-                # Skip the complete_intake flag as it's not an actual field
-                if field != "complete_intake":
-                    # Store each field in the intake_json and database
-                    intake_json[field] = value
-                    try:
-                        store_intake_field(db, session, field, value)
-                        print(f"DEBUG INTAKE: Updated field '{field}' with value: {value}")
-                    except Exception as e:
-                        print(f"ERROR: Failed to store field '{field}': {str(e)}")
+            # Skip the complete_intake flag as it's not an actual field
+            fields = {field: value for field, value in requirements_json.items() if field != "complete_intake"}
+            intake_json.update(fields)
+            pending_fields.update(fields)
         
         # Check for complete_intake flag in the API metadata
         api_complete_intake = metadata.get("complete_intake", False)
-        print(f"DEBUG INTAKE: API complete_intake flag is: {api_complete_intake}")
+        logger.debug("API complete_intake flag is: %s", api_complete_intake)
         
         # NEW: Also check for completion signals embedded in message content
         message_content = response.get("message", "")
-        print(f"DEBUG INTAKE: Checking message content for embedded completion signals")
+        logger.debug("Checking message content for embedded completion signals")
         
         # Look for JSON-like patterns indicating completion
         message_indicates_completion = False
-        import re
-        completion_patterns = [
-            r'"complete_intake"\s*:\s*true',   # Standard JSON format
-            r"'complete_intake'\s*:\s*true",   # Single quotes
-            r"we have.*information",            # Natural language indicators
-            r"ready to.*proceed",
-            r"ready to.*start",
-            r"start.*planning",
-            r"move to.*next phase"
-        ]
-        
-        for pattern in completion_patterns:
-            if re.search(pattern, message_content, re.IGNORECASE):
-                print(f"DEBUG INTAKE: Found completion signal in message: {pattern}")
+        for pattern in _COMPLETION_PATTERNS:
+            if pattern.search(message_content):
+                logger.debug("Found completion signal in message: %s", pattern.pattern)
                 message_indicates_completion = True
                 break
         
-        # Check if we have the minimum necessary fields
-        has_title = "title" in intake_json and intake_json["title"]
-        
-        # Transition to planning if (1) API says complete, OR (2) message indicates complete, OR (3) we at least have a title
-        # Claude is now the primary authority on when intake is complete
-        transition_to_planning = api_complete_intake or message_indicates_completion or has_title
+        # Transition to planning if (1) API says complete, OR (2) message indicates complete, OR (3) we at least have
+        # the required fields. Claude is now the primary authority on when intake is complete
+        transition_to_planning = api_complete_intake or message_indicates_completion or _intake_ready(intake_json)
         
         # Transition to planning phase if needed
         if transition_to_planning:
-            print("========== Transitioning to PLANNING phase ===========")
-            print(f"DEBUG INTAKE: Before transition - state.phase={state.phase}")
+            logger.info("Transitioning session %s to PLANNING phase", state.session_id)
             state.phase = Phase.PLANNING
-            print(f"DEBUG INTAKE: After transition - state.phase={state.phase}")
-            print(f"DEBUG INTAKE: State object ID after transition: {id(state)}")
-            print("=====================================================")
             
             # Add phase transition to response metadata
             if isinstance(response, dict) and isinstance(response.get("metadata"), dict):
@@ -213,11 +185,11 @@ async def handle_intake_phase(
                     "metadata": {"phase": "planning"}
                 }
         else:
-            print("DEBUG INTAKE: Not transitioning to planning phase yet, staying in intake")
+            logger.debug("Not transitioning to planning phase yet, staying in intake")
             # When we're clearly ready but something is preventing transition
             if message_indicates_completion and not transition_to_planning:
-                print("IMPORTANT: Claude indicates completion in message but transition conditions prevent it!")
-                print("DEBUG INTAKE: Consider using /complete_intake command if you're stuck in intake")
+                logger.warning("Claude indicates completion in message but transition conditions prevent it")
+                logger.debug("Consider using /complete_intake command if you're stuck in intake")
             
             # Still in intake phase
             if isinstance(response, dict) and isinstance(response.get("metadata"), dict):
@@ -229,11 +201,19 @@ async def handle_intake_phase(
                     "metadata": {"phase": "intake"}
                 }
     except Exception as e:
-        print(f"Error handling phase transition: {str(e)}")
+        logger.error("Error handling phase transition: %s", e)
         # Provide a fallback response
         response = {
             "message": "I'm processing your request. Could you tell me more about your report requirements?",
             "metadata": {"phase": "intake"}
         }
     
+    # Store the intake fields collected this turn in one commit
+    if pending_fields:
+        try:
+            await asyncio.to_thread(store_intake_fields, db, session, pending_fields)
+        except Exception as e:
+            logger.error("Error storing intake fields: %s", e)
+            # Continue execution even if storage fails
+    
     return response, state
@@ -4,17 +4,27 @@ Planning phase handler for the Orchestrator service.
 This module handles the planning phase of the Planner → Executor → Reflector workflow
 where we identify and plan content for specific sections of the report.
 """
-import json
+import logging
 import re
 from typing import Dict, Tuple, Any, List
 
 from sqlalchemy.orm import Session
 
 from app.db.models.session import Session as SessionModel
-from app.services.memory_service import MemoryService
-from app.services.llm_service import LLMService
+from app.services.llm_service import generate_planner_response, get_llm_service
+from app.services.llm.utils import json_dumps_compact
+from app.services.section_service import get_next_pending_section
 from app.services.orchestrator.models import Phase, OrchestratorState
-from app.services.orchestrator.utils import extract_section_from_guide
+
+logger = logging.getLogger(__name__)
+
+# One pass over the message matches every non-blank line: bullet lines
+# (-, *, •, "1." or "1)") capture their text in "bullet", any other line in "text"
+_LINE_RE = re.compile(
+    r"^[ \t]*(?:[-•*]|\d+[.)])[ \t]+(?P<bullet>\S.*?)[ \t\r]*$"
+    r"|^[ \t]*(?P<text>\S.*?)[ \t\r]*$",
+    re.MULTILINE
+)
 
 
 async def handle_planning_phase(
@@ -45,45 +55,36 @@ async def handle_planning_phase(
     Returns:
         Tuple of (response, updated state)
     """
-    print(f"Handling message in PLANNING phase: {message[:50]}...")
+    logger.debug("Handling message in PLANNING phase: %s...", message[:50])
     
     # Initialize services
-    llm_service = LLMService()
-    
-    # Initialize memory service if needed
-    if not hasattr(state, 'memory_service'):
-        state.memory_service = MemoryService()
+    llm_service = get_llm_service()
     
     # Get session information
     guide_json = session.guide_json
     intake_json = session.intake_json
     
-    # Store user message in memory
-    state.memory_service.add_message(
-        session_id=state.session_id, 
-        role="user", 
-        content=message,
-        categories=["planning"]
-    )
+    # Messages to store in memory; added together at the end of the turn
+    pending = [{"role": "user", "content": message, "categories": ("planning",)}]
     
     # Check if we have a current section
     if state.current_section_id:
         # We're working on a section, so process bullets
-        section_info = extract_section_from_guide(guide_json, state.current_section_id)
+        section_info = state.get_section_info(guide_json, state.current_section_id)
         
         # Extract bullet points from the message
         bullet_points = extract_bullet_points(message)
         
-        # Store bullet points in memory
-        state.memory_service.add_message(
-            session_id=state.session_id,
-            role="system",
-            content=json.dumps({
+        # Store bullet points in memory, keyed for the execution phase
+        state.memory_service.put_bullets(state.session_id, state.current_section_id, bullet_points)
+        pending.append({
+            "role": "system",
+            "content": json_dumps_compact({
                 "section_id": state.current_section_id,
                 "bullet_points": bullet_points,
             }),
-            categories=["bullet_points", state.current_section_id]
-        )
+            "categories": ("bullet_points", state.current_section_id)
+        })
         
         # Transition to execution phase
         state.phase = Phase.EXECUTION
@@ -98,19 +99,19 @@ async def handle_planning_phase(
             }
         }
     else:
-        # We need to identify the next section to work on
-        # In a real implementation, we'd query the database to find the next unfinished section
-        # For now, we'll use a simple algorithm to identify the first section
+        # We need to identify the next section to work on: the first one
+        # that has not been drafted yet
         
         # Find the next section
-        next_section_id = find_next_section(guide_json)
-        state.current_section_id = next_section_id
+        next_section_id = find_next_section(db, state.session_id)
+        state.set_current_section(next_section_id)
         
         # Get section details
-        section_info = extract_section_from_guide(guide_json, next_section_id)
+        section_info = state.get_section_info(guide_json, next_section_id)
         
         # Generate response from LLM for the planning phase
-        response = await llm_service.generate_planner_response(
+        response = await generate_planner_response(
+            llm_service=llm_service,
             session_id=state.session_id,
             guide_json=guide_json,
             intake_json=intake_json,
@@ -120,16 +121,17 @@ async def handle_planning_phase(
         )
         
         # Store assistant message in memory
-        state.memory_service.add_message(
-            session_id=state.session_id, 
-            role="assistant", 
-            content=response.get("message", ""),
-            categories=["planning", next_section_id]
-        )
+        pending.append({
+            "role": "assistant",
+            "content": response.get("message", ""),
+            "categories": ("planning", next_section_id)
+        })
         
         # Add section_id to metadata
         response["metadata"]["section_id"] = next_section_id
     
+    state.memory_service.add_messages(state.session_id, pending)
+    
     return response, state
 
 
@@ -145,60 +147,36 @@ def extract_bullet_points(message: str) -> List[str]:
     Returns:
         List of extracted bullet points
     """
-    # Split message into lines
-    lines = message.strip().split('\n')
-    
-    # Patterns for bullet points
-    bullet_patterns = [
-        r'^\s*[-•*]\s+(.+)$',  # Matches: - bullet, • bullet, * bullet
-        r'^\s*(\d+[.)])\s+(.+)$',  # Matches: 1. bullet, 1) bullet
-    ]
-    
     bullets = []
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        is_bullet = False
-        for pattern in bullet_patterns:
-            match = re.match(pattern, line)
-            if match:
-                is_bullet = True
-                # If it's a numbered bullet, get the second group
-                if len(match.groups()) > 1:
-                    bullets.append(match.group(2))
-                else:
-                    bullets.append(match.group(1))
-                break
-                
+    for match in _LINE_RE.finditer(message):
+        bullet = match.group("bullet")
+        if bullet is not None:
+            bullets.append(bullet)
         # If the line doesn't match a bullet pattern but we have bullets already,
         # assume it's a continuation of the previous bullet
-        if not is_bullet and bullets and not re.match(r'^\s*$', line):
-            if len(line) > 3:  # Avoid adding very short lines
-                bullets.append(line)
+        elif bullets and len(match.group("text")) > 3:  # Avoid adding very short lines
+            bullets.append(match.group("text"))
     
     return bullets
 
 
-def find_next_section(guide_json: Dict[str, Any]) -> str:
+def find_next_section(db: Session, session_id: str) -> str:
     """
     Find the next section ID to work on.
     
-    This is a simple implementation that returns the first section.
-    In a real implementation, we'd query the database to find incomplete sections.
+    This is the first section still pending in the database, in chapter and
+    section order.
     
     Args:
-        guide_json: Guide JSON structure
+        db: Database session
+        session_id: Session ID
         
     Returns:
         Section ID in format "chapter.section"
     """
-    # For now, just return the first section of the first chapter
-    if guide_json.get("chapters") and len(guide_json["chapters"]) > 0:
-        chapter = guide_json["chapters"][0]
-        if chapter.get("sections") and len(chapter["sections"]) > 0:
-            return "0.0"
+    section = get_next_pending_section(db, session_id)
+    if section is not None:
+        return f"{section.chapter_idx}.{section.section_idx}"
     
-    # Default if no sections found
+    # Default to the first section of the first chapter if no pending section is found
     return "0.0"
@@ -4,17 +4,20 @@ Reflection phase handler for the Orchestrator service.
 This module handles the reflection phase of the Planner → Executor → Reflector workflow
 where we ask Socratic questions about the draft content to deepen understanding.
 """
+import asyncio
 import json
+import logging
 from typing import Dict, Tuple, Any
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.db.models.session import Session as SessionModel
 from app.db.models.section import Section as SectionModel
-from app.services.memory_service import MemoryService
-from app.services.llm_service import LLMService
 from app.services.orchestrator.models import Phase, OrchestratorState
 
+logger = logging.getLogger(__name__)
+
 
 async def handle_reflection_phase(
     db: Session,
@@ -43,35 +46,36 @@ async def handle_reflection_phase(
     Returns:
         Tuple of (response, updated state)
     """
-    print(f"Handling message in REFLECTION phase: {message[:50]}...")
-    
-    # Initialize services
-    llm_service = LLMService()
-    
-    # Initialize memory service if needed
-    if not hasattr(state, 'memory_service'):
-        state.memory_service = MemoryService()
-    
-    # Store user's reflection in memory
-    state.memory_service.add_message(
-        session_id=state.session_id, 
-        role="user", 
-        content=message,
-        categories=["reflection", state.current_section_id]
-    )
+    logger.debug("Handling message in REFLECTION phase: %s...", message[:50])
     
-    # Get draft content for this section
-    draft_content = get_draft_from_memory(state)
-    
-    # Mark section as complete in database
-    section_completed = mark_section_complete(db, state.session_id, state.current_section_id)
+    # The section being reflected on; the state moves on to the next section
+    section_id = state.current_section_id
+    chapter_idx, section_idx = state.current_chapter_idx, state.current_section_idx
     
     # Generate Socratic questions about the draft
     # In a full implementation, we would call Claude here, but for now we'll use a placeholder
     response_text = "Thank you for your reflections. Let's move on to the next section."
     
+    # Queue the user's reflection and the assistant message for memory first;
+    # they are flushed in the background while the section is marked complete.
+    # Both carry the same categories, so they go to mem0 in a single add call
+    categories = ("reflection", section_id)
+    state.memory_service.add_messages(state.session_id, [
+        {"role": "user", "content": message, "categories": categories},
+        {"role": "assistant", "content": response_text, "categories": categories}
+    ])
+    
+    # Mark section as complete in database
+    if chapter_idx is None:
+        logger.warning("Not marking malformed section ID %r complete", section_id)
+        section_completed = False
+    else:
+        section_completed = await asyncio.to_thread(
+            mark_section_complete, db, state.session_id, chapter_idx, section_idx
+        )
+    
     # Reset section ID to start planning the next section
-    state.current_section_id = None
+    state.set_current_section(None)
     
     # Transition back to planning phase for next section
     state.phase = Phase.PLANNING
@@ -86,80 +90,42 @@ async def handle_reflection_phase(
         }
     }
     
-    # Store assistant message in memory
-    state.memory_service.add_message(
-        session_id=state.session_id, 
-        role="assistant", 
-        content=response_text,
-        categories=["reflection"]
-    )
-    
     return response, state
 
 
-def get_draft_from_memory(state: OrchestratorState) -> str:
-    """
-    Get the draft content for the current section from memory.
-    
-    Args:
-        state: Current orchestrator state
-        
-    Returns:
-        Draft content as a string
-    """
-    try:
-        # Search for draft content in memory
-        results = state.memory_service.client.search(
-            user_id=state.session_id,
-            categories=["execution", state.current_section_id, "draft"],
-            limit=1  # Get the most recent draft
-        )
-        
-        # Extract draft content
-        if results and isinstance(results, list) and len(results) > 0:
-            for result in results:
-                if isinstance(result, dict) and "content" in result:
-                    return result.get("content", "")
-    except Exception as e:
-        print(f"Error retrieving draft: {e}")
-    
-    # Return empty string if not found
-    return ""
-
-
-def mark_section_complete(db: Session, session_id: str, section_id: str) -> bool:
+def mark_section_complete(db: Session, session_id: str, chapter_idx: int, section_idx: int) -> bool:
     """
     Mark a section as complete in the database.
     
     Args:
         db: Database session
         session_id: Session ID
-        section_id: Section ID (format: "chapter.section")
+        chapter_idx: Chapter index
+        section_idx: Section index
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        # Parse section ID
-        chapter_idx, section_idx = map(int, section_id.split('.'))
-        
-        # Find section in database
-        section = db.query(SectionModel).filter(
-            SectionModel.session_id == session_id,
-            SectionModel.chapter_idx == chapter_idx,
-            SectionModel.section_idx == section_idx
-        ).first()
+        # Update status in one statement; rowcount tells whether it existed
+        result = db.execute(
+            update(SectionModel)
+            .where(
+                SectionModel.session_id == session_id,
+                SectionModel.chapter_idx == chapter_idx,
+                SectionModel.section_idx == section_idx
+            )
+            .values(status="complete")
+        )
+        db.commit()
         
-        if section:
-            # Update status
-            section.status = "complete"
-            db.commit()
-            print(f"Section {section_id} marked complete")
+        if result.rowcount > 0:
+            logger.info("Section %d.%d marked complete", chapter_idx, section_idx)
             return True
         else:
-            print(f"Section {section_id} not found in database")
+            logger.warning("Section %d.%d not found in database", chapter_idx, section_idx)
             return False
     except Exception as e:
-        print(f"Error marking section complete: {e}")
+        logger.error("Error marking section complete: %s", e)
         db.rollback()
         return False
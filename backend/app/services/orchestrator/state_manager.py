@@ -5,14 +5,211 @@ This module provides an interface for persisting orchestrator state.
 It delegates the actual database operations to the state_db module to avoid
 circular imports while maintaining a clean API for other orchestrator components.
 """
-from typing import Optional
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Protocol
 from contextlib import contextmanager
 
+from sqlalchemy.orm import Session
+
 from app.db.session import SessionLocal
-from app.services.state_db import save_state_to_db, load_state_from_db
+from app.services.state_db import save_state_to_db, save_state_patch, load_state_from_db
 # Import OrchestratorState using relative import to avoid circular imports
 from app.services.orchestrator.models import OrchestratorState
 
+logger = logging.getLogger(__name__)
+
+# Per-process write-through cache of recently used states, keyed by session
+# ID. Entries hold the stored dictionary rather than the OrchestratorState so
+# that in-place changes made by a turn that fails before saving never leak
+# into the cache.
+_STATE_CACHE: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+_STATE_CACHE_MAX = 1024
+_STATE_CACHE_TTL = 300  # seconds
+_state_cache_lock = threading.Lock()
+
+
+def _cache_peek(session_id: str) -> Optional[Dict[str, Any]]:
+    """Return the cached state dictionary (not to be modified), or None on a miss."""
+    with _state_cache_lock:
+        entry = _STATE_CACHE.get(session_id)
+        if entry is None:
+            return None
+        stored_at, state_dict = entry
+        if time.monotonic() - stored_at > _STATE_CACHE_TTL:
+            del _STATE_CACHE[session_id]
+            return None
+        _STATE_CACHE.move_to_end(session_id)
+    return state_dict
+
+
+def _cache_get(session_id: str) -> Optional[OrchestratorState]:
+    """Return a fresh copy of the cached state, or None on a miss."""
+    state_dict = _cache_peek(session_id)
+    return OrchestratorState.from_dict(state_dict) if state_dict is not None else None
+
+
+def _cache_put(session_id: str, state_dict: Dict[str, Any]) -> None:
+    """Store a state dictionary, evicting the least recently used entries."""
+    with _state_cache_lock:
+        _STATE_CACHE[session_id] = (time.monotonic(), dict(state_dict))
+        _STATE_CACHE.move_to_end(session_id)
+        while len(_STATE_CACHE) > _STATE_CACHE_MAX:
+            _STATE_CACHE.popitem(last=False)
+
+
+def invalidate_cached_state(session_id: str) -> None:
+    """
+    Drop a session's cached state.
+    
+    Call this after changing state_json outside this module.
+    
+    Args:
+        session_id: Session ID
+    """
+    with _state_cache_lock:
+        _STATE_CACHE.pop(session_id, None)
+
+
+class StateStore(Protocol):
+    """
+    Storage interface for orchestrator state used by process_chat_message.
+    """
+    
+    def load(self, session_id: str) -> Optional[OrchestratorState]:
+        ...
+    
+    def save(self, state: OrchestratorState) -> None:
+        ...
+    
+    async def flush(self, session_id: str) -> None:
+        ...
+
+
+def _save_state_dict(db: Session, session_id: str, state_dict: Dict[str, Any]) -> None:
+    """Write a state dictionary and keep the cache in step with the database."""
+    # When the stored state is known, write only the keys that changed
+    # (nothing at all for turns that stay in the same phase and section)
+    stored = _cache_peek(session_id)
+    if stored is not None:
+        changes = {key: value for key, value in state_dict.items() if stored.get(key) != value}
+        if not changes:
+            return
+        if save_state_patch(db, session_id, changes):
+            _cache_put(session_id, state_dict)
+            return
+    if save_state_to_db(db, session_id, state_dict):
+        _cache_put(session_id, state_dict)
+    else:
+        invalidate_cached_state(session_id)
+
+
+class DBStateStore:
+    """
+    State store backed by the session row's state_json column.
+    
+    Uses the caller's database session, so loading and saving happen in the
+    same session as the rest of the request.
+    
+    Args:
+        db: Database session
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def load(self, session_id: str) -> Optional[OrchestratorState]:
+        state = _cache_get(session_id)
+        if state is not None:
+            return state
+        state_dict = load_state_from_db(self.db, session_id)
+        if not state_dict:
+            return None
+        _cache_put(session_id, state_dict)
+        return OrchestratorState.from_dict(state_dict)
+    
+    def save(self, state: OrchestratorState) -> None:
+        _save_state_dict(self.db, state.session_id, state.to_dict())
+    
+    async def flush(self, session_id: str) -> None:
+        # Saves are written before save() returns
+        return None
+
+
+# Saves scheduled by BackgroundStateStore, by session ID: the latest state
+# not yet written and the task writing it. Only touched from the event loop.
+_pending_states: Dict[str, Dict[str, Any]] = {}
+_save_tasks: Dict[str, "asyncio.Task[None]"] = {}
+
+
+def _write_state(session_id: str, state_dict: Dict[str, Any]) -> None:
+    """Write a state in a worker thread, with a database session of its own."""
+    with get_db() as db:
+        _save_state_dict(db, session_id, state_dict)
+
+
+async def _save_in_background(
+    session_id: str,
+    state_dict: Dict[str, Any],
+    previous: Optional["asyncio.Task[None]"]
+) -> None:
+    """Write a state once the session's previous save has finished."""
+    if previous is not None:
+        await asyncio.gather(previous, return_exceptions=True)
+    try:
+        await asyncio.to_thread(_write_state, session_id, state_dict)
+    except Exception as e:
+        invalidate_cached_state(session_id)
+        logger.error("Error saving orchestrator state in background: %s", e)
+    finally:
+        if _pending_states.get(session_id) is state_dict:
+            del _pending_states[session_id]
+        if _save_tasks.get(session_id) is asyncio.current_task():
+            del _save_tasks[session_id]
+
+
+class BackgroundStateStore(DBStateStore):
+    """
+    State store that commits saves in a worker thread.
+    
+    save() returns straight away, so the response is not held up by the
+    commit; each write uses its own database session, and writes for a
+    session are applied in the order they were made. Until a write has
+    finished, load() returns the state it is writing. Call flush() where the
+    state must be in the database before going on.
+    
+    Args:
+        db: Database session, used for loads only
+    """
+    
+    def load(self, session_id: str) -> Optional[OrchestratorState]:
+        state_dict = _pending_states.get(session_id)
+        if state_dict is not None:
+            return OrchestratorState.from_dict(state_dict)
+        return super().load(session_id)
+    
+    def save(self, state: OrchestratorState) -> None:
+        session_id = state.session_id
+        state_dict = state.to_dict()
+        _pending_states[session_id] = state_dict
+        _save_tasks[session_id] = asyncio.create_task(
+            _save_in_background(session_id, state_dict, _save_tasks.get(session_id))
+        )
+    
+    async def flush(self, session_id: str) -> None:
+        task = _save_tasks.get(session_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+
+async def flush_pending_state_saves() -> None:
+    """Wait for every background state save that is still running."""
+    if _save_tasks:
+        await asyncio.gather(*_save_tasks.values(), return_exceptions=True)
+
 
 def save_orchestrator_state(state: OrchestratorState) -> None:
     """
@@ -33,12 +230,14 @@ def save_orchestrator_state(state: OrchestratorState) -> None:
             
             # Debug log
             if success:
-                print(f"State saved to database: phase={state.phase}, section={state.current_section_id}")
+                _cache_put(state.session_id, state_dict)
+                logger.debug("State saved to database: phase=%s, section=%s", state.phase, state.current_section_id)
             else:
-                print(f"Failed to save state to database for session {state.session_id}")
+                invalidate_cached_state(state.session_id)
+                logger.warning("Failed to save state to database for session %s", state.session_id)
     except Exception as e:
         # Log error but continue execution
-        print(f"Error saving orchestrator state: {e}")
+        logger.error("Error saving orchestrator state: %s", e)
 
 
 def load_orchestrator_state(session_id: str) -> Optional[OrchestratorState]:
@@ -54,6 +253,15 @@ def load_orchestrator_state(session_id: str) -> Optional[OrchestratorState]:
     Returns:
         OrchestratorState if found, None otherwise
     """
+    # A state still being written in the background is the latest one
+    state_dict = _pending_states.get(session_id)
+    if state_dict is not None:
+        return OrchestratorState.from_dict(state_dict)
+    
+    state = _cache_get(session_id)
+    if state is not None:
+        return state
+    
     try:
         # Open a database session
         with get_db() as db:
@@ -62,21 +270,19 @@ def load_orchestrator_state(session_id: str) -> Optional[OrchestratorState]:
             
             # If state was found, convert to OrchestratorState object and return
             if state_dict:
+                _cache_put(session_id, state_dict)
                 state = OrchestratorState.from_dict(state_dict)
-                print(f"State loaded from database: phase={state.phase}, section={state.current_section_id}")
+                logger.debug("State loaded from database: phase=%s, section=%s", state.phase, state.current_section_id)
                 return state
     except Exception as e:
-        print(f"Error loading orchestrator state from database: {e}")
+        logger.error("Error loading orchestrator state from database: %s", e)
     
-    print(f"No state found for session {session_id}, creating new state")
+    logger.debug("No state found for session %s, creating new state", session_id)
     return None
 
 
 @contextmanager
 def get_db():
-    """Database session context manager."""
-    db = SessionLocal()
-    try:
+    """Short-lived database session for a single state load or save."""
+    with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
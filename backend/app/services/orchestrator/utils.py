@@ -4,7 +4,85 @@ Utility functions for the Orchestrator service.
 This module contains helper functions used across different parts of the
 orchestrator service that don't belong to any specific phase.
 """
-from typing import Dict, Any
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Section indexes by session ID, see get_section_index
+_SECTION_INDEX_MAX = 256  # sessions kept in the cache
+_section_indexes: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+_section_indexes_lock = threading.Lock()
+
+# Section IDs have the format "chapter.section", e.g. "0.2"
+_SECTION_ID_RE = re.compile(r'^(\d+)\.(\d+)$')
+
+# Explicit field tags in the assistant's questions, e.g. [TITLE]
+_TAG_RE = re.compile(r'\[([A-Z_]+)\]')
+
+# Tag (lowercased) to intake_json field
+_TAG_FIELDS = {
+    "title": "title",
+    "report_title": "title",
+    "department": "department",
+    "academic_level": "academic_level", 
+    "target_audience": "target_audience",
+    "topic": "topic",
+    "length": "length",
+    "deadline": "deadline",
+    "additional_requirements": "additional_requirements",
+    "format": "format",
+    "citations": "citations",
+    "notes": "notes"
+}
+
+# Keywords identifying the field a question asks about, checked in order
+_FIELD_KEYWORDS = {
+    "title": ["title", "name", "heading"],
+    "department": ["department", "faculty", "school", "discipline"],
+    "academic_level": ["academic level", "level", "grade", "year"],
+    "target_audience": ["audience", "readers", "who will read", "intended for"],
+    "topic": ["topic", "subject", "about", "focus"],
+    "length": ["length", "pages", "words", "how long"],
+    "deadline": ["deadline", "due date", "when is", "submit"],
+    "format": ["format", "style", "structure", "organized"],
+    "citations": ["citation", "reference", "sources", "bibliography"],
+    "additional_requirements": ["requirements", "additional", "special", "specific"],
+    "notes": ["notes", "anything else", "other", "additional information"]
+}
+
+# All keywords in a single pattern, so a question is scanned once. The
+# lookahead reports a match at every position (matches may overlap) and the
+# alternatives are in _FIELD_KEYWORDS order, so the lowest-ranked field found
+# is the same one the field-by-field search would return.
+_KEYWORD_FIELD = {}
+for _field, _keywords in _FIELD_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_FIELD.setdefault(_keyword, _field)
+_FIELD_RANK = {field: rank for rank, field in enumerate(_FIELD_KEYWORDS)}
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword in _KEYWORD_FIELD) + "))"
+)
+del _field, _keywords, _keyword
+
+
+def parse_section_id(section_id: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parse a section ID into its chapter and section indices.
+    
+    Args:
+        section_id: Section ID (format: "chapter.section")
+        
+    Returns:
+        Tuple of (chapter_idx, section_idx), or None if the ID is malformed
+    """
+    match = _SECTION_ID_RE.match(section_id) if isinstance(section_id, str) else None
+    if match is None:
+        return None
+    return int(match[1]), int(match[2])
 
 
 def extract_section_from_guide(guide_json: Dict[str, Any], section_id: str) -> Dict[str, Any]:
@@ -28,27 +106,10 @@ def extract_section_from_guide(guide_json: Dict[str, Any], section_id: str) -> D
         # Get section
         section = chapter.get("sections", [])[section_idx]
         
-        # Get chapter title
-        chapter_title = chapter.get("title", f"Chapter {chapter_idx + 1}")
-        
-        # Get section title
-        section_title = section.get("title", f"Section {section_idx + 1}")
-        
-        # Build section info
-        section_info = {
-            "section_id": section_id,
-            "chapter_title": chapter_title,
-            "chapter_idx": chapter_idx,
-            "section_title": section_title,
-            "section_idx": section_idx,
-            "requirements": section.get("requirements", []),
-            "description": section.get("description", "")
-        }
-        
-        return section_info
+        return _build_section_info(section_id, chapter_idx, chapter, section_idx, section)
     except (IndexError, ValueError, KeyError, TypeError) as e:
         # Return default section info
-        print(f"Error extracting section {section_id}: {str(e)}")
+        logger.warning("Error extracting section %s: %s", section_id, e)
         return {
             "section_id": section_id,
             "chapter_title": "Unknown Chapter",
@@ -60,6 +121,84 @@ def extract_section_from_guide(guide_json: Dict[str, Any], section_id: str) -> D
         }
 
 
+def build_section_index(guide_json: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the section details for every section of the guide in one pass.
+    
+    Args:
+        guide_json: The complete guide structure
+        
+    Returns:
+        Dictionary mapping section IDs ("chapter.section") to section details,
+        as returned by extract_section_from_guide
+    """
+    index = {}
+    try:
+        for chapter_idx, chapter in enumerate(guide_json.get("chapters", [])):
+            for section_idx, section in enumerate(chapter.get("sections", [])):
+                section_id = f"{chapter_idx}.{section_idx}"
+                index[section_id] = _build_section_info(section_id, chapter_idx, chapter, section_idx, section)
+    except (AttributeError, TypeError) as e:
+        logger.warning("Error indexing guide sections: %s", e)
+    return index
+
+
+def _build_section_info(
+    section_id: str,
+    chapter_idx: int,
+    chapter: Dict[str, Any],
+    section_idx: int,
+    section: Dict[str, Any]
+) -> Dict[str, Any]:
+    # Get chapter title
+    chapter_title = chapter.get("title", f"Chapter {chapter_idx + 1}")
+    
+    # Get section title
+    section_title = section.get("title", f"Section {section_idx + 1}")
+    
+    # Build section info
+    return {
+        "section_id": section_id,
+        "chapter_title": chapter_title,
+        "chapter_idx": chapter_idx,
+        "section_title": section_title,
+        "section_idx": section_idx,
+        "requirements": section.get("requirements", []),
+        "description": section.get("description", "")
+    }
+
+
+def get_section_index(session_id: str, guide_json: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the section index for a session's guide, building it on first use.
+    
+    A session's guide does not change after the session is created, so the
+    index is cached per session ID and shared by the states of later turns
+    (each turn loads a new guide object, so the object itself can't be the key).
+    Callers must not modify the returned section details.
+    
+    Args:
+        session_id: Session ID
+        guide_json: The session's guide structure
+        
+    Returns:
+        Dictionary mapping section IDs to section details, see build_section_index
+    """
+    with _section_indexes_lock:
+        index = _section_indexes.get(session_id)
+        if index is not None:
+            _section_indexes.move_to_end(session_id)
+            return index
+    
+    index = build_section_index(guide_json)
+    with _section_indexes_lock:
+        _section_indexes[session_id] = index
+        _section_indexes.move_to_end(session_id)
+        while len(_section_indexes) > _SECTION_INDEX_MAX:
+            _section_indexes.popitem(last=False)
+    return index
+
+
 def determine_intake_field(previous_question: str) -> str:
     """
     Determine which intake field to populate based on the previous question.
@@ -72,8 +211,6 @@ def determine_intake_field(previous_question: str) -> str:
     Returns:
         Field name to use in intake_json
     """
-    import re
-    
     # Default field if we can't determine
     default_field = "notes"
     
@@ -82,49 +219,20 @@ def determine_intake_field(previous_question: str) -> str:
         return default_field
         
     # First, look for explicit tags in square brackets like [TITLE]
-    tag_match = re.search(r'\[([A-Z_]+)\]', previous_question)
+    tag_match = _TAG_RE.search(previous_question)
     if tag_match:
-        tag = tag_match.group(1).lower()
         # Map the tag to intake_json field
-        tag_mapping = {
-            "title": "title",
-            "report_title": "title",
-            "department": "department",
-            "academic_level": "academic_level", 
-            "target_audience": "target_audience",
-            "topic": "topic",
-            "length": "length",
-            "deadline": "deadline",
-            "additional_requirements": "additional_requirements",
-            "format": "format",
-            "citations": "citations",
-            "notes": "notes"
-        }
-        return tag_mapping.get(tag, default_field)
+        return _TAG_FIELDS.get(tag_match.group(1).lower(), default_field)
     
     # If no explicit tag, use keyword matching
-    keywords = {
-        "title": ["title", "name", "heading"],
-        "department": ["department", "faculty", "school", "discipline"],
-        "academic_level": ["academic level", "level", "grade", "year"],
-        "target_audience": ["audience", "readers", "who will read", "intended for"],
-        "topic": ["topic", "subject", "about", "focus"],
-        "length": ["length", "pages", "words", "how long"],
-        "deadline": ["deadline", "due date", "when is", "submit"],
-        "format": ["format", "style", "structure", "organized"],
-        "citations": ["citation", "reference", "sources", "bibliography"],
-        "additional_requirements": ["requirements", "additional", "special", "specific"],
-        "notes": ["notes", "anything else", "other", "additional information"]
-    }
-    
     # Convert to lowercase for case-insensitive matching
     question_lower = previous_question.lower()
     
-    # Check each field's keywords
-    for field, field_keywords in keywords.items():
-        for keyword in field_keywords:
-            if keyword in question_lower:
-                return field
+    # Find every keyword occurrence and keep the first field (in
+    # _FIELD_KEYWORDS order) that matched
+    fields = {_KEYWORD_FIELD[match.group(1)] for match in _KEYWORD_RE.finditer(question_lower)}
+    if fields:
+        return min(fields, key=_FIELD_RANK.__getitem__)
                 
     # Default to notes if no match found
     return default_field
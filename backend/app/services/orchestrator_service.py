@@ -21,8 +21,10 @@ from app.services.orchestrator import (
     Phase,
     OrchestratorState,
     
-    # Main entry point
+    # Main entry points
     process_chat_message,
+    stream_chat_message,
+    get_reflection_results,
     
     # State management
     save_orchestrator_state,
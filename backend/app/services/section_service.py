@@ -1,11 +1,52 @@
 from datetime import datetime
 from typing import Optional, List
 
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.orm import Session
 
 from app.db.models.section import Section as SectionModel
 
 
+# Lookups run on every phase transition; build them once and pass only the
+# parameters per call
+_GET_SECTION_STMT = select(SectionModel).where(
+    SectionModel.session_id == bindparam("sid"),
+    SectionModel.chapter_idx == bindparam("ci"),
+    SectionModel.section_idx == bindparam("si")
+)
+
+_GET_SECTIONS_STMT = select(SectionModel).where(
+    SectionModel.session_id == bindparam("sid")
+).order_by(
+    SectionModel.chapter_idx,
+    SectionModel.section_idx
+)
+
+_GET_CHAPTER_SECTIONS_STMT = select(SectionModel).where(
+    SectionModel.session_id == bindparam("sid"),
+    SectionModel.chapter_idx == bindparam("ci")
+).order_by(
+    SectionModel.section_idx
+)
+
+_GET_NEXT_PENDING_STMT = select(SectionModel).where(
+    SectionModel.session_id == bindparam("sid"),
+    SectionModel.status == "pending"
+).order_by(
+    SectionModel.chapter_idx,
+    SectionModel.section_idx
+).limit(1)
+
+
+def _section_update(session_id: str, chapter_idx: int, section_idx: int):
+    """UPDATE statement targeting a single section by its primary key."""
+    return update(SectionModel).where(
+        SectionModel.session_id == session_id,
+        SectionModel.chapter_idx == chapter_idx,
+        SectionModel.section_idx == section_idx
+    )
+
+
 def get_section(
     db: Session,
     session_id: str,
@@ -24,11 +65,10 @@ def get_section(
     Returns:
         Section model or None if not found
     """
-    return db.query(SectionModel).filter(
-        SectionModel.session_id == session_id,
-        SectionModel.chapter_idx == chapter_idx,
-        SectionModel.section_idx == section_idx
-    ).first()
+    return db.execute(
+        _GET_SECTION_STMT,
+        {"sid": session_id, "ci": chapter_idx, "si": section_idx}
+    ).scalar_one_or_none()
 
 
 def get_sections_by_session_id(
@@ -45,12 +85,7 @@ def get_sections_by_session_id(
     Returns:
         List of section models
     """
-    return db.query(SectionModel).filter(
-        SectionModel.session_id == session_id
-    ).order_by(
-        SectionModel.chapter_idx,
-        SectionModel.section_idx
-    ).all()
+    return list(db.execute(_GET_SECTIONS_STMT, {"sid": session_id}).scalars())
 
 
 def get_sections_by_chapter(
@@ -69,12 +104,10 @@ def get_sections_by_chapter(
     Returns:
         List of section models
     """
-    return db.query(SectionModel).filter(
-        SectionModel.session_id == session_id,
-        SectionModel.chapter_idx == chapter_idx
-    ).order_by(
-        SectionModel.section_idx
-    ).all()
+    return list(db.execute(
+        _GET_CHAPTER_SECTIONS_STMT,
+        {"sid": session_id, "ci": chapter_idx}
+    ).scalars())
 
 
 def update_section_draft(
@@ -97,15 +130,12 @@ def update_section_draft(
     Returns:
         True if successful, False otherwise
     """
-    section = get_section(db, session_id, chapter_idx, section_idx)
-    if not section:
-        return False
-    
-    section.draft_html = draft_html
+    result = db.execute(
+        _section_update(session_id, chapter_idx, section_idx).values(draft_html=draft_html)
+    )
     db.commit()
-    db.refresh(section)
     
-    return True
+    return result.rowcount > 0
 
 
 def save_section(
@@ -126,16 +156,15 @@ def save_section(
     Returns:
         True if successful, False otherwise
     """
-    section = get_section(db, session_id, chapter_idx, section_idx)
-    if not section:
-        return False
-    
-    section.status = "saved"
-    section.saved_at = datetime.now()
+    result = db.execute(
+        _section_update(session_id, chapter_idx, section_idx).values(
+            status="saved",
+            saved_at=datetime.now()
+        )
+    )
     db.commit()
-    db.refresh(section)
     
-    return True
+    return result.rowcount > 0
 
 
 def get_next_pending_section(
@@ -154,10 +183,4 @@ def get_next_pending_section(
     Returns:
         Next pending section or None if all sections are saved
     """
-    return db.query(SectionModel).filter(
-        SectionModel.session_id == session_id,
-        SectionModel.status == "pending"
-    ).order_by(
-        SectionModel.chapter_idx,
-        SectionModel.section_idx
-    ).first()
+    return db.execute(_GET_NEXT_PENDING_STMT, {"sid": session_id}).scalar_one_or_none()
@@ -1,13 +1,23 @@
 import json
 from typing import Dict, Any, Optional, List
 
+from sqlalchemy import bindparam, case, func, insert, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.models.session import Session as SessionModel
 from app.db.models.section import Section as SectionModel
 from app.schemas.session import SessionCreate, SessionState
+
 # Note: We no longer import from orchestrator to break circular dependency
 
+# Section statuses for get_session_state, without loading whole rows
+_SECTIONS_STATUS_STMT = select(
+    SectionModel.chapter_idx,
+    SectionModel.section_idx,
+    SectionModel.status
+).where(SectionModel.session_id == bindparam("sid"))
+
 
 def create_session(db: Session, session_data: SessionCreate) -> SessionModel:
     """
@@ -29,14 +39,20 @@ def create_session(db: Session, session_data: SessionCreate) -> SessionModel:
         intake_json={}
     )
     db.add(session)
-    db.flush()  # Flush to get session_id
+    # session_id is generated client-side by the column default, so the flush
+    # doesn't fetch anything back; it only orders the session INSERT ahead of
+    # the section INSERT below, which the foreign key requires
+    db.flush()
     
     # Create section records
     _initialize_sections(db, session)
     
-    # Commit changes
+    # Commit changes. The commit expires the instance; callers usually only
+    # need the generated session_id, which is already known, so it is set
+    # back instead of reloading the row (other attributes load on access)
+    session_id = session.session_id
     db.commit()
-    db.refresh(session)
+    set_committed_value(session, "session_id", session_id)
     
     return session
 
@@ -52,7 +68,9 @@ def get_session_by_id(db: Session, session_id: str) -> Optional[SessionModel]:
     Returns:
         Session model or None if not found
     """
-    return db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
+    # Primary-key lookup: served from the identity map without a query when
+    # the session was already loaded in this request (e.g. by the endpoint)
+    return db.get(SessionModel, session_id)
 
 
 def get_session_state(db: Session, session: SessionModel) -> SessionState:
@@ -69,15 +87,13 @@ def get_session_state(db: Session, session: SessionModel) -> SessionState:
     Returns:
         SessionState with session data
     """
-    # Get section statuses
-    sections = db.query(SectionModel).filter(
-        SectionModel.session_id == session.session_id
-    ).all()
+    # Get section statuses (only the key and status columns, not the drafts)
+    rows = db.execute(_SECTIONS_STATUS_STMT, {"sid": session.session_id}).all()
     
     # Create map of "chapter_idx.section_idx" to status
     sections_status = {
-        f"{section.chapter_idx}.{section.section_idx}": section.status
-        for section in sections
+        f"{chapter_idx}.{section_idx}": status
+        for chapter_idx, section_idx, status in rows
     }
     
     # Return session state
@@ -113,10 +129,53 @@ def store_intake_field(
     Returns:
         True if all required intake fields are now complete, False otherwise
     """
-    # Update intake_json
-    intake_json = dict(session.intake_json)
-    intake_json[field] = value
-    session.intake_json = intake_json
+    return store_intake_fields(db, session, {field: value})
+
+
+def store_intake_fields(
+    db: Session,
+    session: SessionModel,
+    fields: Dict[str, Any]
+) -> bool:
+    """
+    Store several fields from the intake conversation in one commit.
+    
+    Args:
+        db: Database session
+        session: Session model
+        fields: Field names in intake_json mapped to their values
+        
+    Returns:
+        True if all required intake fields are now complete, False otherwise
+    """
+    # Update intake_json. It is mutation-tracked, so the fields are added in
+    # place rather than copying the dict and reassigning it
+    intake_json = session.intake_json
+    intake_json.update(fields)
+    
+    # On SQLite only the changed keys are written, with json_set in a single
+    # UPDATE; the loaded session is then brought up to date without another
+    # round trip
+    if fields and db.get_bind().dialect.name == "sqlite" and not any('"' in field for field in fields):
+        # Start from an empty object if nothing has been stored yet
+        patched = case(
+            (func.json_type(SessionModel.intake_json) == "object", SessionModel.intake_json),
+            else_=func.json("{}")
+        )
+        for field, value in fields.items():
+            patched = func.json_set(patched, f'$."{field}"', func.json(json.dumps(value, default=str)))
+        intake_done = session.intake_done
+        db.execute(
+            update(SessionModel)
+            .where(SessionModel.session_id == session.session_id)
+            .values(intake_json=patched)
+        )
+        # Discard the pending in-place change so the commit doesn't write the
+        # whole object as well, then put the same (still tracked) dict back
+        db.expire(session, ["intake_json"])
+        db.commit()
+        set_committed_value(session, "intake_json", intake_json)
+        return intake_done
     
     # We no longer check for predefined required fields
     # The intake completion is controlled by Claude's decisions
@@ -126,11 +185,12 @@ def store_intake_field(
     
     # For now we don't modify the intake_done flag here
     
-    # Commit changes
+    # Commit changes; the flag is read first since the commit expires the
+    # session and it would otherwise be reloaded
+    intake_done = session.intake_done
     db.commit()
-    db.refresh(session)
     
-    return session.intake_done
+    return intake_done
 
 
 def _initialize_sections(db: Session, session: SessionModel) -> None:
@@ -138,31 +198,31 @@ def _initialize_sections(db: Session, session: SessionModel) -> None:
     Initialize section records for a session.
     
     This function creates a section record for each section in the guide.
+    Errors propagate so that create_session never commits a session whose
+    sections were only partly created.
     
     Args:
         db: Database session
         session: Session model
     """
-    try:
-        # Get chapters from guide
-        guide_json = session.guide_json
-        chapters = guide_json.get("chapters", [])
-        
-        # Create section records for each section in the guide
-        for chapter_idx, chapter in enumerate(chapters):
-            sections = chapter.get("sections", [])
-            for section_idx, section in enumerate(sections):
-                db_section = SectionModel(
-                    session_id=session.session_id,
-                    chapter_idx=chapter_idx,
-                    section_idx=section_idx,
-                    title=section.get("title", ""),
-                    content="",  # Initially empty
-                    status="pending"  # Start as pending
-                )
-                db.add(db_section)
-    except Exception as e:
-        print(f"Error initializing sections: {str(e)}")
+    # Get chapters from guide
+    guide_json = session.guide_json
+    chapters = guide_json.get("chapters", [])
+    
+    # Insert a record for each section in the guide with one multi-row
+    # INSERT instead of adding the sections to the session one by one
+    rows = [
+        {
+            "session_id": session.session_id,
+            "chapter_idx": chapter_idx,
+            "section_idx": section_idx,
+            "status": "pending"  # Start as pending
+        }
+        for chapter_idx, chapter in enumerate(chapters)
+        for section_idx, _ in enumerate(chapter.get("sections", []))
+    ]
+    if rows:
+        db.execute(insert(SectionModel), rows)
 
 
 # Orchestrator state functions have been moved to state_db.py to avoid circular imports
\ No newline at end of file
@@ -5,12 +5,16 @@ This module handles the database operations for saving and loading
 orchestrator state, keeping these operations separate from the session service
 to avoid circular imports.
 """
-import json
+import logging
 from typing import Optional, Dict, Any
 
+from sqlalchemy import func, inspect, select, update
 from sqlalchemy.orm import Session
 
 from app.db.models.session import Session as SessionModel
+from app.db.session import json_serializer
+
+logger = logging.getLogger(__name__)
 
 
 def save_state_to_db(db: Session, session_id: str, state_dict: Dict[str, Any]) -> bool:
@@ -25,49 +29,72 @@ def save_state_to_db(db: Session, session_id: str, state_dict: Dict[str, Any]) -
     Returns:
         True if state was successfully saved, False otherwise
     """
-    print(f"DEBUG: Beginning state save for session {session_id}")
-    print(f"DEBUG: State to save: {state_dict}")
-    
     try:
-        # Get session
-        print(f"DEBUG: Querying database for session {session_id}")
-        session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-        print(f"DEBUG: Query completed, session found: {session is not None}")
-        
-        if not session:
-            print(f"Session with ID {session_id} not found when saving state")
-            return False
-        
-        # Save state to database
-        print(f"DEBUG: Saving state to session.state_json")
-        session.state_json = state_dict
-        
-        print(f"DEBUG: Committing transaction to database")
+        # Write only the state column, in a single UPDATE
+        result = db.execute(
+            update(SessionModel)
+            .where(SessionModel.session_id == session_id)
+            .values(state_json=state_dict)
+        )
         db.commit()
-        print(f"DEBUG: Transaction committed successfully")
         
-        # Verify the saved state
-        db.refresh(session)
-        print(f"DEBUG: Verified saved state: {session.state_json}")
+        if result.rowcount == 0:
+            logger.warning("Session with ID %s not found when saving state", session_id)
+            return False
         
-        # Debug log
-        phase = state_dict.get('phase', 'unknown')
-        print(f"State saved to database for session {session_id}, phase: {phase}")
+        logger.debug("State saved to database for session %s, phase: %s", session_id, state_dict.get('phase', 'unknown'))
         return True
     except Exception as e:
         # Log error but continue execution
-        import traceback
-        print(f"Error saving orchestrator state to database: {e}")
-        print(f"ERROR TRACEBACK: {traceback.format_exc()}")
+        logger.exception("Error saving orchestrator state to database: %s", e)
         
         # Attempt to roll back the transaction
         try:
-            print(f"DEBUG: Rolling back transaction")
             db.rollback()
-            print(f"DEBUG: Rollback completed")
         except Exception as rollback_error:
-            print(f"DEBUG: Error during rollback: {rollback_error}")
-            
+            logger.error("Error during rollback: %s", rollback_error)
+        
+
+        return False
+
+
+def save_state_patch(db: Session, session_id: str, changes: Dict[str, Any]) -> bool:
+    """
+    Update individual top-level keys of the stored state.
+    
+    On SQLite this is a single UPDATE applying json_set per changed key, so
+    only the changed values are sent. Returns False without writing if the
+    patch can't be applied in place (other databases, or no state stored
+    yet); the caller then saves the whole state with save_state_to_db.
+    
+    Args:
+        db: Database session
+        session_id: Session ID
+        changes: Top-level state keys mapped to their new values
+        
+    Returns:
+        True if the changes were saved, False otherwise
+    """
+    if not changes or db.get_bind().dialect.name != "sqlite":
+        return False
+    
+    try:
+        state_json = SessionModel.state_json
+        for key, value in changes.items():
+            state_json = func.json_set(state_json, f'$."{key}"', func.json(json_serializer(value)))
+        result = db.execute(
+            update(SessionModel)
+            .where(
+                SessionModel.session_id == session_id,
+                func.json_type(SessionModel.state_json) == "object"
+            )
+            .values(state_json=state_json)
+        )
+        db.commit()
+        return result.rowcount > 0
+    except Exception as e:
+        logger.error("Error patching orchestrator state in database: %s", e)
+        db.rollback()
         return False
 
 
@@ -82,31 +109,32 @@ def load_state_from_db(db: Session, session_id: str) -> Optional[Dict[str, Any]]
     Returns:
         State dictionary if found, None otherwise
     """
-    print(f"DEBUG: Beginning state load for session {session_id}")
     try:
-        # Get session
-        print(f"DEBUG: Querying database for session {session_id}")
-        session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-        print(f"DEBUG: Query completed, session found: {session is not None}")
-        
-        if not session:
-            print(f"Session with ID {session_id} not found when loading state")
-            return None
-        
-        # Get state from database
-        print(f"DEBUG: Retrieving state_json from session object")
-        state_dict = session.state_json
-        print(f"DEBUG: state_json type: {type(state_dict)}, value: {state_dict}")
+        # Use the session already loaded in this database session if there is
+        # one (the orchestrator fetches it just before loading the state)
+        session = db.identity_map.get(db.identity_key(SessionModel, session_id))
+        if session is not None and "state_json" not in inspect(session).unloaded:
+            state_dict = session.state_json
+        else:
+            # Select only the state column rather than the whole session row
+            # (which carries the guide and intake JSON)
+            row = db.execute(
+                select(SessionModel.state_json).where(SessionModel.session_id == session_id)
+            ).first()
+            
+            if row is None:
+                logger.warning("Session with ID %s not found when loading state", session_id)
+                return None
+            
+            state_dict = row[0]
         
         # If no state is stored yet, return None
         if not state_dict:
-            print(f"No state found for session {session_id}")
+            logger.debug("No state found for session %s", session_id)
             return None
         
-        print(f"State loaded from database for session {session_id}, phase: {state_dict.get('phase', 'unknown')}")
+        logger.debug("State loaded from database for session %s, phase: %s", session_id, state_dict.get('phase', 'unknown'))
         return state_dict
     except Exception as e:
-        import traceback
-        print(f"Error loading orchestrator state from database: {e}")
-        print(f"ERROR TRACEBACK: {traceback.format_exc()}")
+        logger.exception("Error loading orchestrator state from database: %s", e)
         return None
@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+import pytest
+
+anthropic = pytest.importorskip("anthropic")
+
+from app.services.llm import get_llm_service, parse_guide_to_json
+
+# These tests call the live Anthropic API, so they only run with a key
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("ANTHROPIC_API_KEY"),
+    reason="ANTHROPIC_API_KEY environment variable not set"
+)
+
+MODEL = "claude-3-haiku-20240307"
+
+GUIDE_TEXT = """
+# Thesis Guide
+
+## Chapter 1: Introduction
+### 1.1 Background
+Provide context for your research problem and identify the gap your study addresses.
+
+### 1.2 Objectives
+Clearly state your research aims and objectives.
+"""
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One Anthropic client (and HTTP connection pool) shared by all tests"""
+    client = anthropic.Anthropic()
+    yield client
+    client.close()
+
+
+def test_client_structure(client):
+    """The client exposes the Messages API used by the LLM service"""
+    assert hasattr(client, "messages")
+    assert callable(client.messages.create)
+
+
+@pytest.mark.parametrize(
+    "system_prompt, query, extra",
+    [
+        ("You are a helpful assistant.", "What is the capital of France?", {}),
+        (
+            "You are a helpful API expert. Be brief and concise.",
+            "Say hello and explain how the Anthropic API messages format works",
+            {"temperature": 0.7}
+        ),
+    ],
+    ids=["basic", "temperature"]
+)
+def test_messages_create(client, system_prompt, query, extra):
+    """messages.create returns text content in the format generate_response reads"""
+    response = client.messages.create(
+        model=MODEL,
+        max_tokens=1024,
+        system=system_prompt,
+        messages=[{"role": "user", "content": query}],
+        **extra
+    )
+
+    assert response.content
+    assert response.content[0].text
+
+
+@pytest.mark.skipif(
+    not os.environ.get("MEM0_API_KEY"),
+    reason="MEM0_API_KEY environment variable not set (needed by the LLM service)"
+)
+def test_parse_guide():
+    """parse_guide_to_json turns a guide into chapters and sections"""
+    guide_json = asyncio.run(parse_guide_to_json(get_llm_service(), GUIDE_TEXT))
+
+    chapters = guide_json["chapters"]
+    assert chapters
+    assert chapters[0]["sections"]
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from app.services.llm import guide_parser
+from app.services.llm.guide_parser import _IncrementalJSONParser, _repair_json, _sanitize_json
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": [1, 2,], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}),
+        ('{title: "Guide", chapter_count: 2}', {"title": "Guide", "chapter_count": 2}),
+        ("{'title': 'It\\'s a guide'}", {"title": "It's a guide"}),
+        ('{"text": "line one\nline two\tend"}', {"text": "line one\nline two\tend"}),
+        ('```json\n{"a": 1}\n```\nHope this helps!', {"a": 1}),
+        ('{"url": "http://example.com", "n": -1.5e3, "ok": true, "none": null}',
+         {"url": "http://example.com", "n": -1500.0, "ok": True, "none": None}),
+    ],
+    ids=["trailing-commas", "bare-keys", "single-quotes", "raw-control-chars", "surrounding-text", "valid"]
+)
+def test_repair_json_fixes_common_errors(text, expected):
+    """_repair_json turns common LLM JSON mistakes into valid JSON"""
+    repaired, truncated = _repair_json(text)
+
+    assert json.loads(repaired) == expected
+    assert not truncated
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"chapters": [{"title": "Intro", "sections": [1, 2', {"chapters": [{"title": "Intro", "sections": [1, 2]}]}),
+        ('{"chapters": [1, 2,', {"chapters": [1, 2]}),
+        ('{"title": "Unfinished', {"title": "Unfinished"}),
+    ],
+    ids=["open-containers", "trailing-comma", "open-string"]
+)
+def test_repair_json_closes_truncated_output(text, expected):
+    """A truncated response is closed in reverse order of opening and reported as truncated"""
+    repaired, truncated = _repair_json(text)
+
+    assert json.loads(repaired) == expected
+    assert truncated
+
+
+def _parse(*pieces):
+    parser = _IncrementalJSONParser()
+    for piece in pieces:
+        parser.feed(piece)
+    parser.finish()
+    return parser
+
+
+def test_incremental_parser_matches_json_loads():
+    """Text fed in arbitrary pieces parses to the same object as json.loads"""
+    text = '{"chapters": [{"title": "Intro \\u00e9", "sections": [{"id": 1.5}, {"id": null}]}], "done": true}'
+
+    parser = _parse(*(text[i:i + 7] for i in range(0, len(text), 7)))
+
+    assert parser.value == json.loads(text)
+    assert parser.complete
+    assert not parser.syntax_error
+
+
+def test_incremental_parser_skips_surrounding_text():
+    """Text before the first { and after the top-level object is ignored"""
+    parser = _parse("```json\n", '{"a": [1, 2]}', "\n```\nLet me know if you need more.")
+
+    assert parser.value == {"a": [1, 2]}
+    assert parser.complete
+    assert not parser.syntax_error
+
+
+def test_incremental_parser_keeps_truncated_value():
+    """Truncated input keeps the structure built so far and is not complete"""
+    parser = _parse('{"chapters": [{"title": "Intro"}, {"title": "Meth')
+
+    assert parser.value == {"chapters": [{"title": "Intro"}, {}]}
+    assert not parser.complete
+    assert not parser.syntax_error
+
+
+def test_incremental_parser_flags_syntax_error():
+    """Malformed JSON sets syntax_error and keeps what was parsed before it"""
+    parser = _parse('{"a": 1, "b": [1, 2,], "c": 3}')
+
+    assert parser.syntax_error
+    assert not parser.complete
+    assert parser.value["a"] == 1
+
+
+def test_incremental_parser_without_object():
+    """Input without an object leaves value as None"""
+    parser = _parse("Sorry, I can't help with that.")
+
+    assert parser.value is None
+    assert not parser.complete
+
+
+@pytest.mark.parametrize(
+    "text, expected, complete",
+    [
+        ('```json\n{"a": [1, 2]}\n```', {"a": [1, 2]}, True),
+        ('{"a": [1, 2,], b: 3}', {"a": [1, 2], "b": 3}, True),
+        ('{"chapters": [{"title": "Intro"}, {"title": "Meth', {"chapters": [{"title": "Intro"}, {"title": "Meth"}]}, False),
+    ],
+    ids=["valid", "malformed", "truncated"]
+)
+def test_sanitize_json_without_ijson(monkeypatch, text, expected, complete):
+    """Without ijson, guides are still parsed, repaired and recovered from truncated output"""
+    monkeypatch.setattr(guide_parser, "ijson", None)
+
+    assert _sanitize_json(text) == (expected, complete)
@@ -0,0 +1,97 @@
+import pytest
+
+from app.services.llm_cache import LLMCache, MemoryBackend, SemanticCache
+
+
+@pytest.fixture
+def llm_cache(monkeypatch):
+    monkeypatch.delenv("LLM_CACHE_DISABLED", raising=False)
+    return LLMCache(MemoryBackend(), ttl_seconds=60)
+
+
+def test_make_key_is_canonical():
+    """Keys don't depend on parameter order but do on every parameter value"""
+    key = LLMCache.make_key(model="m", prompt="p", max_tokens=10)
+
+    assert key == LLMCache.make_key(max_tokens=10, prompt="p", model="m")
+    assert key != LLMCache.make_key(model="m", prompt="p", max_tokens=11)
+
+
+def test_llm_cache_round_trip(llm_cache):
+    """A stored response is returned for the same key only"""
+    key = LLMCache.make_key(model="m", prompt="p")
+    llm_cache.set_sync(key, {"message": "cached"})
+
+    assert llm_cache.get_sync(key) == {"message": "cached"}
+    assert llm_cache.get_sync(LLMCache.make_key(model="m", prompt="q")) is None
+
+
+def test_llm_cache_only_caches_low_temperatures(llm_cache):
+    """Calls above max_temperature are not considered cacheable"""
+    assert llm_cache.is_cacheable(0.0)
+    assert llm_cache.is_cacheable(0.2)
+    assert not llm_cache.is_cacheable(0.7)
+
+
+def test_llm_cache_can_be_disabled(monkeypatch):
+    """LLM_CACHE_DISABLED turns the cache into a no-op"""
+    monkeypatch.setenv("LLM_CACHE_DISABLED", "1")
+    cache = LLMCache(MemoryBackend())
+    cache.set_sync("key", "value")
+
+    assert not cache.is_cacheable(0.0)
+    assert cache.get_sync("key") is None
+
+
+def test_memory_backend_evicts_least_recently_used():
+    """The least recently used entry is evicted once max_entries is exceeded"""
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+
+    assert backend.get("a") == 1
+    assert backend.get("b") is None
+    assert backend.get("c") == 3
+
+
+@pytest.fixture
+def semantic_cache():
+    return SemanticCache(enabled=True)
+
+
+def test_semantic_cache_matches_rewordings(semantic_cache):
+    """A re-punctuated repeat of a message hits; an unrelated message misses"""
+    scope = SemanticCache.scope("system prompt", "session", "1.1")
+    semantic_cache.store(scope, "What should the introduction cover?", "response")
+
+    assert semantic_cache.lookup(scope, "what should the introduction cover") == "response"
+    assert semantic_cache.lookup(scope, "Please list the sources for chapter two") is None
+
+
+def test_semantic_cache_is_scoped(semantic_cache):
+    """Entries are only served within the scope they were stored in"""
+    scope = SemanticCache.scope("system prompt", "session", "1.1")
+    other = SemanticCache.scope("system prompt", "session", "1.2")
+    semantic_cache.store(scope, "What should the introduction cover?", "response")
+
+    assert scope == SemanticCache.scope("system prompt", "session", "1.1")
+    assert semantic_cache.lookup(other, "What should the introduction cover?") is None
+
+    semantic_cache.invalidate(scope)
+    assert semantic_cache.lookup(scope, "What should the introduction cover?") is None
+
+
+def test_semantic_cache_memoizes_embeddings(semantic_cache):
+    """Embedding the same text again reuses the earlier vector"""
+    assert semantic_cache.embed("the same text") is semantic_cache.embed("the same text")
+
+
+def test_semantic_cache_disabled():
+    """A disabled cache never stores or returns responses"""
+    cache = SemanticCache(enabled=False)
+    scope = SemanticCache.scope("system prompt")
+    cache.store(scope, "message", "response")
+
+    assert cache.lookup(scope, "message") is None
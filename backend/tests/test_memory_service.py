@@ -0,0 +1,74 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.services import memory_service
+from app.services.memory_service import MemoryService
+
+
+class _SearchOnlyClient:
+    """Stands in for mem0's MemoryClient; search has the same required query argument."""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def search(self, query, version=None, filters=None, top_k=None):
+        self.calls.append({"query": query, "version": version, "filters": filters, "top_k": top_k})
+        return self.results
+
+
+def _service(results):
+    service = MemoryService.__new__(MemoryService)
+    service.client = _SearchOnlyClient(results)
+    return service
+
+
+@pytest.fixture
+def session_id(monkeypatch):
+    # Searches go to the client rather than a local index
+    monkeypatch.setattr(memory_service, "_local_index", None)
+    return f"test-{uuid.uuid4()}"
+
+
+def _bullets_message(section_id, bullets):
+    return {"memory": json.dumps({"section_id": section_id, "bullet_points": bullets})}
+
+
+def test_get_bullets_recorded_in_process(session_id):
+    """Bullets recorded with put_bullets are returned without a search"""
+    service = _service([])
+    service.put_bullets(session_id, "1.1", ["Background"])
+
+    assert asyncio.run(service.get_bullets(session_id, "1.1")) == ["Background"]
+    assert service.client.calls == []
+
+
+def test_get_bullets_falls_back_to_search(session_id):
+    """Without a recorded entry, the section's bullet_points message is found in mem0"""
+    service = _service({"results": [
+        {"memory": "The user is writing about solar power."},
+        _bullets_message("1.2", ["Wrong section"]),
+        _bullets_message("1.1", ["Background", "Research gap"]),
+    ]})
+
+    bullets = asyncio.run(service.get_bullets(session_id, "1.1"))
+
+    assert bullets == ["Background", "Research gap"]
+    call, = service.client.calls
+    assert call["query"]
+    assert call["version"] == "v2"
+    assert call["filters"] == {"user_id": session_id}
+
+    # The result is recorded, so the next lookup doesn't search again
+    assert asyncio.run(service.get_bullets(session_id, "1.1")) == bullets
+    assert len(service.client.calls) == 1
+
+
+def test_get_bullets_not_found(session_id):
+    """None is returned when no bullet_points message for the section exists"""
+    service = _service([_bullets_message("2.1", ["Other section"]), {"memory": "not json"}])
+
+    assert asyncio.run(service.get_bullets(session_id, "1.1")) is None
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+# Importing the orchestrator package loads the app settings, which require
+# API keys; these tests never call the APIs, so placeholders do
+with pytest.MonkeyPatch.context() as mp:
+    mp.setenv("ANTHROPIC_API_KEY", os.environ.get("ANTHROPIC_API_KEY", "unused"))
+    mp.setenv("MEM0_API_KEY", os.environ.get("MEM0_API_KEY", "unused"))
+    from app.services.orchestrator.utils import _FIELD_KEYWORDS, determine_intake_field
+
+
+def _field_by_field(previous_question):
+    """The keyword search determine_intake_field replaced, checking one field at a time."""
+    question_lower = previous_question.lower()
+    for field, field_keywords in _FIELD_KEYWORDS.items():
+        for keyword in field_keywords:
+            if keyword in question_lower:
+                return field
+    return "notes"
+
+
+@pytest.mark.parametrize(
+    "previous_question, expected",
+    [
+        ("[TITLE] What would you like to call your report?", "title"),
+        ("Great. [REPORT_TITLE] Any working title?", "title"),
+        ("[ACADEMIC_LEVEL] Which year are you in?", "academic_level"),
+        ("[DEADLINE] When is it due? [TOPIC]", "deadline"),
+        ("[UNKNOWN_TAG] What is the title?", "notes"),
+        ("", "notes"),
+    ],
+    ids=["tag", "tag-alias", "tag-over-keywords", "first-tag", "unknown-tag", "empty"]
+)
+def test_determine_intake_field_tags(previous_question, expected):
+    """An explicit [TAG] decides the field before any keyword matching"""
+    assert determine_intake_field(previous_question) == expected
+
+
+@pytest.mark.parametrize(
+    "previous_question",
+    [
+        "What is the topic of your report?",
+        "Who will read the report, and what level are they at?",
+        "How long should it be, and what citation style do you need?",
+        "What is the subject? Also, is there a due date?",
+        "When is the report due?",
+        "Which department or faculty is this for?",
+        "Do you have any specific requirements or other notes?",
+        "Is there anything else I should know?",
+        "Tell me about the structure you have in mind.",
+        "Thanks!",
+    ]
+)
+def test_determine_intake_field_keywords(previous_question):
+    """Keyword matching picks the same field as the field-by-field search"""
+    assert determine_intake_field(previous_question) == _field_by_field(previous_question)
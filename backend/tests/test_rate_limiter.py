@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from app.services.llm.rate_limiter import RateLimiter, estimate_tokens
+
+WINDOW = 0.2  # seconds; short so the tests don't wait on a real minute
+
+
+async def _timed_acquires(limiter, *token_counts):
+    """Acquire each reservation in turn and return the time each was granted."""
+    start = time.monotonic()
+    granted = []
+    for tokens in token_counts:
+        await limiter.acquire(tokens)
+        granted.append(time.monotonic() - start)
+    return granted
+
+
+def test_estimate_tokens():
+    """Token estimates count strings, content blocks and messages at ~4 characters per token"""
+    messages = [{"role": "user", "content": [{"type": "text", "text": "x" * 40}]}]
+
+    assert estimate_tokens("x" * 40) == 10
+    assert estimate_tokens("x" * 40, messages, [{"type": "text", "text": "x" * 40}]) == 30
+
+
+def test_requests_per_window():
+    """Requests over the per-window limit wait for the oldest one to leave the window"""
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000, window_seconds=WINDOW)
+
+    granted = asyncio.run(_timed_acquires(limiter, 1, 1, 1))
+
+    assert granted[1] < WINDOW / 2
+    assert granted[2] >= WINDOW * 0.9
+
+
+def test_tokens_per_window():
+    """Reservations over the token budget wait until earlier tokens leave the window"""
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=100, window_seconds=WINDOW)
+
+    granted = asyncio.run(_timed_acquires(limiter, 60, 30, 60))
+
+    assert granted[1] < WINDOW / 2
+    assert granted[2] >= WINDOW * 0.9
+
+
+def test_oversized_call_is_not_blocked_forever():
+    """A single call larger than the whole token budget still goes through"""
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=100, window_seconds=WINDOW)
+
+    granted = asyncio.run(_timed_acquires(limiter, 10_000))
+
+    assert granted[0] < WINDOW / 2
+
+
+def test_penalize_blocks_callers():
+    """After a 429, callers wait out the server's retry-after period"""
+    limiter = RateLimiter(window_seconds=WINDOW)
+    limiter.penalize(WINDOW)
+
+    granted = asyncio.run(_timed_acquires(limiter, 1))
+
+    assert granted[0] >= WINDOW * 0.9
+
+
+def test_reserve_limits_concurrency():
+    """reserve holds one of max_concurrency slots for the duration of the call"""
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=1000, max_concurrency=2)
+    in_flight = 0
+    peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with limiter.reserve(1):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(main())
+
+    assert peak == 2
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models.session import Session as SessionModel
+from app.services.session_service import store_intake_field, store_intake_fields
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh in-memory SQLite database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def session(db):
+    session = SessionModel(guide_json={"chapters": []}, intake_json={"title": "Draft"})
+    db.add(session)
+    db.commit()
+    return session
+
+
+def _stored_intake(db, session):
+    """Read intake_json straight from the database, bypassing the identity map."""
+    return db.execute(
+        select(SessionModel.intake_json).where(SessionModel.session_id == session.session_id)
+    ).scalar_one()
+
+
+def test_store_intake_fields_merges_into_stored_json(db, session):
+    """New fields are added and existing ones overwritten, keeping the rest"""
+    done = store_intake_fields(db, session, {"topic": "Solar power", "title": "Final", "length": 3000})
+
+    expected = {"title": "Final", "topic": "Solar power", "length": 3000}
+    assert done is False
+    assert session.intake_json == expected
+    assert _stored_intake(db, session) == expected
+
+
+def test_store_intake_fields_values_round_trip(db, session):
+    """Values of every JSON type are stored as JSON, not as strings"""
+    fields = {"notes": None, "citations": ["APA", "MLA"], "format": {"font": "Arial", "size": 12}, "draft": True}
+
+    store_intake_fields(db, session, fields)
+
+    assert _stored_intake(db, session) == {"title": "Draft", **fields}
+
+
+def test_store_intake_fields_on_empty_json(db):
+    """Fields are stored when nothing has been stored yet"""
+    session = SessionModel(guide_json={"chapters": []})
+    db.add(session)
+    db.commit()
+
+    store_intake_field(db, session, "topic", "Solar power")
+
+    assert _stored_intake(db, session) == {"topic": "Solar power"}
+
+
+def test_store_intake_fields_keeps_tracking_changes(db, session):
+    """The session's intake_json is still mutation-tracked after a store"""
+    store_intake_fields(db, session, {"topic": "Solar power"})
+
+    session.intake_json["deadline"] = "Friday"
+    db.commit()
+
+    assert _stored_intake(db, session) == {"title": "Draft", "topic": "Solar power", "deadline": "Friday"}
+
+
+def test_store_intake_fields_with_quoted_key(db, session):
+    """Keys that can't be used in a JSON path fall back to writing the whole object"""
+    store_intake_fields(db, session, {'say "hi"': "hello"})
+
+    assert _stored_intake(db, session) == {"title": "Draft", 'say "hi"': "hello"}
+
+
+def test_store_intake_fields_returns_intake_done(db, session):
+    """The session's intake_done flag is returned unchanged"""
+    session.intake_done = True
+    db.commit()
+
+    assert store_intake_fields(db, session, {"topic": "Solar power"}) is True